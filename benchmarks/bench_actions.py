@@ -0,0 +1,131 @@
+"""End-to-end action latency benchmark.
+
+Times what one user waits for each interaction: logging in, switching pages
+and every write form (order, status update, new item, new supplier, new
+user). A single admin session drives warehouse.main() through AppTest, so
+each figure covers the full rerun chain the click triggers. Each action runs
+once untimed to reach its page, then --repeat times on that page.
+
+    python benchmarks/bench_actions.py --save before.json
+    python benchmarks/bench_actions.py --baseline before.json
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+
+from common import add_backend_arguments, setup_warehouse
+from generate_data import add_size_arguments, counts_from_args, generate, username
+from load_sessions import Session, allow_concurrent_runs
+
+
+def switch_page(session):
+    session.navigate("Inventory" if session.app.session_state.current_page == "Dashboard" else "Dashboard")
+
+
+ACTIONS = {
+    "navigate": switch_page,
+    "place_order": Session.order,
+    "update_status": Session.status,
+    "add_item": Session.add_item,
+    "add_supplier": Session.add_supplier,
+    "create_user": Session.create_user
+}
+
+
+def new_session(seed, timeout):
+    return Session(username(0), True, random.Random(seed), timeout, 0)
+
+
+def time_action(session, action):
+    reruns = len(session.rerun_latencies)
+    started = time.perf_counter()
+    action(session)
+    return time.perf_counter() - started, len(session.rerun_latencies) - reruns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_backend_arguments(parser)
+    add_size_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs per action (default: 10)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-rerun timeout in seconds (default: 60)")
+    parser.add_argument("--save", default=None, help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="show the change against this JSON file")
+    args = parser.parse_args(argv)
+
+    warehouse = setup_warehouse(args)
+    allow_concurrent_runs()
+    with warehouse.db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM users WHERE username = %s", (username(0),))
+        seeded = cursor.fetchone()[0]
+    if not seeded:
+        print(f"Generating {args.size} dataset (seed {args.seed})")
+        generate(warehouse, counts_from_args(args), args.seed, args.days)
+
+    timings = {"login": []}
+    reruns = {"login": 0}
+    for n in range(args.repeat):
+        session = new_session(args.seed + n, args.timeout)
+        elapsed, count = time_action(session, Session.login)
+        timings["login"].append(elapsed)
+        reruns["login"] = count
+
+    session = new_session(args.seed, args.timeout)
+    session.login()
+    for name, action in ACTIONS.items():
+        action(session)
+        timings[name] = []
+        for _ in range(args.repeat):
+            elapsed, reruns[name] = time_action(session, action)
+            timings[name].append(elapsed)
+
+    results = {}
+    for name, latencies in timings.items():
+        latencies.sort()
+        results[name] = {
+            "p50_ms": round(warehouse.percentile(latencies, 0.50) * 1000, 1),
+            "p95_ms": round(warehouse.percentile(latencies, 0.95) * 1000, 1),
+            "max_ms": round(latencies[-1] * 1000, 1),
+            "reruns": reruns[name]
+        }
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as source:
+            baseline = json.load(source)["results"]
+
+    print(f"{'action':<15} {'reruns':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"
+          + (f" {'was p50':>9} {'change':>9}" if baseline else ""))
+    for name, result in results.items():
+        line = (f"{name:<15} {result['reruns']:>6} {result['p50_ms']:>9.0f} {result['p95_ms']:>9.0f} "
+                f"{result['max_ms']:>9.0f}")
+        if name in baseline:
+            line += f" {baseline[name]['p50_ms']:>9.0f} {result['p50_ms'] - baseline[name]['p50_ms']:>+9.0f}"
+        print(line)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as target:
+            json.dump({
+                "meta": {
+                    "release": warehouse.APP_VERSION,
+                    "recorded_at": datetime.now().isoformat(timespec="seconds"),
+                    "backend": args.backend,
+                    "size": args.size,
+                    "repeat": args.repeat,
+                    "python": platform.python_version(),
+                    "machine": platform.platform()
+                },
+                "results": results
+            }, target, indent=2)
+            target.write("\n")
+        print(f"Saved results to {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""Archiving benchmark.
+
+Fills a database with generate_data.py, times archive_rows() moving orders
+and activity_log rows older than --days, and compares the Order History
+tab and report with and without archived orders.
+
+    python benchmarks/bench_archive.py --size small --archive-days 90
+"""
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+
+from common import add_backend_arguments, setup_warehouse
+from generate_data import add_size_arguments, counts_from_args, generate
+
+
+def time_read(warehouse, func, repeat):
+    cache = warehouse.get_query_cache()
+    latencies = []
+    for _ in range(repeat):
+        cache.clear()
+        started = time.perf_counter()
+        rows = len(func())
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return warehouse.percentile(latencies, 0.50) * 1000, rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_backend_arguments(parser)
+    add_size_arguments(parser)
+    parser.add_argument("--archive-days", type=int, default=90, help="retention horizon to archive at (default: 90)")
+    parser.add_argument("--batch-size", type=int, default=None, help="rows per batch (default: ARCHIVE_CONFIG)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per read (default: 5)")
+    args = parser.parse_args(argv)
+
+    warehouse = setup_warehouse(args)
+    print(f"Generating {args.size} dataset (seed {args.seed})")
+    generate(warehouse, counts_from_args(args), args.seed, args.days)
+
+    today = date.today()
+    reads = {
+        "order_history": lambda include: warehouse.fetch_order_history(include)[0],
+        "report_order_history_365d": lambda include: warehouse.load_order_report(
+            today - timedelta(days=365), today, include)
+    }
+    before = {name: time_read(warehouse, lambda: read(False), args.repeat) for name, read in reads.items()}
+
+    print(f"{'target':<14} {'rows':>9} {'seconds':>9} {'rows/s':>9}")
+    for target in warehouse.ARCHIVE_TARGETS:
+        started = time.perf_counter()
+        moved = warehouse.archive_rows(target, args.archive_days, args.batch_size)
+        elapsed = time.perf_counter() - started
+        print(f"{target:<14} {moved:>9,} {elapsed:>9.2f} {moved / elapsed if elapsed else 0:>9,.0f}")
+
+    print(f"{'read':<28} {'before ms':>10} {'hot ms':>10} {'+archive ms':>12} {'hot rows':>9} {'all rows':>9}")
+    for name, read in reads.items():
+        hot = time_read(warehouse, lambda: read(False), args.repeat)
+        full = time_read(warehouse, lambda: read(True), args.repeat)
+        print(f"{name:<28} {before[name][0]:>10.1f} {hot[0]:>10.1f} {full[0]:>12.1f} {hot[1]:>9,} {full[1]:>9,}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""Streaming export memory benchmark.
+
+Exports the inventory table at growing row counts with the chunked
+write_export() pipeline and with the old load-everything approach
+(SELECT * into a DataFrame, then to_csv), and reports peak Python heap
+for each. The streaming figures should stay flat as the table grows.
+
+    python benchmarks/bench_export.py --sizes 10000 50000 200000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from common import add_backend_arguments, setup_warehouse
+
+EXPORT_SQL = "SELECT * FROM inventory ORDER BY id"
+
+
+def grow_inventory(warehouse, current, target):
+    with warehouse.db_connection() as conn:
+        cursor = conn.cursor()
+        batch = []
+        for n in range(current, target):
+            batch.append((f"Benchmark item {n}", "x" * 200, f"Category {n % 25}", n % 500, 10,
+                          round(1 + (n % 1000) / 10, 2), f"Supplier {n % 50}"))
+            if len(batch) == 5000:
+                cursor.executemany("""
+                    INSERT INTO inventory (item_name, description, category, stock, min_stock, price, supplier)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, batch)
+                batch = []
+        if batch:
+            cursor.executemany("""
+                INSERT INTO inventory (item_name, description, category, stock, min_stock, price, supplier)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, batch)
+        conn.commit()
+
+
+def measure(func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_backend_arguments(parser)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 200000],
+                        help="inventory row counts to export (default: 10000 50000 200000)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="rows per fetch (default: EXPORT_CONFIG)")
+    args = parser.parse_args(argv)
+
+    warehouse = setup_warehouse(args)
+    formats = warehouse.available_export_formats()
+    out_dir = tempfile.mkdtemp(prefix="wms-export-")
+
+    def naive_export():
+        with warehouse.db_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(EXPORT_SQL)
+            inventory = pd.DataFrame(cursor.fetchall())
+        with open(os.path.join(out_dir, "naive.csv"), "wb") as target:
+            target.write(inventory.to_csv(index=False).encode("utf-8"))
+
+    def streaming_export(export_format):
+        def run():
+            with open(os.path.join(out_dir, "export.out"), "wb") as target:
+                warehouse.write_export(EXPORT_SQL, (), export_format, target, args.chunk_size)
+        return run
+
+    print(f"{'rows':>10}  {'method':<22} {'peak heap':>12} {'time':>9}")
+    current = 0
+    for size in sorted(args.sizes):
+        grow_inventory(warehouse, current, size)
+        current = size
+        for export_format in formats:
+            peak, elapsed = measure(streaming_export(export_format))
+            print(f"{size:>10,}  {'stream ' + export_format:<22} {peak / 2**20:>9.1f} MB {elapsed:>8.2f}s")
+        peak, elapsed = measure(naive_export)
+        print(f"{size:>10,}  {'DataFrame.to_csv':<22} {peak / 2**20:>9.1f} MB {elapsed:>8.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Concurrent order placement load test.
+
+Fires many simultaneous place_order() calls, each for one to --max-lines
+lines drawn from a handful of SKUs, and checks that stock is conserved: every
+unit is either still in stock or on a line of an accepted order, and no SKU
+goes negative.
+
+    python benchmarks/bench_order_placement.py --orders 5000 --threads 32
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import add_backend_arguments, setup_warehouse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_backend_arguments(parser)
+    parser.add_argument("--orders", type=int, default=5000, help="orders to fire (default: 5000)")
+    parser.add_argument("--threads", type=int, default=32, help="concurrent clients (default: 32)")
+    parser.add_argument("--items", type=int, default=5, help="SKUs competing for stock (default: 5)")
+    parser.add_argument("--stock", type=int, default=2000, help="initial stock per SKU (default: 2000)")
+    parser.add_argument("--max-quantity", type=int, default=3, help="largest line quantity (default: 3)")
+    parser.add_argument("--max-lines", type=int, default=3, help="most lines per order (default: 3)")
+    parser.add_argument("--min-throughput", type=float, default=0.0,
+                        help="fail if fewer orders per second are processed")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    warehouse = setup_warehouse(args)
+    rng = random.Random(args.seed)
+
+    with warehouse.db_connection() as conn:
+        cursor = conn.cursor()
+        item_ids = []
+        for n in range(args.items):
+            cursor.execute("""
+                INSERT INTO inventory (item_name, category, stock, min_stock, price, supplier)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (f"Load test SKU {n}", "Benchmark", args.stock, 5, 1.0, "Benchmark Supplier"))
+            item_ids.append(cursor.lastrowid)
+        conn.commit()
+
+    requests = [[(item_id, rng.randint(1, args.max_quantity))
+                 for item_id in rng.sample(item_ids, rng.randint(1, min(args.max_lines, len(item_ids))))]
+                for _ in range(args.orders)]
+    accepted = {item_id: 0 for item_id in item_ids}
+    counts = {"accepted": 0, "rejected": 0}
+    latencies = []
+    lock = threading.Lock()
+
+    def fire(lines):
+        started = time.perf_counter()
+        try:
+            warehouse.place_order(lines, "loadtest")
+            ok = True
+        except warehouse.OrderError:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if ok:
+                for item_id, quantity in lines:
+                    accepted[item_id] += quantity
+                counts["accepted"] += 1
+            else:
+                counts["rejected"] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(fire, requests))
+    elapsed = time.perf_counter() - started
+
+    failures = []
+    with warehouse.db_connection() as conn:
+        cursor = conn.cursor()
+        for item_id in item_ids:
+            cursor.execute("SELECT stock FROM inventory WHERE id = %s", (item_id,))
+            stock = cursor.fetchone()[0]
+            cursor.execute("SELECT COALESCE(SUM(quantity), 0) FROM order_items WHERE item_id = %s", (item_id,))
+            ordered = int(cursor.fetchone()[0])
+            if stock < 0:
+                failures.append(f"SKU {item_id}: negative stock {stock}")
+            if stock + ordered != args.stock:
+                failures.append(f"SKU {item_id}: stock {stock} + ordered {ordered} != initial {args.stock}")
+            if ordered != accepted[item_id]:
+                failures.append(f"SKU {item_id}: {ordered} units in orders but {accepted[item_id]} accepted")
+
+    latencies.sort()
+    throughput = args.orders / elapsed
+    print(f"Backend:     {args.backend} ({args.threads} threads, pool size {warehouse.pool_stats()['size']})")
+    print(f"Orders:      {args.orders} fired, {counts['accepted']} accepted, {counts['rejected']} rejected")
+    print(f"Elapsed:     {elapsed:.2f}s ({throughput:.0f} orders/s)")
+    print(f"Latency:     p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+    print(f"Pool:        {warehouse.pool_stats()}")
+
+    if throughput < args.min_throughput:
+        failures.append(f"throughput {throughput:.0f}/s below required {args.min_throughput:.0f}/s")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK: stock conserved")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""Page data-path benchmark.
+
+Runs the data path behind each page headlessly (no Streamlit server):
+login, dashboard KPIs, inventory listing, item search, order history and
+the reports. Reports latency percentiles, statements, rows and peak Python heap
+per case. The shared read cache is cleared before every run, so the numbers
+are what a cache miss costs.
+
+An empty database is first filled by generate_data.py at --size.
+Results can be saved as a JSON baseline and later runs compared against it:
+
+    python benchmarks/bench_pages.py --size small --save benchmarks/baselines/sqlite-small.json
+    python benchmarks/bench_pages.py --size small --baseline benchmarks/baselines/sqlite-small.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from common import add_backend_arguments, setup_warehouse
+from generate_data import PASSWORD, add_size_arguments, counts_from_args, generate, username
+
+
+def build_cases(warehouse):
+    """Name -> callable for every page data path"""
+    today = date.today()
+    first_page = {}
+
+    def inventory_first_page():
+        page, first_page["cursor"] = warehouse.fetch_inventory_page(warehouse.INVENTORY_DEFAULT_COLUMNS)
+        return page
+
+    def inventory_next_page():
+        if "cursor" not in first_page:
+            inventory_first_page()
+        return warehouse.fetch_inventory_page(warehouse.INVENTORY_DEFAULT_COLUMNS, after=first_page["cursor"])[0]
+
+    def item_search_rebuild():
+        warehouse.get_item_search_index().reset()
+        return warehouse.refresh_item_search_index()
+
+    def dashboard():
+        warehouse.load_dashboard_metrics.clear()
+        return warehouse.get_dashboard_metrics()
+
+    return {
+        "login": lambda: warehouse.authenticate(username(0), PASSWORD),
+        "dashboard": dashboard,
+        "inventory_filter_options": warehouse.fetch_inventory_filter_options,
+        "inventory_first_page": inventory_first_page,
+        "inventory_next_page": inventory_next_page,
+        "inventory_low_stock_page": lambda: warehouse.fetch_inventory_page(
+            warehouse.INVENTORY_DEFAULT_COLUMNS, sort_by="stock", low_stock_only=True)[0],
+        "item_search_rebuild": item_search_rebuild,
+        "order_item_search": lambda: warehouse.search_items("sku 0001", in_stock_only=True),
+        "inventory_search_page": lambda: warehouse.fetch_inventory_page(
+            warehouse.INVENTORY_DEFAULT_COLUMNS,
+            item_ids=warehouse.refresh_item_search_index().search("tools", warehouse.SEARCH_CONFIG["grid_max_results"]))[0],
+        "order_history": lambda: warehouse.fetch_order_history()[0],
+        "order_history_archived": lambda: warehouse.fetch_order_history(include_archived=True)[0],
+        "order_lines": lambda: warehouse.load_order_lines(1),
+        "report_inventory_summary": warehouse.load_inventory_summary,
+        "report_order_history_90d": lambda: warehouse.load_order_report(today - timedelta(days=90), today),
+        "report_order_90d_archived": lambda: warehouse.load_order_report(
+            today - timedelta(days=90), today, include_archived=True),
+        "report_supplier_performance": warehouse.load_supplier_performance,
+        "report_cycle_time_30d": lambda: warehouse.stage_percentiles(
+            warehouse.load_stage_durations(today - timedelta(days=30), today)),
+        "report_status_throughput_30d": lambda: warehouse.load_status_throughput(today - timedelta(days=30), today),
+        "report_backlog_ageing": warehouse.load_backlog_ageing
+    }
+
+
+def run_case(warehouse, func, repeat, warmup):
+    cache = warehouse.get_query_cache()
+    for _ in range(warmup):
+        cache.clear()
+        func()
+
+    latencies = []
+    queries = rows = 0
+    for _ in range(repeat):
+        cache.clear()
+        warehouse.begin_page_queries("benchmark")
+        started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - started)
+        scope = warehouse.finish_page_queries()
+        queries, rows = scope["queries"], scope["rows"]
+
+    cache.clear()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "p50_ms": round(warehouse.percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(warehouse.percentile(latencies, 0.95) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+        "peak_mb": round(peak / 2**20, 3),
+        "queries": queries,
+        "rows": rows
+    }
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Cases whose p50 or peak heap grew by more than tolerance (and min_delta_ms for latency)"""
+    regressions = []
+    for case, current in results.items():
+        before = baseline["results"].get(case)
+        if before is None:
+            continue
+        if current["p50_ms"] > before["p50_ms"] * (1 + tolerance) and current["p50_ms"] - before["p50_ms"] > min_delta_ms:
+            regressions.append(f"{case}: p50 {before['p50_ms']:.2f} -> {current['p50_ms']:.2f} ms")
+        if current["peak_mb"] > before["peak_mb"] * (1 + tolerance) and current["peak_mb"] - before["peak_mb"] > 1:
+            regressions.append(f"{case}: peak heap {before['peak_mb']:.1f} -> {current['peak_mb']:.1f} MB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_backend_arguments(parser)
+    add_size_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case (default: 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per case (default: 1)")
+    parser.add_argument("--cases", nargs="+", default=None, help="only run these cases")
+    parser.add_argument("--save", default=None, help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="compare against this JSON baseline; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed growth over the baseline (default: 0.25)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="ignore latency growth smaller than this (default: 1.0)")
+    args = parser.parse_args(argv)
+
+    warehouse = setup_warehouse(args)
+    counts = counts_from_args(args)
+    with warehouse.db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM orders")
+        existing_orders = cursor.fetchone()[0]
+    if existing_orders == 0:
+        print(f"Generating {args.size} dataset (seed {args.seed})")
+        generate(warehouse, counts, args.seed, args.days)
+
+    cases = build_cases(warehouse)
+    selected = args.cases or list(cases)
+    unknown = [case for case in selected if case not in cases]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)} (choose from {', '.join(cases)})")
+
+    results = {}
+    print(f"{'case':<30} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'peak MB':>9} {'queries':>8} {'rows':>9}")
+    for case in selected:
+        result = results[case] = run_case(warehouse, cases[case], args.repeat, args.warmup)
+        print(f"{case:<30} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['max_ms']:>9.2f} "
+              f"{result['peak_mb']:>9.2f} {result['queries']:>8} {result['rows']:>9,}")
+
+    report = {
+        "meta": {
+            "release": warehouse.APP_VERSION,
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            "backend": args.backend,
+            "size": args.size,
+            "counts": counts,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "machine": platform.platform()
+        },
+        "results": results
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as target:
+            json.dump(report, target, indent=2)
+            target.write("\n")
+        print(f"Saved results to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as source:
+            baseline = json.load(source)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if not regressions:
+            print(f"OK: within {args.tolerance:.0%} of {args.baseline}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""Shared setup for the benchmark scripts.
+
+Every script accepts the same backend options and defaults to a throwaway
+SQLite database, so benchmarks run on a single machine without MySQL.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def add_backend_arguments(parser):
+    parser.add_argument("--backend", choices=["sqlite", "mysql"], default="sqlite",
+                        help="storage backend to benchmark (default: sqlite)")
+    parser.add_argument("--sqlite-path", default=None,
+                        help="SQLite database file (default: a new temporary file)")
+    parser.add_argument("--pool-size", type=int, default=None,
+                        help="connection pool size (default: POOL_CONFIG)")
+
+
+def setup_warehouse(args):
+    """Points warehouse at the requested backend, bootstraps the schema and returns the module"""
+    if args.backend == "sqlite" and args.sqlite_path is None:
+        args.sqlite_path = os.path.join(tempfile.mkdtemp(prefix="wms-bench-"), "warehouse.db")
+
+    os.environ["WMS_STORAGE_BACKEND"] = args.backend
+    if args.sqlite_path:
+        os.environ["WMS_SQLITE_PATH"] = args.sqlite_path
+
+    import warehouse
+    warehouse.STORAGE_CONFIG["backend"] = args.backend
+    if args.sqlite_path:
+        warehouse.STORAGE_CONFIG["sqlite_path"] = args.sqlite_path
+    if args.pool_size:
+        warehouse.POOL_CONFIG["size"] = args.pool_size
+
+    if warehouse.ensure_schema() is None:
+        sys.exit("Could not initialise the database")
+    return warehouse
@@ -0,0 +1,196 @@
+"""Seeded synthetic data generator.
+
+Fills suppliers, users, inventory, orders (with their lines and status
+history) and activity_log at a preset size (or explicit counts), then rebuilds the summary
+tables so every page sees a consistent database. The same seed always
+produces the same data.
+
+    python benchmarks/generate_data.py --size medium --sqlite-path /tmp/wms-1m.db
+
+Sizes (orders): small 10k, medium 1M, large 10M.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import timedelta
+
+from common import add_backend_arguments, setup_warehouse
+
+SIZES = {
+    "small": {"suppliers": 50, "users": 50, "items": 2000, "orders": 10000, "activity": 20000},
+    "medium": {"suppliers": 200, "users": 200, "items": 20000, "orders": 1000000, "activity": 500000},
+    "large": {"suppliers": 500, "users": 500, "items": 100000, "orders": 10000000, "activity": 2000000}
+}
+
+CATEGORIES = ["Electronics", "Furniture", "Packaging", "Tools", "Hardware", "Safety", "Cleaning",
+              "Office", "Spare Parts", "Textiles", "Food", "Chemicals"]
+STATUSES = ["Pending", "Processing", "Shipped", "Delivered"]
+STATUS_WEIGHTS = [15, 10, 15, 60]
+LINE_WEIGHTS = [60, 20, 10, 5, 5]     # orders with 1, 2, ... 5 lines
+STAGE_HOURS = {"Pending": 4, "Processing": 12, "Shipped": 48}    # mean hours spent in each open status
+ACTIONS = ["Login", "Logout", "Order placed", "Order status updated", "Item added", "Inventory imported"]
+PASSWORD = "benchmark"
+
+
+def username(n):
+    return f"bench_user_{n}"
+
+
+def insert_batches(cursor, sql, rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            cursor.executemany(sql, batch)
+            batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+
+
+def order_with_history(rng, order_id, items, users, placed_at, now):
+    """One orders row with its order_items and order_status_history rows
+
+    Stage durations are exponential around STAGE_HOURS.
+    """
+    status = rng.choices(STATUSES, STATUS_WEIGHTS)[0]
+    ordered_by = rng.choice(users)[1]
+    history = [(order_id, None, "Pending", None, placed_at, ordered_by)]
+    changed_at = placed_at
+    for stage, next_stage in zip(STATUSES, STATUSES[1:STATUSES.index(status) + 1]):
+        entered_at = changed_at
+        changed_at = min(now, entered_at + timedelta(seconds=int(rng.expovariate(1 / STAGE_HOURS[stage]) * 3600)))
+        history.append((order_id, stage, next_stage, entered_at, changed_at, rng.choice(users)[1]))
+    lines = [(order_id, line_no, item_id, item_name, rng.randint(1, 20))
+             for line_no, (item_id, item_name) in enumerate(items, 1)]
+    order = (order_id,) + items[0] + (sum(line[4] for line in lines), len(lines), status, ordered_by,
+                                      placed_at, changed_at)
+    return order, lines, history
+
+
+def generate(warehouse, counts, seed=42, days=365, batch_size=5000, log=print):
+    """Inserts counts["suppliers"|"users"|"items"|"orders"|"activity"] rows; returns seconds per table
+
+    Orders also get their order_items and order_status_history rows, timed under "orders".
+    """
+    rng = random.Random(seed)
+    # The engine's CURRENT_TIMESTAMP clock, so seeded rows line up with rows the app writes
+    now = warehouse.get_storage_backend().now().replace(microsecond=0)
+    timings = {}
+
+    def timestamp():
+        return now - timedelta(seconds=rng.randint(0, days * 86400))
+
+    with warehouse.db_connection() as conn:
+        if conn is None:
+            raise RuntimeError("Database unavailable")
+        cursor = conn.cursor()
+
+        started = time.perf_counter()
+        insert_batches(cursor, """
+            INSERT INTO suppliers (name, contact_person, email, phone, lead_time_days, rating)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, ((f"Supplier {n:04d}", f"Contact {n}", f"supplier{n}@example.com", f"555-{n:04d}",
+               rng.randint(1, 30), rng.randint(1, 5)) for n in range(counts["suppliers"])), batch_size)
+        cursor.execute("SELECT id, name FROM suppliers")
+        suppliers = cursor.fetchall()
+        timings["suppliers"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        password = warehouse.hash_password(PASSWORD)
+        roles = ["admin", "manager", "user"]
+        insert_batches(cursor, "INSERT INTO users (username, password, role) VALUES (%s, %s, %s)",
+                       ((username(n), password, roles[n] if n < 3 else rng.choice(["manager", "user"]))
+                        for n in range(counts["users"])), batch_size)
+        cursor.execute("SELECT id, username FROM users")
+        users = cursor.fetchall()
+        timings["users"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        insert_batches(cursor, """
+            INSERT INTO inventory (item_name, description, category, stock, min_stock, price, supplier, supplier_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """, ((f"SKU-{n:07d}", f"Synthetic item {n}", rng.choice(CATEGORIES), rng.randint(0, 2000),
+               rng.randint(1, 50), round(rng.uniform(0.5, 900), 2)) + tuple(reversed(rng.choice(suppliers)))
+              for n in range(counts["items"])), batch_size)
+        cursor.execute("SELECT id, item_name FROM inventory")
+        items = cursor.fetchall()
+        timings["inventory"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        cursor.execute("SELECT COALESCE(MAX(order_id), 0) FROM orders")
+        first_id = cursor.fetchone()[0] + 1
+        for batch_start in range(0, counts["orders"], batch_size):
+            orders, lines, history = [], [], []
+            for order_id in range(first_id + batch_start, first_id + min(batch_start + batch_size, counts["orders"])):
+                order_items = rng.sample(items, rng.choices(range(1, len(LINE_WEIGHTS) + 1), LINE_WEIGHTS)[0])
+                order, order_lines, rows = order_with_history(rng, order_id, order_items, users, timestamp(), now)
+                orders.append(order)
+                lines.extend(order_lines)
+                history.extend(rows)
+            cursor.executemany("""
+                INSERT INTO orders (order_id, item_id, item_name, quantity, line_count, status, ordered_by,
+                    order_date, status_changed_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, orders)
+            insert_batches(cursor, """
+                INSERT INTO order_items (order_id, line_no, item_id, item_name, quantity)
+                VALUES (%s, %s, %s, %s, %s)
+            """, lines, batch_size)
+            insert_batches(cursor, """
+                INSERT INTO order_status_history (order_id, from_status, to_status, entered_at, changed_at, changed_by)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, history, batch_size)
+        timings["orders"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        insert_batches(cursor, "INSERT INTO activity_log (user_id, action, details, timestamp) VALUES (%s, %s, %s, %s)",
+                       ((rng.choice(users)[0], rng.choice(ACTIONS), "Generated by benchmark", timestamp())
+                        for _ in range(counts["activity"])), batch_size)
+        timings["activity_log"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        warehouse.rebuild_order_rollup(cursor)
+        warehouse.rebuild_category_summary(cursor)
+        conn.commit()
+        timings["rollups"] = time.perf_counter() - started
+
+    for table, seconds in timings.items():
+        log(f"  {table:<14} {seconds:>8.2f}s")
+    return timings
+
+
+def add_size_arguments(parser):
+    parser.add_argument("--size", choices=sorted(SIZES), default="small", help="preset row counts (default: small)")
+    for table in SIZES["small"]:
+        parser.add_argument(f"--{table}", type=int, default=None, help=f"override the preset {table} count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=365, help="spread orders and activity over this many days")
+
+
+def counts_from_args(args):
+    counts = dict(SIZES[args.size])
+    for table in counts:
+        if getattr(args, table) is not None:
+            counts[table] = getattr(args, table)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_backend_arguments(parser)
+    add_size_arguments(parser)
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per INSERT batch (default: 5000)")
+    args = parser.parse_args(argv)
+
+    warehouse = setup_warehouse(args)
+    counts = counts_from_args(args)
+    print(f"Generating {', '.join(f'{count:,} {table}' for table, count in counts.items())} "
+          f"into {args.sqlite_path or args.backend} (seed {args.seed})")
+    timings = generate(warehouse, counts, args.seed, args.days, args.batch_size)
+    print(f"Done in {sum(timings.values()):.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+"""Multi-session load test.
+
+Drives many simulated users through warehouse.main() at once with
+Streamlit's AppTest (no browser or server). Each session logs in through
+the login form, moves between pages with the sidebar, and then works through a
+weighted mix of actions:
+
+    browse   open a random page
+    order    add one to three searched items to the cart in Orders > New Order
+             and place the order
+    status   advance a few open orders from Orders > Order Status (supervisors only)
+
+Supervisor sessions log in with manager/admin accounts. Picker sessions log
+in with user accounts and skip status changes. All sessions share one
+process, so they share the connection pool, read cache and audit logger
+exactly as sessions on one server do. Reports action throughput, latency
+percentiles per action and per rerun, and connection pool figures.
+
+    python benchmarks/load_sessions.py --sessions 30 --actions 20 --mix order=5,status=2,browse=3
+"""
+import argparse
+import random
+import re
+import sys
+import threading
+import time
+
+from streamlit import config
+from streamlit.runtime import Runtime
+from streamlit.testing.v1 import AppTest
+
+from common import add_backend_arguments, setup_warehouse
+from generate_data import CATEGORIES, PASSWORD, STATUSES, add_size_arguments, counts_from_args, generate
+
+# Imports the already-loaded module, so every session shares its cached pool and caches
+APP_SCRIPT = "import warehouse\nwarehouse.main()\n"
+BROWSE_PAGES = ["Dashboard", "Inventory", "Orders", "Suppliers", "Reports"]
+STOCK_LABEL = re.compile(r"\(Stock: (\d+)\)$")
+ORDER_LABEL = re.compile(r"#(\d+) ")
+MAX_ORDER_LINES = 3
+
+
+def allow_concurrent_runs():
+    """Lets AppTest runs overlap across threads.
+
+    Each AppTest run installs a mock Runtime and switches on the global.appTest option,
+    then clears both when it ends, which pulls them out from under sessions whose runs
+    are still in progress. Keep the option on and the last mock Runtime available.
+    """
+    config.set_option("global.appTest", True)
+    installed = {}
+
+    def instance(cls):
+        if cls._instance is not None:
+            installed["runtime"] = cls._instance
+        elif "runtime" not in installed:
+            raise RuntimeError("Runtime hasn't been created!")
+        return cls._instance or installed["runtime"]
+
+    def exists(cls):
+        return cls._instance is not None or "runtime" in installed
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(exists)
+
+
+class SessionError(Exception):
+    """Raised when a rerun fails with an exception or the expected widget is missing"""
+
+
+class Rejected(Exception):
+    """Raised when the app refuses an action with an error message, e.g. insufficient stock"""
+
+
+class Session:
+    def __init__(self, username, supervisor, rng, timeout, think_time):
+        self.username = username
+        self.supervisor = supervisor
+        self.rng = rng
+        self.think_time = think_time
+        self.app = AppTest.from_string(APP_SCRIPT, default_timeout=timeout)
+        self.rerun_latencies = []
+
+    def run(self):
+        started = time.perf_counter()
+        self.app.run()
+        self.rerun_latencies.append(time.perf_counter() - started)
+        if self.app.exception:
+            raise SessionError(str(self.app.exception[0].value)[:200])
+        if self.app.error:
+            raise Rejected(str(self.app.error[0].value)[:200])
+
+    def widget(self, widgets, label):
+        for widget in widgets:
+            if widget.label == label:
+                return widget
+        raise SessionError(f"No widget labelled {label!r} on {self.app.session_state.current_page}")
+
+    def login(self):
+        self.run()
+        self.app.text_input[0].input(self.username)
+        self.app.text_input[1].input(PASSWORD)
+        self.widget(self.app.button, "Login").click()
+        self.run()
+        if not self.app.session_state.authenticated:
+            raise SessionError(f"Login failed for {self.username}")
+        self.run()
+
+    def navigate(self, page):
+        if self.app.session_state.current_page != page:
+            self.app.sidebar.selectbox[0].select(page)
+            self.run()
+
+    def open_panel(self, key, panel):
+        radio = self.app.radio(key=key)
+        if radio.value != panel:
+            radio.set_value(panel)
+            self.run()
+
+    def browse(self):
+        self.navigate(self.rng.choice(BROWSE_PAGES))
+
+    def order(self):
+        self.navigate("Orders")
+        self.open_panel("orders_panel", "New Order")
+        for _ in range(self.rng.randint(1, MAX_ORDER_LINES)):
+            self.widget(self.app.text_input, "Search items").input(self.rng.choice(CATEGORIES))
+            self.run()
+            select = self.widget(self.app.selectbox, "Select Item")
+            index = self.rng.randrange(len(select.options))
+            stock = int(STOCK_LABEL.search(select.options[index]).group(1))
+            select.select_index(index)
+            self.run()
+            self.widget(self.app.number_input, "Quantity").set_value(self.rng.randint(1, min(stock, 5)))
+            self.widget(self.app.button, "Add to cart").click()
+            self.run()
+        self.widget(self.app.button, "Place Order").click()
+        self.run()
+
+    def status(self):
+        self.navigate("Orders")
+        self.open_panel("orders_panel", "Order Status")
+        self.widget(self.app.selectbox, "Status").select(self.rng.choice(STATUSES[:-1]))
+        self.run()
+        select = self.widget(self.app.multiselect, "Orders to advance")
+        for option in self.rng.sample(select.options, min(len(select.options), self.rng.randint(1, 5))):
+            select.select(int(ORDER_LABEL.match(option).group(1)))
+        self.run()
+        advance = self.app.button(key="orders_workbench_advance")
+        if advance.disabled:
+            return  # another supervisor moved the picked orders on first
+        advance.click()
+        self.run()
+
+    def add_item(self):
+        self.navigate("Inventory")
+        self.open_panel("inventory_panel", "Add New Item")
+        self.widget(self.app.text_input, "Item Name*").input(f"Load item {self.rng.getrandbits(48):012x}")
+        self.widget(self.app.text_input, "Category").input(self.rng.choice(CATEGORIES))
+        self.widget(self.app.button, "Add Item").click()
+        self.run()
+
+    def add_supplier(self):
+        self.navigate("Suppliers")
+        self.open_panel("suppliers_panel", "Add Supplier")
+        self.widget(self.app.text_input, "Supplier Name*").input(f"Load supplier {self.rng.getrandbits(48):012x}")
+        self.widget(self.app.button, "Add Supplier").click()
+        self.run()
+
+    def create_user(self):
+        self.navigate("User Management")
+        self.open_panel("users_panel", "Add User")
+        self.widget(self.app.text_input, "Username*").input(f"load_user_{self.rng.getrandbits(48):012x}")
+        self.widget(self.app.text_input, "Password*").input(PASSWORD)
+        self.widget(self.app.button, "Create User").click()
+        self.run()
+
+    def pause(self):
+        if self.think_time:
+            time.sleep(self.rng.expovariate(1 / self.think_time))
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        action, _, weight = part.partition("=")
+        if action not in ("browse", "order", "status"):
+            raise argparse.ArgumentTypeError(f"unknown action {action!r}")
+        mix[action] = float(weight or 1)
+    return mix
+
+
+def bench_accounts(warehouse):
+    with warehouse.db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT username, role FROM users WHERE username LIKE %s ORDER BY id", ("bench_user_%",))
+        accounts = cursor.fetchall()
+    supervisors = [name for name, role in accounts if role in ("manager", "admin")]
+    pickers = [name for name, role in accounts if role == "user"]
+    return supervisors, pickers
+
+
+class Results:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.actions = {}
+        self.reruns = []
+        self.rejected = {}
+        self.failures = {}
+
+    def add(self, action, elapsed):
+        with self._lock:
+            self.actions.setdefault(action, []).append(elapsed)
+
+    def reject(self, action, message):
+        with self._lock:
+            self.rejected.setdefault(action, []).append(message)
+
+    def fail(self, action, err):
+        with self._lock:
+            self.failures.setdefault(action, []).append(f"{type(err).__name__}: {err}")
+
+    def add_reruns(self, latencies):
+        with self._lock:
+            self.reruns.extend(latencies)
+
+
+def run_session(session, mix, actions, deadline, results):
+    try:
+        started = time.perf_counter()
+        session.login()
+        results.add("login", time.perf_counter() - started)
+    except Exception as err:
+        results.fail("login", err)
+        results.add_reruns(session.rerun_latencies)
+        return
+
+    weights = {action: weight for action, weight in mix.items() if session.supervisor or action != "status"}
+    done = 0
+    while done < actions and time.perf_counter() < deadline:
+        session.pause()
+        action = session.rng.choices(list(weights), list(weights.values()))[0]
+        started = time.perf_counter()
+        try:
+            getattr(session, action)()
+        except Rejected as err:
+            results.reject(action, str(err))
+        except Exception as err:
+            results.fail(action, err)
+        else:
+            results.add(action, time.perf_counter() - started)
+        done += 1
+    results.add_reruns(session.rerun_latencies)
+
+
+def watch_pool(warehouse, stop, peaks, interval=0.05):
+    while not stop.is_set():
+        stats = warehouse.pool_stats()
+        peaks["in_use"] = max(peaks["in_use"], stats["in_use"])
+        peaks["open"] = max(peaks["open"], stats["open"])
+        stop.wait(interval)
+
+
+def summarise(warehouse, label, latencies):
+    latencies = sorted(latencies)
+    return (f"{label:<10} {len(latencies):>7} {warehouse.percentile(latencies, 0.50) * 1000:>9.0f} "
+            f"{warehouse.percentile(latencies, 0.95) * 1000:>9.0f} {warehouse.percentile(latencies, 0.99) * 1000:>9.0f} "
+            f"{latencies[-1] * 1000:>9.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_backend_arguments(parser)
+    add_size_arguments(parser)
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent sessions (default: 20)")
+    parser.add_argument("--actions", type=int, default=20, help="actions per session after login (default: 20)")
+    parser.add_argument("--duration", type=float, default=None, help="stop starting new actions after this many seconds")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("order=5,status=2,browse=3"),
+                        help="action weights (default: order=5,status=2,browse=3)")
+    parser.add_argument("--supervisors", type=float, default=0.25,
+                        help="share of sessions using manager/admin accounts (default: 0.25)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean pause between actions in seconds")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="spread session starts over this many seconds")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-rerun timeout in seconds (default: 60)")
+    args = parser.parse_args(argv)
+
+    warehouse = setup_warehouse(args)
+    allow_concurrent_runs()
+    supervisors, pickers = bench_accounts(warehouse)
+    if not supervisors or not pickers:
+        print(f"Generating {args.size} dataset (seed {args.seed})")
+        generate(warehouse, counts_from_args(args), args.seed, args.days)
+        supervisors, pickers = bench_accounts(warehouse)
+
+    rng = random.Random(args.seed)
+    supervisor_count = round(args.sessions * args.supervisors)
+    sessions = [Session(supervisors[n % len(supervisors)] if n < supervisor_count else pickers[n % len(pickers)],
+                        n < supervisor_count, random.Random(rng.random()), args.timeout, args.think_time)
+                for n in range(args.sessions)]
+
+    results = Results()
+    stop = threading.Event()
+    peaks = {"in_use": 0, "open": 0}
+    monitor = threading.Thread(target=watch_pool, args=(warehouse, stop, peaks), daemon=True)
+    monitor.start()
+
+    started = time.perf_counter()
+    deadline = started + args.duration if args.duration else float("inf")
+    threads = []
+    for n, session in enumerate(sessions):
+        thread = threading.Thread(target=run_session, args=(session, args.mix, args.actions, deadline, results),
+                                  name=f"session-{n}")
+        thread.start()
+        threads.append(thread)
+        if args.ramp_up:
+            time.sleep(args.ramp_up / args.sessions)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    monitor.join()
+
+    completed = sum(len(latencies) for latencies in results.actions.values())
+    rejected = sum(len(messages) for messages in results.rejected.values())
+    failed = sum(len(errors) for errors in results.failures.values())
+    stats = warehouse.pool_stats()
+    print(f"Backend:     {args.backend}, {args.sessions} sessions ({supervisor_count} supervisors), "
+          f"pool size {stats['size']}")
+    print(f"Throughput:  {completed:,} actions in {elapsed:.1f}s ({completed / elapsed:.2f} actions/s), "
+          f"{len(results.reruns):,} reruns ({len(results.reruns) / elapsed:.2f}/s), "
+          f"{rejected:,} rejected, {failed:,} failed")
+    print(f"Connections: peak {peaks['in_use']} in use, {peaks['open']} open, {stats['checkouts']:,} checkouts, "
+          f"avg wait {stats['avg_wait_time'] * 1000:.1f} ms, max wait {stats['max_wait_time'] * 1000:.1f} ms, "
+          f"{stats['exhaustion_events']} exhaustion events, {stats['timeouts']} timeouts")
+    print()
+    print(f"{'action':<10} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for action, latencies in sorted(results.actions.items()):
+        print(summarise(warehouse, action, latencies))
+    if results.reruns:
+        print(summarise(warehouse, "(rerun)", results.reruns))
+
+    print()
+    for action, messages in sorted(results.rejected.items()):
+        print(f"{len(messages)} {action} rejected by the app, e.g. {messages[0]}")
+    for action, errors in sorted(results.failures.items()):
+        print(f"{len(errors)} {action} failures, e.g. {errors[0]}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""Command-line maintenance tasks for the Warehouse Management System.
+
+Usage:
+    python manage.py migrate [--dry-run]
+    python manage.py check-indexes
+    python manage.py rebuild-rollups
+    python manage.py check-rollups [--repair]
+    python manage.py resolve-suppliers
+    python manage.py profile-report [--samples PATH] [--page PAGE]
+    python manage.py archive [--target orders|activity_log] [--days N] [--batch-size N] [--max-batches N]
+                             [--pause SECONDS] [--dry-run]
+
+Set WMS_STORAGE_BACKEND / WMS_SQLITE_PATH to run against the embedded SQLite engine.
+"""
+import argparse
+import sys
+
+import warehouse
+
+MAX_DRIFT_LINES = 20    # drifted keys listed per summary table by check-rollups
+
+
+def cmd_migrate(args):
+    if not args.dry_run and warehouse.init_db() is None:
+        print("Database unavailable")
+        return 1
+
+    try:
+        plan = warehouse.apply_migrations(dry_run=args.dry_run)
+    except warehouse.DB_ERRORS as err:
+        print(f"Migration failed: {err}")
+        return 1
+    if plan is None:
+        print("Database unavailable")
+        return 1
+    if not plan:
+        print("Schema is up to date")
+        return 0
+
+    for migration in plan:
+        prefix = "Would apply" if args.dry_run else "Applied"
+        print(f"{prefix} {migration['version']:03d}: {migration['description']}")
+        for statement in migration['statements']:
+            print(f"    {statement}")
+    if not args.dry_run:
+        with warehouse.db_connection() as conn:
+            if conn is None:
+                print("Database unavailable")
+                return 1
+            unmatched = warehouse.unmatched_suppliers(conn.cursor())
+        if unmatched:
+            print(f"{len(unmatched)} inventory supplier names match no supplier; run resolve-suppliers for details")
+    return 0
+
+
+def cmd_check_indexes(args):
+    results = warehouse.check_index_usage()
+    if not results:
+        print("Database unavailable")
+        return 1
+
+    failures = 0
+    for label, index, used, plan in results:
+        print(f"[{'OK' if used else 'MISSING'}] {label}: expects {index}")
+        if not used:
+            failures += 1
+            for line in plan:
+                print(f"    {line}")
+    return 1 if failures else 0
+
+
+def cmd_rebuild_rollups(args):
+    if warehouse.ensure_schema() is None:
+        print("Database unavailable")
+        return 1
+
+    with warehouse.db_connection() as conn:
+        if conn is None:
+            print("Database unavailable")
+            return 1
+        cursor = conn.cursor()
+        warehouse.rebuild_order_rollup(cursor)
+        warehouse.rebuild_category_summary(cursor)
+        warehouse.record_table_writes(cursor, "orders", "inventory")
+        conn.commit()
+    print("Rebuilt order_daily_rollup from orders")
+    print("Rebuilt category_summary from inventory")
+    return 0
+
+
+def cmd_check_rollups(args):
+    if warehouse.ensure_schema() is None:
+        print("Database unavailable")
+        return 1
+
+    # Summary table -> (drift check, rebuild, source table, cached table its readers are keyed on)
+    summaries = [
+        ("order_daily_rollup", warehouse.check_order_rollup, warehouse.rebuild_order_rollup, "orders", "orders"),
+        ("category_summary", warehouse.check_category_summary, warehouse.rebuild_category_summary,
+         "inventory", "inventory")
+    ]
+    drifted = []
+    with warehouse.db_connection() as conn:
+        if conn is None:
+            print("Database unavailable")
+            return 1
+        cursor = conn.cursor()
+        for name, check, rebuild, source, cached in summaries:
+            drift = check(cursor)
+            print(f"[{'DRIFT' if drift else 'OK'}] {name}")
+            for key, stored, actual in drift[:MAX_DRIFT_LINES]:
+                print(f"    {key or '(none)'}: stored {stored}, actual {actual}")
+            if len(drift) > MAX_DRIFT_LINES:
+                print(f"    ... and {len(drift) - MAX_DRIFT_LINES} more")
+            if drift and args.repair:
+                rebuild(cursor)
+                warehouse.record_table_writes(cursor, cached)
+                conn.commit()
+                print(f"Rebuilt {name} from {source}")
+            elif drift:
+                drifted.append(name)
+    return 1 if drifted else 0
+
+
+def cmd_resolve_suppliers(args):
+    if warehouse.ensure_schema() is None:
+        print("Database unavailable")
+        return 1
+
+    with warehouse.db_connection() as conn:
+        if conn is None:
+            print("Database unavailable")
+            return 1
+        cursor = conn.cursor()
+        resolved = warehouse.resolve_inventory_suppliers(cursor)
+        warehouse.record_table_writes(cursor, "inventory")
+        conn.commit()
+        unmatched = warehouse.unmatched_suppliers(cursor)
+    print(f"Linked {resolved} inventory rows to suppliers")
+    if unmatched:
+        print(f"{len(unmatched)} supplier names match no supplier; add them on the Suppliers page or fix the item:")
+        for name, count in unmatched:
+            print(f"    {name!r}: {count} items")
+    return 1 if unmatched else 0
+
+
+def cmd_profile_report(args):
+    samples = warehouse.load_render_samples(args.samples)
+    if args.page:
+        samples = [sample for sample in samples if sample["page"] == args.page]
+    if not samples:
+        print("No render samples recorded")
+        return 1
+
+    groups = {}
+    for sample in samples:
+        groups.setdefault((sample["page"], sample["panel"], sample["release"]), []).append(sample)
+
+    breakdowns = {id(sample): warehouse.phase_breakdown(sample) for sample in samples}
+    phases = sorted({phase for breakdown in breakdowns.values() for phase in breakdown})
+    print(f"{'page':<28} {'release':<10} {'renders':>7} {'p50 ms':>8} {'p95 ms':>8} {'sql ms':>8}"
+          + "".join(f" {phase[:9]:>9}" for phase in phases))
+    for (page, panel, release), group in sorted(groups.items()):
+        totals = sorted(sample["total_ms"] for sample in group)
+        phase_means = [sum(breakdowns[id(sample)].get(phase, 0.0) for sample in group) / len(group)
+                       for phase in phases]
+        label = f"{page} / {panel}" if panel else page
+        print(f"{label[:28]:<28} {release:<10} {len(group):>7} "
+              f"{warehouse.percentile(totals, 0.50):>8.1f} {warehouse.percentile(totals, 0.95):>8.1f} "
+              f"{sum(sample['sql_ms'] for sample in group) / len(group):>8.1f}"
+              + "".join(f" {mean:>9.1f}" for mean in phase_means))
+    return 0
+
+
+def cmd_archive(args):
+    if warehouse.ensure_schema() is None:
+        print("Database unavailable")
+        return 1
+
+    targets = [args.target] if args.target else list(warehouse.ARCHIVE_TARGETS)
+    for target in targets:
+        counted = warehouse.count_archivable(target, args.days)
+        if counted is None:
+            print("Database unavailable")
+            return 1
+        due, cutoff = counted
+        if args.dry_run:
+            print(f"{target}: {due} rows older than {cutoff} would move")
+            continue
+        if not due:
+            print(f"{target}: nothing older than {cutoff}")
+            continue
+
+        print(f"{target}: archiving {due} rows older than {cutoff}")
+        moved = warehouse.archive_rows(target, args.days, args.batch_size, args.max_batches, args.pause,
+                                       progress=lambda total: print(f"    {total}/{due} moved"))
+        if moved is None:
+            print("Database unavailable")
+            return 1
+        if moved < due:
+            print(f"{target}: stopped after {moved} rows; run again to continue")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warehouse Management System maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate = commands.add_parser("migrate", help="apply pending schema migrations")
+    migrate.add_argument("--dry-run", action="store_true", help="list pending migrations without applying them")
+    migrate.set_defaults(func=cmd_migrate)
+
+    check = commands.add_parser("check-indexes", help="assert that hot queries use their indexes")
+    check.set_defaults(func=cmd_check_indexes)
+
+    rebuild = commands.add_parser("rebuild-rollups", help="backfill or rebuild the reporting rollup tables")
+    rebuild.set_defaults(func=cmd_rebuild_rollups)
+
+    check_rollups = commands.add_parser("check-rollups", help="compare the summary tables with their source data")
+    check_rollups.add_argument("--repair", action="store_true", help="rebuild a summary table that has drifted")
+    check_rollups.set_defaults(func=cmd_check_rollups)
+
+    resolve = commands.add_parser("resolve-suppliers", help="link inventory rows to suppliers and list unmatched names")
+    resolve.set_defaults(func=cmd_resolve_suppliers)
+
+    report = commands.add_parser("profile-report", help="compare persisted render profiles across releases")
+    report.add_argument("--samples", default=None, help="samples file (default: PROFILER_CONFIG['samples_path'])")
+    report.add_argument("--page", default=None, help="only report this page")
+    report.set_defaults(func=cmd_profile_report)
+
+    archive = commands.add_parser("archive", help="move Delivered orders and old activity_log rows to archive tables")
+    archive.add_argument("--target", choices=sorted(warehouse.ARCHIVE_TARGETS), default=None,
+                         help="archive only this table (default: all)")
+    archive.add_argument("--days", type=int, default=None,
+                         help="retention horizon in days (default: ARCHIVE_CONFIG for each table)")
+    archive.add_argument("--batch-size", type=int, default=None,
+                         help="rows moved per transaction (default: ARCHIVE_CONFIG['batch_size'])")
+    archive.add_argument("--max-batches", type=int, default=None, help="stop after this many batches")
+    archive.add_argument("--pause", type=float, default=0.0, help="seconds to wait between batches")
+    archive.add_argument("--dry-run", action="store_true", help="count the rows due without moving them")
+    archive.set_defaults(func=cmd_archive)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,37 @@
 import streamlit as st
 import pandas as pd
 import mysql.connector
+import atexit
+import bisect
+import cProfile
+import csv
+import gzip
 import hashlib
+import heapq
+import io
+import json
+import os
+import pstats
+import queue
+import re
+import sqlite3
+import tempfile
+import threading
 import time
-from datetime import datetime
+from collections import Counter, OrderedDict, deque, namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from functools import wraps
 import plotly.express as px
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
+
+APP_VERSION = "1.2.0"
+
 # MySQL Connection Details
 DB_CONFIG = {
     "host": "localhost",
@@ -14,20 +40,895 @@ DB_CONFIG = {
     "database": "warehouse_inventory_1"
 }
 
+# Connection Pool Settings
+POOL_CONFIG = {
+    "size": 10,                 # maximum open connections per process
+    "checkout_timeout": 5.0,    # seconds to wait for a free connection
+    "health_check": True        # ping (and reconnect) on every checkout
+}
+
+# Activity Log Settings
+AUDIT_CONFIG = {
+    "queue_size": 10000,            # events held in memory before the overflow policy applies
+    "batch_size": 200,              # flush as soon as this many events are queued...
+    "flush_interval": 2.0,          # ...or at least this often (seconds)
+    "overflow_policy": "drop_oldest"    # "block", "drop_oldest" or "drop_newest"
+}
+
+# Read Cache Settings
+CACHE_CONFIG = {
+    "dashboard_ttl": 300,       # seconds a dashboard snapshot may be served without a write
+    "query_max_entries": 256,   # distinct (query, parameters) results kept in the shared read cache
+    "query_max_rows": 200000,   # total rows held across all entries before LRU eviction
+    "query_max_entry_rows": 20000,  # larger results are served but never cached
+    "query_ttl": 60,            # seconds a result may be served; backstop for writes that bypass table_versions
+    "version_check_interval": 2     # seconds between reads of table_versions for other processes' writes
+}
+
+# Item Search Settings
+SEARCH_CONFIG = {
+    "max_results": 20,          # matches offered in the order entry picker
+    "grid_max_results": 500,    # matches the inventory grid is narrowed to
+    "candidate_factor": 5       # extra matches ranked when results are filtered afterwards (e.g. in stock)
+}
+
+# Query Log Settings
+QUERY_LOG_CONFIG = {
+    "slow_threshold_ms": 200,       # statements at least this slow go to the slow-query log
+    "slow_log_size": 200,           # slow statements kept in memory for the System tab
+    "latency_samples": 1000,        # recent statement timings kept per page for percentiles
+    "slow_log_path": os.environ.get("WMS_SLOW_QUERY_LOG")   # optional file the slow log is appended to
+}
+
+# Render Profiler Settings
+PROFILER_CONFIG = {
+    "history": 20,                  # recent profiled renders kept for the System tab waterfall
+    "samples_path": os.environ.get("WMS_PROFILE_SAMPLES", "profiles/render_samples.jsonl"),
+    "cprofile_dir": "profiles",     # where per-rerun cProfile dumps are written
+    "cprofile_top": 25              # functions listed in the cProfile summary
+}
+
+# Export Settings
+EXPORT_CONFIG = {
+    "chunk_size": 5000          # rows fetched from the server per round trip
+}
+
+# Bulk Import Settings
+IMPORT_CONFIG = {
+    "batch_size": 500           # rows per multi-row INSERT / UPDATE statement
+}
+
+# Archive Settings
+ARCHIVE_CONFIG = {
+    "order_retention_days": 365,        # Delivered orders placed longer ago than this move to orders_archive
+    "activity_retention_days": 180,     # activity_log rows older than this move to activity_log_archive
+    "batch_size": 1000                  # rows moved per transaction
+}
+
+# Storage Backend Settings
+STORAGE_CONFIG = {
+    "backend": os.environ.get("WMS_STORAGE_BACKEND", "mysql"),      # "mysql" or "sqlite"
+    "sqlite_path": os.environ.get("WMS_SQLITE_PATH", "warehouse.db"),
+    "migration_lock_timeout": 60        # seconds to wait for another process's migration run
+}
+
+# Storage Backends
+DB_ERRORS = (mysql.connector.Error, sqlite3.Error)
+
+class StorageBackend:
+    """Engine-specific hooks; the page SQL itself is written once in MySQL dialect"""
+    name = None
+    transactional_ddl = False   # True if DDL can be rolled back with the surrounding transaction
+
+    def connect(self):
+        raise NotImplementedError
+
+    def translate_ddl(self, statement):
+        """Returns the list of statements implementing a MySQL DDL statement on this engine"""
+        return [statement]
+
+    def explain(self, cursor, sql, params=()):
+        """Returns the query plan for sql as a list of readable lines"""
+        raise NotImplementedError
+
+    def accumulate_sql(self, table, columns, key_columns, select_sql):
+        """INSERT ... SELECT that adds the non-key columns onto existing rows with the same key"""
+        raise NotImplementedError
+
+    def now(self):
+        """The current time on the clock CURRENT_TIMESTAMP uses, for values stamped in the app"""
+        # MySQL sessions use the server's zone, which is taken to be this host's
+        return datetime.now()
+
+    @contextmanager
+    def migration_lock(self, conn, cursor):
+        """Holds a cross-process lock so only one process applies migrations at a time"""
+        raise NotImplementedError
+
+    def schema_object_exists(self, cursor, kind, table, name):
+        """True if the index, column or constraint called name already exists on table"""
+        raise NotImplementedError
+
+class MySQLBackend(StorageBackend):
+    name = "mysql"
+
+    def __init__(self, config):
+        self.config = config
+
+    def connect(self):
+        return mysql.connector.connect(**self.config)
+
+    def explain(self, cursor, sql, params=()):
+        cursor.execute("EXPLAIN " + sql, params)
+        columns = [col[0] for col in cursor.description]
+        return [", ".join(f"{col}={value}" for col, value in zip(columns, row) if value is not None)
+                for row in cursor.fetchall()]
+
+    def accumulate_sql(self, table, columns, key_columns, select_sql):
+        updates = ", ".join(f"{col} = {col} + VALUES({col})" for col in columns if col not in key_columns)
+        return f"INSERT INTO {table} ({', '.join(columns)}) {select_sql} ON DUPLICATE KEY UPDATE {updates}"
+
+    @contextmanager
+    def migration_lock(self, conn, cursor):
+        cursor.execute("SELECT GET_LOCK(%s, %s)", ("wms_schema_migrations", STORAGE_CONFIG["migration_lock_timeout"]))
+        if cursor.fetchone()[0] != 1:
+            raise mysql.connector.errors.OperationalError("Timed out waiting for another process's schema migration")
+        try:
+            yield
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", ("wms_schema_migrations",))
+            cursor.fetchone()
+
+    def schema_object_exists(self, cursor, kind, table, name):
+        sql = {
+            "index": """SELECT 1 FROM information_schema.statistics
+                        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1""",
+            "column": """SELECT 1 FROM information_schema.columns
+                         WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s""",
+            "constraint": """SELECT 1 FROM information_schema.table_constraints
+                             WHERE table_schema = DATABASE() AND table_name = %s AND constraint_name = %s"""
+        }[kind]
+        cursor.execute(sql, (table, name))
+        return cursor.fetchone() is not None
+
+class SQLiteCursor:
+    """mysql.connector-style cursor over sqlite3 (%s placeholders, dictionary rows)"""
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        if dictionary:
+            cursor.row_factory = lambda cur, row: {col[0]: value for col, value in zip(cur.description, row)}
+
+    @staticmethod
+    def _qmark(sql):
+        return sql.replace("%s", "?")
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(self._qmark(sql), tuple(params or ()))
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(self._qmark(sql), [tuple(p) for p in seq_of_params])
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+class SQLiteConnection:
+    """Wraps a sqlite3 connection in the subset of the mysql.connector API the app uses"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, dictionary=False, buffered=None):
+        return SQLiteCursor(self._conn.cursor(), dictionary=dictionary)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        self._conn.execute("SELECT 1")
+
+    def is_connected(self):
+        try:
+            self.ping()
+            return True
+        except sqlite3.Error:
+            return False
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+class SQLiteBackend(StorageBackend):
+    """Embedded single-file engine for local runs, CI and benchmarks"""
+    name = "sqlite"
+    transactional_ddl = True
+
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=30,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,    # pooled connections move between session threads
+            uri=self.path.startswith("file:")
+        )
+        conn.execute("PRAGMA foreign_keys = ON")
+        if self.path != ":memory:" and "mode=memory" not in self.path:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        return SQLiteConnection(conn)
+
+    def translate_ddl(self, statement):
+        if re.match(r"ALTER TABLE \w+ ADD CONSTRAINT", statement):
+            # SQLite cannot add constraints to an existing table
+            return []
+        match = re.search(r"CREATE TABLE IF NOT EXISTS (\w+)", statement)
+        if match is None:
+            return [statement]
+        table = match.group(1)
+        on_update = re.findall(r"(\w+) TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP", statement)
+
+        statement = statement.replace("INT AUTO_INCREMENT PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT")
+        statement = re.sub(r"(\w+) ENUM\(([^)]*)\)", r"\1 VARCHAR(20) CHECK (\1 IN (\2))", statement)
+        statement = statement.replace(" ON UPDATE CURRENT_TIMESTAMP", "")
+
+        statements = [statement]
+        for column in on_update:
+            statements.append(f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_{column}
+                AFTER UPDATE ON {table} FOR EACH ROW WHEN NEW.{column} = OLD.{column}
+                BEGIN
+                    UPDATE {table} SET {column} = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid;
+                END""")
+        return statements
+
+    def explain(self, cursor, sql, params=()):
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+    def accumulate_sql(self, table, columns, key_columns, select_sql):
+        updates = ", ".join(f"{col} = {col} + excluded.{col}" for col in columns if col not in key_columns)
+        return (f"INSERT INTO {table} ({', '.join(columns)}) {select_sql} "
+                f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {updates}")
+
+    def now(self):
+        # SQLite's CURRENT_TIMESTAMP is always UTC
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+
+    @contextmanager
+    def migration_lock(self, conn, cursor):
+        # The write lock lasts until the transaction ends, and SQLite DDL is transactional,
+        # so the whole run commits (or rolls back) once when the caller leaves the block
+        conn.rollback()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def schema_object_exists(self, cursor, kind, table, name):
+        if kind == "column":
+            cursor.execute(f"PRAGMA table_info({table})")
+            return any(row[1] == name for row in cursor.fetchall())
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = %s AND tbl_name = %s AND name = %s",
+                       (kind, table, name))
+        return cursor.fetchone() is not None
+
+STORAGE_BACKENDS = {
+    "mysql": lambda: MySQLBackend(DB_CONFIG),
+    "sqlite": lambda: SQLiteBackend(STORAGE_CONFIG["sqlite_path"])
+}
+
+@st.cache_resource
+def get_storage_backend():
+    backend = STORAGE_CONFIG["backend"]
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend '{backend}', expected one of {sorted(STORAGE_BACKENDS)}")
+    return STORAGE_BACKENDS[backend]()
+
 # Database Functions
 def get_db_connection():
+    """Opens a brand-new instrumented connection; use db_connection() for pooled access"""
+    return InstrumentedConnection(get_storage_backend().connect())
+
+class ConnectionPool:
+    """Thread-safe pool of reusable connections with checkout statistics"""
+
+    def __init__(self, connect, size=10, checkout_timeout=5.0, health_check=True):
+        self._connect = connect
+        self.size = size
+        self.checkout_timeout = checkout_timeout
+        self.health_check = health_check
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open = 0
+        self._in_use = 0
+        self._stats = {
+            "checkouts": 0,
+            "wait_time": 0.0,
+            "max_wait_time": 0.0,
+            "exhaustion_events": 0,
+            "timeouts": 0,
+            "reconnects": 0
+        }
+
+    def _reserve_slot(self):
+        with self._lock:
+            if self._open < self.size:
+                self._open += 1
+                return True
+            return False
+
+    def _new_connection(self):
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._open -= 1
+            raise
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._open -= 1
+
+    def _is_healthy(self, conn):
+        try:
+            # ping(reconnect=True) transparently re-opens sockets dropped by a server restart
+            conn.ping(reconnect=True, attempts=1, delay=0)
+            return True
+        except DB_ERRORS:
+            return False
+
+    def checkout(self):
+        started = time.perf_counter()
+        fresh = False
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            if self._reserve_slot():
+                conn = self._new_connection()
+                fresh = True
+            else:
+                with self._lock:
+                    self._stats["exhaustion_events"] += 1
+                try:
+                    conn = self._idle.get(timeout=self.checkout_timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._stats["timeouts"] += 1
+                    raise mysql.connector.errors.PoolError(
+                        f"No connection available after {self.checkout_timeout}s "
+                        f"(pool size {self.size})"
+                    )
+
+        if self.health_check and not fresh and not self._is_healthy(conn):
+            self._discard(conn)
+            if not self._reserve_slot():
+                raise mysql.connector.errors.PoolError("Connection pool is full")
+            conn = self._new_connection()
+            with self._lock:
+                self._stats["reconnects"] += 1
+
+        waited = time.perf_counter() - started
+        with self._lock:
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+            self._stats["wait_time"] += waited
+            self._stats["max_wait_time"] = max(self._stats["max_wait_time"], waited)
+        return conn
+
+    def checkin(self, conn):
+        with self._lock:
+            self._in_use -= 1
+        try:
+            # Never hand the next caller an open transaction or a stale read snapshot
+            if conn.in_transaction:
+                conn.rollback()
+        except DB_ERRORS:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "size": self.size,
+                "open": self._open,
+                "in_use": self._in_use,
+                "idle": self._idle.qsize()
+            })
+        stats["avg_wait_time"] = stats["wait_time"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        return stats
+
+@st.cache_resource
+def get_connection_pool():
+    return ConnectionPool(
+        get_db_connection,
+        size=POOL_CONFIG["size"],
+        checkout_timeout=POOL_CONFIG["checkout_timeout"],
+        health_check=POOL_CONFIG["health_check"]
+    )
+
+@contextmanager
+def db_connection():
+    """Borrows a pooled connection for the duration of a with-block (None if unavailable)"""
+    pool = get_connection_pool()
     try:
-        return mysql.connector.connect(**DB_CONFIG)
-    except mysql.connector.Error as err:
+        conn = pool.checkout()
+    except DB_ERRORS as err:
         st.error(f"Database connection failed: {err}")
+        yield None
+        return
+
+    try:
+        yield conn
+    finally:
+        conn.finish_statements()
+        pool.checkin(conn)
+
+def pool_stats():
+    return get_connection_pool().stats()
+
+# Query Instrumentation
+# Connections from get_db_connection() hand out cursors that time every statement (execute plus
+# fetches) and file it under the page render running on the current thread; statements slower
+# than QUERY_LOG_CONFIG["slow_threshold_ms"] also go to the slow-query log.
+@st.cache_resource
+def get_query_scope():
+    """Thread-local render scope; cached so pooled cursors from earlier reruns see the current one"""
+    return threading.local()
+
+class InstrumentedCursor:
+    """Cursor proxy that times statements and counts the rows fetched; everything else goes to the driver cursor"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._statement = None
+
+    def _run(self, method, sql, args, kwargs):
+        self.finish()
+        started = time.perf_counter()
+        try:
+            return method(sql, *args, **kwargs)
+        finally:
+            self._statement = {"sql": sql, "elapsed": time.perf_counter() - started, "rows": 0,
+                               "scope": getattr(get_query_scope(), "current", None)}
+
+    def execute(self, sql, *args, **kwargs):
+        return self._run(self._cursor.execute, sql, args, kwargs)
+
+    def executemany(self, sql, *args, **kwargs):
+        return self._run(self._cursor.executemany, sql, args, kwargs)
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        result = method(*args)
+        if self._statement is not None:
+            self._statement["elapsed"] += time.perf_counter() - started
+            self._statement["rows"] += len(result) if isinstance(result, list) else int(result is not None)
+        return result
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._fetch(self._cursor.fetchmany, *args)
+
+    def fetchall(self):
+        rows = self._fetch(self._cursor.fetchall)
+        self.finish()
+        return rows
+
+    def finish(self):
+        """Files the last statement; called before the next one and when the connection is returned"""
+        statement, self._statement = self._statement, None
+        if statement is not None:
+            get_query_stats().record(**statement)
+
+    def close(self):
+        self.finish()
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors are InstrumentedCursors"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._cursors = []
+
+    def cursor(self, *args, **kwargs):
+        cursor = InstrumentedCursor(self._conn.cursor(*args, **kwargs))
+        self._cursors.append(cursor)
+        return cursor
+
+    def finish_statements(self):
+        cursors, self._cursors = self._cursors, []
+        for cursor in cursors:
+            cursor.finish()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+def begin_page_queries(page):
+    """Starts attributing statements on this thread to a page render"""
+    get_query_scope().current = {"page": page, "panel": "", "queries": 0, "elapsed": 0.0, "rows": 0}
+
+def set_query_panel(panel):
+    scope = getattr(get_query_scope(), "current", None)
+    if scope is not None:
+        scope["panel"] = panel
+
+def finish_page_queries():
+    """Stops attributing and files the render's totals under its page and panel"""
+    local = get_query_scope()
+    scope, local.current = getattr(local, "current", None), None
+    if scope is not None:
+        get_query_stats().record_render(scope)
+    return scope
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+class QueryStats:
+    """Per (page, panel) statement counts, rows and latencies across all sessions, plus the slow-query log"""
+
+    def __init__(self, slow_threshold_ms=200, slow_log_size=200, latency_samples=1000, slow_log_path=None):
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.latency_samples = latency_samples
+        self.slow_log_path = slow_log_path
+        self._lock = threading.Lock()
+        self._pages = {}
+        self._slow = deque(maxlen=slow_log_size)
+
+    def _entry(self, page, panel):
+        return self._pages.setdefault((page, panel), {
+            "renders": 0, "render_queries": 0, "last": 0, "max": 0, "queries": 0, "rows": 0, "elapsed": 0.0,
+            "slow": 0, "latencies": deque(maxlen=self.latency_samples)
+        })
+
+    def record(self, sql, elapsed, rows, scope=None):
+        page, panel = (scope["page"], scope["panel"]) if scope is not None else ("(background)", "")
+        if scope is not None:
+            scope["queries"] += 1
+            scope["elapsed"] += elapsed
+            scope["rows"] += rows
+        slow = elapsed >= self.slow_threshold
+        with self._lock:
+            entry = self._entry(page, panel)
+            entry["queries"] += 1
+            entry["rows"] += rows
+            entry["elapsed"] += elapsed
+            entry["latencies"].append(elapsed)
+            if slow:
+                entry["slow"] += 1
+                record = {"at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "page": page, "panel": panel,
+                          "ms": round(elapsed * 1000, 1), "rows": rows, "sql": " ".join(sql.split())}
+                self._slow.appendleft(record)
+        if slow and self.slow_log_path:
+            with open(self.slow_log_path, "a", encoding="utf-8") as log:
+                log.write(f"{record['at']}\t{record['ms']}ms\t{page}/{panel}\t{record['rows']} rows\t{record['sql']}\n")
+
+    def record_render(self, scope):
+        with self._lock:
+            entry = self._entry(scope["page"], scope["panel"])
+            entry["renders"] += 1
+            entry["render_queries"] += scope["queries"]
+            entry["last"] = scope["queries"]
+            entry["max"] = max(entry["max"], scope["queries"])
+
+    def snapshot(self):
+        """One row per (page, panel) with query counts per render, rows and latency percentiles in ms"""
+        rows = []
+        with self._lock:
+            for (page, panel), entry in sorted(self._pages.items()):
+                latencies = sorted(entry["latencies"])
+                rows.append({
+                    "Page": page, "Panel": panel, "Renders": entry["renders"],
+                    "Queries/Render": round(entry["render_queries"] / entry["renders"], 1) if entry["renders"] else None,
+                    "Max/Render": entry["max"], "Queries": entry["queries"], "Rows": entry["rows"],
+                    "Total ms": round(entry["elapsed"] * 1000, 1),
+                    "p50 ms": round(percentile(latencies, 0.50) * 1000, 2),
+                    "p95 ms": round(percentile(latencies, 0.95) * 1000, 2),
+                    "p99 ms": round(percentile(latencies, 0.99) * 1000, 2),
+                    "Slow": entry["slow"]
+                })
+        return pd.DataFrame(rows, columns=["Page", "Panel", "Renders", "Queries/Render", "Max/Render", "Queries",
+                                           "Rows", "Total ms", "p50 ms", "p95 ms", "p99 ms", "Slow"])
+
+    def slow_queries(self):
+        with self._lock:
+            return pd.DataFrame(list(self._slow), columns=["at", "page", "panel", "ms", "rows", "sql"])
+
+    def reset(self):
+        with self._lock:
+            self._pages.clear()
+            self._slow.clear()
+
+@st.cache_resource
+def get_query_stats():
+    return QueryStats(**QUERY_LOG_CONFIG)
+
+# Render Profiler
+# Opt-in per admin session. A profiled rerun is split into spans: profiled() page functions
+# and profile_phase() markers ("sql", "dataframe", "figure", "render") that run until the
+# next marker. Each span also records the SQL time spent inside it.
+@st.cache_resource
+def get_profile_scope():
+    return threading.local()
+
+class RenderProfile:
+    """Spans of one page rerun, optionally with a cProfile of the whole rerun"""
+
+    def __init__(self, page, capture_cprofile=False):
+        self.page = page
+        self.started = time.perf_counter()
+        self.spans = []
+        self._stack = []
+        self.cprofile = None
+        if capture_cprofile:
+            self.cprofile = cProfile.Profile()
+            try:
+                self.cprofile.enable()
+            except (RuntimeError, ValueError):
+                # Another profiler (a debugger, an external cProfile run) already owns the hook
+                self.cprofile = None
+        self.open(page)
+
+    def _sql_time(self):
+        scope = getattr(get_query_scope(), "current", None)
+        return scope["elapsed"] if scope is not None else 0.0
+
+    def open(self, name, phase=False):
+        if phase and self._stack and self._stack[-1]["phase"]:
+            self.close()
+        self._stack.append({"name": name, "depth": len(self._stack), "phase": phase,
+                            "start": time.perf_counter(), "sql": self._sql_time(), "children": 0.0})
+
+    def close(self):
+        span = self._stack.pop()
+        elapsed = time.perf_counter() - span["start"]
+        if self._stack:
+            self._stack[-1]["children"] += elapsed
+        self.spans.append({
+            "name": span["name"], "depth": span["depth"], "phase": span["phase"],
+            "start_ms": round((span["start"] - self.started) * 1000, 2),
+            "ms": round(elapsed * 1000, 2),
+            "self_ms": round((elapsed - span["children"]) * 1000, 2),
+            "sql_ms": round((self._sql_time() - span["sql"]) * 1000, 2)
+        })
+
+    def close_span(self):
+        """Closes the innermost function span along with the phase still running inside it"""
+        while self._stack and self._stack[-1]["phase"]:
+            self.close()
+        if self._stack:
+            self.close()
+
+    def finish(self):
+        while self._stack:
+            self.close()
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        return round((time.perf_counter() - self.started) * 1000, 2)
+
+def begin_render_profile(page):
+    """Starts profiling this rerun if the signed-in admin turned the profiler on"""
+    local = get_profile_scope()
+    stale = getattr(local, "current", None)
+    if stale is not None:
+        # The previous rerun was cut short (st.rerun, navigation) before it could be filed
+        stale.finish()
+    local.current = None
+    if st.session_state.get("user_role") == "admin" and st.session_state.get("render_profiling"):
+        local.current = RenderProfile(page, st.session_state.get("render_profiling_cprofile", False))
+
+def profile_phase(name):
+    """Marks the start of a phase that lasts until the next marker or the end of the enclosing span"""
+    profile = getattr(get_profile_scope(), "current", None)
+    if profile is not None:
+        profile.open(name, phase=True)
+
+@contextmanager
+def profile_span(name):
+    profile = getattr(get_profile_scope(), "current", None)
+    if profile is None:
+        yield
+        return
+    profile.open(name)
+    try:
+        yield
+    finally:
+        profile.close_span()
+
+def profiled(func):
+    """Records each call of a page function as a profiler span"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with profile_span(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+def finish_render_profile(scope):
+    """Files the rerun's profile with its page, panel and query totals; scope comes from finish_page_queries()"""
+    local = get_profile_scope()
+    profile, local.current = getattr(local, "current", None), None
+    if profile is None:
         return None
+    total_ms = profile.finish()
+    sample = {
+        "release": APP_VERSION,
+        "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "page": profile.page,
+        "panel": scope["panel"] if scope else "",
+        "total_ms": total_ms,
+        "sql_ms": round(scope["elapsed"] * 1000, 2) if scope else 0.0,
+        "queries": scope["queries"] if scope else 0,
+        "spans": sorted(profile.spans, key=lambda span: (span["start_ms"], span["depth"])),
+        "cprofile": None
+    }
+    if profile.cprofile is not None:
+        os.makedirs(PROFILER_CONFIG["cprofile_dir"], exist_ok=True)
+        page_slug = re.sub(r"\W+", "_", profile.page)
+        dump_path = os.path.join(PROFILER_CONFIG["cprofile_dir"], f"render-{datetime.now():%Y%m%d-%H%M%S-%f}-{page_slug}.prof")
+        profile.cprofile.dump_stats(dump_path)
+        summary = io.StringIO()
+        pstats.Stats(profile.cprofile, stream=summary).sort_stats("cumulative").print_stats(PROFILER_CONFIG["cprofile_top"])
+        sample["cprofile"] = dump_path
+        sample["cprofile_summary"] = summary.getvalue()
+    get_render_profiler().record(sample)
+    return sample
 
-def init_db():
-    conn = get_db_connection()
-    if conn is None:
+class RenderProfiler:
+    """The last few profiled renders across sessions; every sample is also appended to a JSON-lines file"""
+
+    def __init__(self, history=20, samples_path=None, **_):
+        self.samples_path = samples_path
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=history)
+
+    def record(self, sample):
+        with self._lock:
+            self._recent.appendleft(sample)
+            if self.samples_path:
+                directory = os.path.dirname(self.samples_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                persisted = {key: value for key, value in sample.items() if key != "cprofile_summary"}
+                with open(self.samples_path, "a", encoding="utf-8") as samples:
+                    samples.write(json.dumps(persisted) + "\n")
+
+    def recent(self):
+        with self._lock:
+            return list(self._recent)
+
+@st.cache_resource
+def get_render_profiler():
+    return RenderProfiler(**PROFILER_CONFIG)
+
+def phase_breakdown(sample):
+    """Self time of a profiled render by phase; time outside any phase marker is reported as other"""
+    breakdown = {}
+    for span in sample["spans"]:
+        name = span["name"] if span["phase"] else "other"
+        breakdown[name] = breakdown.get(name, 0.0) + span["self_ms"]
+    return breakdown
+
+def show_render_profiles():
+    """System tab view of the recent profiled renders: phase totals per render and a waterfall of one"""
+    samples = get_render_profiler().recent()
+    if not samples:
+        st.info("No profiled renders yet; turn the profiler on and open a page")
         return
-        
-    cursor = conn.cursor()
+
+    labels = [f"{sample['at'][11:]} {sample['page']}" + (f" / {sample['panel']}" if sample['panel'] else "")
+              for sample in samples]
+    phases = pd.DataFrame([
+        {"Render": f"{n + 1}. {label}", "Phase": phase, "ms": ms}
+        for n, (label, sample) in enumerate(zip(labels, samples))
+        for phase, ms in sorted(phase_breakdown(sample).items())
+    ], columns=["Render", "Phase", "ms"])
+    fig = px.bar(phases, x="ms", y="Render", color="Phase", orientation="h",
+                 color_discrete_sequence=px.colors.qualitative.Pastel)
+    fig.update_layout(
+        plot_bgcolor='rgba(26, 32, 64, 0.7)',
+        paper_bgcolor='rgba(26, 32, 64, 0.7)',
+        font_color='white',
+        yaxis=dict(autorange="reversed", title=""),
+        xaxis_title="ms",
+        margin=dict(t=30, b=30)
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    choice = st.selectbox("Render", range(len(samples)), key="render_profile_choice",
+                          format_func=lambda n: f"{n + 1}. {labels[n]} ({samples[n]['total_ms']:.0f} ms, "
+                                                f"{samples[n]['queries']} queries, {samples[n]['sql_ms']:.0f} ms SQL)")
+    sample = samples[choice]
+    spans = pd.DataFrame(sample["spans"])
+    spans["Span"] = [f"{n:02d} {'· ' * span.depth}{span.name}" for n, span in enumerate(spans.itertuples())]
+    fig = px.bar(spans, x="ms", y="Span", base="start_ms", color="name", orientation="h",
+                 hover_data=["start_ms", "ms", "sql_ms"], color_discrete_sequence=px.colors.qualitative.Pastel)
+    fig.update_layout(
+        plot_bgcolor='rgba(26, 32, 64, 0.7)',
+        paper_bgcolor='rgba(26, 32, 64, 0.7)',
+        font_color='white',
+        yaxis=dict(autorange="reversed", title=""),
+        xaxis_title="ms since rerun start",
+        showlegend=False,
+        margin=dict(t=30, b=30)
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    if sample.get("cprofile_summary"):
+        with st.expander(f"cProfile ({sample['cprofile']})"):
+            st.code(sample["cprofile_summary"])
+
+def load_render_samples(path=None):
+    """Reads persisted render samples (one JSON object per line) for cross-release comparison"""
+    path = path or PROFILER_CONFIG["samples_path"]
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as samples:
+        return [json.loads(line) for line in samples if line.strip()]
+
+SCHEMA_VERSION = 1
+
+def get_schema_version(cursor):
+    """Highest schema version recorded in the database (0 for a fresh database)"""
+    try:
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+        return cursor.fetchone()[0] or 0
+    except DB_ERRORS:
+        return 0
+
+def init_db():
     tables = [
         """CREATE TABLE IF NOT EXISTS users (
             id INT AUTO_INCREMENT PRIMARY KEY,
@@ -72,121 +973,982 @@ def init_db():
             action VARCHAR(100),
             details TEXT,
             timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        """CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            description VARCHAR(200),
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )"""
     ]
     
-    for table in tables:
-        cursor.execute(table)
-    conn.commit()
-    conn.close()
+    with db_connection() as conn:
+        if conn is None:
+            return
 
-init_db()
+        backend = get_storage_backend()
+        cursor = conn.cursor()
+        version = get_schema_version(cursor)
+        if version >= SCHEMA_VERSION:
+            return version
 
-# Utility Functions
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+        for table in tables:
+            for statement in backend.translate_ddl(table):
+                cursor.execute(statement)
+        try:
+            cursor.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                           (SCHEMA_VERSION, "Base schema"))
+            conn.commit()
+        except DB_ERRORS:
+            # Another process bootstrapped the same version first
+            conn.rollback()
+        return SCHEMA_VERSION
 
-def log_activity(user_id, action, details=""):
-    conn = get_db_connection()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO activity_log (user_id, action, details)
-            VALUES (%s, %s, %s)
-        """, (user_id, action, details))
-        conn.commit()
-        conn.close()
+# Order Rollups
+# order_daily_rollup holds order count and units per (order day, current status); writers
+# keep it current inside the same transaction that inserts orders or changes their status.
+ORDER_ROLLUP_COLUMNS = ["day", "status", "order_count", "total_quantity"]
 
-def apply_custom_css_styles():
-    """Applies custom CSS with vibrant blue background and larger buttons"""
-    st.set_page_config(
-        page_title="Warehouse Management System", 
-        layout="wide",
-        initial_sidebar_state="expanded"
-    )
-    
-    st.markdown("""
-                <style>
-                    /* ----- Base Reset & Layout ----- */
-                    #MainMenu, header, footer, .stDeployButton, #stDecoration {
-                        visibility: hidden;
-                        display: none !important;
-                    }
+def apply_order_rollup(cursor, where_sql, params=(), sign=1):
+    """Adds (sign=1) or removes (sign=-1) the contribution of the orders matching where_sql"""
+    select_sql = f"""
+        SELECT DATE(order_date), status, {sign} * COUNT(*), {sign} * SUM(quantity)
+        FROM orders WHERE {where_sql}
+        GROUP BY DATE(order_date), status
+    """
+    cursor.execute(get_storage_backend().accumulate_sql(
+        "order_daily_rollup", ORDER_ROLLUP_COLUMNS, ["day", "status"], select_sql), params)
 
-                    /* ----- Vibrant Blue Background ----- */
-                    .stApp {
-                        background: linear-gradient(135deg, #0f1b3d 0%, #1a3a8f 100%) !important;
-                        background-attachment: fixed;
-                        color: #ffffff;
-                        padding: 2rem 4rem;
-                        min-height: 100vh;
-                        transition: all 0.3s ease;
-                    }
+def rebuild_order_rollup(cursor):
+    """Recomputes order_daily_rollup from the orders table; the caller commits"""
+    cursor.execute("DELETE FROM order_daily_rollup")
+    cursor.execute("""
+        INSERT INTO order_daily_rollup (day, status, order_count, total_quantity)
+        SELECT DATE(order_date), status, COUNT(*), SUM(quantity)
+        FROM orders
+        GROUP BY DATE(order_date), status
+    """)
 
-                    /* ----- Data Visualization Styling ----- */
-                    .stDataFrame, table {
-                        background-color: rgba(26, 32, 64, 0.7) !important;
-                        color: white !important;
-                        border-radius: 10px !important;
-                        border: 1px solid #4e54c8 !important;
-                    }
+def check_order_rollup(cursor):
+    """Compares order_daily_rollup with a live aggregate; returns a list of ((day, status), stored, actual)"""
+    cursor.execute("SELECT DATE(order_date), status, COUNT(*), SUM(quantity) FROM orders GROUP BY DATE(order_date), status")
+    actual = {(str(row[0]), row[1]): (int(row[2]), int(row[3])) for row in cursor.fetchall()}
+    cursor.execute(f"SELECT {', '.join(ORDER_ROLLUP_COLUMNS)} FROM order_daily_rollup")
+    stored = {(str(row[0]), row[1]): (int(row[2]), int(row[3])) for row in cursor.fetchall() if row[2]}
+    return [(key, stored.get(key), actual.get(key))
+            for key in sorted(set(actual) | set(stored)) if stored.get(key) != actual.get(key)]
 
-                    .stDataFrame th {
-                        background-color: #4e54c8 !important;
-                        color: white !important;
-                        font-weight: bold !important;
-                    }
+def backfill_order_rollup(cursor, backend):
+    """Backfill order_daily_rollup from existing orders"""
+    rebuild_order_rollup(cursor)
 
-                    .stDataFrame tr:nth-child(even) {
-                        background-color: rgba(78, 84, 200, 0.2) !important;
-                    }
+# Order Status History
+# order_status_history is append-only: one row when an order is placed and one per status change,
+# written in the transaction that changes orders. entered_at is when the order reached from_status,
+# so every transition row is one completed stage. orders.status_changed_at holds the time of the
+# latest change for backlog ageing. Orders placed before the table existed start with a single
+# snapshot row (from_status NULL, to_status their status at the time) that carries no timing; unless
+# they were still Pending, when they reached that status is unknown, so their status_changed_at is
+# NULL and the stage they leave next is recorded with entered_at NULL and left out of durations.
+HISTORY_TIMED_ROWS = "(from_status IS NOT NULL OR to_status = 'Pending')"
 
-                    .stDataFrame tr:hover {
-                        background-color: rgba(142, 148, 251, 0.3) !important;
-                    }
+def record_order_placed(cursor, order_id):
+    cursor.execute("""
+        INSERT INTO order_status_history (order_id, from_status, to_status, entered_at, changed_at, changed_by)
+        SELECT order_id, NULL, status, NULL, status_changed_at, ordered_by FROM orders WHERE order_id = %s
+    """, (order_id,))
 
-                    .stPlotlyChart {
-                        background-color: rgba(26, 32, 64, 0.7) !important;
-                        border-radius: 10px !important;
-                        border: 1px solid #4e54c8 !important;
-                        padding: 10px !important;
-                    }
+def record_status_transition(cursor, where_sql, params, new_status, changed_at, changed_by=None):
+    """Appends a history row for each order matching where_sql; run it before the UPDATE that changes status"""
+    cursor.execute(f"""
+        INSERT INTO order_status_history (order_id, from_status, to_status, entered_at, changed_at, changed_by)
+        SELECT order_id, status, %s, status_changed_at, %s, %s FROM orders WHERE {where_sql}
+    """, [new_status, changed_at, changed_by] + list(params))
 
-                    .stMetric {
-                        background-color: rgba(26, 32, 64, 0.7) !important;
-                        border-radius: 10px !important;
-                        border: 1px solid #4e54c8 !important;
-                        padding: 15px !important;
-                    }
+def backfill_order_status_history(cursor, backend):
+    """Start each existing order's status history from its current status"""
+    cursor.execute("UPDATE orders SET status_changed_at = COALESCE(order_date, CURRENT_TIMESTAMP) WHERE status = 'Pending'")
+    cursor.execute("""
+        INSERT INTO order_status_history (order_id, from_status, to_status, entered_at, changed_at, changed_by)
+        SELECT order_id, NULL, status, NULL, COALESCE(order_date, CURRENT_TIMESTAMP), ordered_by FROM orders
+    """)
 
-                    .stMetric label {
-                        color: #8f94fb !important;
-                        font-size: 1rem !important;
-                    }
+def untime_backfilled_stages(cursor, backend):
+    """Drop the order_date stand-in for when backfilled non-Pending orders reached their status"""
+    # Snapshot rows for anything but Pending only come from the backfill
+    cursor.execute("""
+        SELECT h.id FROM order_status_history h
+        JOIN order_status_history s
+            ON s.order_id = h.order_id AND s.from_status IS NULL AND s.to_status <> 'Pending'
+            AND h.from_status = s.to_status
+    """)
+    ids = [row[0] for row in cursor.fetchall()]
+    for start in range(0, len(ids), 1000):
+        batch = ids[start:start + 1000]
+        cursor.execute(f"UPDATE order_status_history SET entered_at = NULL WHERE id IN ({', '.join(['%s'] * len(batch))})",
+                       batch)
+    cursor.execute("""
+        UPDATE orders SET status_changed_at = NULL
+        WHERE status <> 'Pending' AND order_id IN (
+            SELECT order_id FROM order_status_history
+            WHERE from_status IS NULL AND to_status <> 'Pending' AND to_status = orders.status
+        )
+    """)
 
-                    .stMetric div {
-                        color: white !important;
-                        font-size: 1.8rem !important;
-                        font-weight: bold !important;
-                    }
+# Order Lines
+# An order is a header row in orders plus one order_items row per item. The header keeps summary
+# columns for list views and the rollup: item_id/item_name of the first line, quantity as total
+# units and line_count.
+def backfill_order_items(cursor, backend):
+    """Turn every existing single-item order into a one-line order"""
+    cursor.execute("""
+        INSERT INTO order_items (order_id, line_no, item_id, item_name, quantity)
+        SELECT order_id, 1, item_id, item_name, quantity FROM orders
+    """)
 
-                    /* ----- Tabs Styling: Fixed underline and spacing ----- */
-                    .stTabs [role="tablist"] {
-                        background-color: rgba(26, 32, 64, 0.7) !important;
-                        border-radius: 10px 10px 0 0 !important;
-                        padding: 0 1rem !important;
-                        display: flex !important;
-                        flex-wrap: wrap;
-                        gap: 0.5rem;
-                    }
+# Archiving
+# Delivered orders (with their lines) and activity_log rows older than the ARCHIVE_CONFIG horizons
+# move to *_archive tables in batches. Each batch copies and deletes in one transaction, so an
+# interrupted run loses nothing and the next run carries on with whatever is still due.
+# order_daily_rollup covers hot orders only; order_status_history stays in place, since the
+# cycle-time report reads it by changed_at range.
+ORDER_ARCHIVE_COLUMNS = "order_id, item_id, item_name, quantity, status, ordered_by, order_date, status_changed_at, line_count"
+ORDER_ITEM_ARCHIVE_COLUMNS = "order_id, line_no, item_id, item_name, quantity"
+ACTIVITY_ARCHIVE_COLUMNS = "id, user_id, action, details, timestamp"
 
-                    .stTabs [role="tab"] {
-                        color: #8f94fb !important;
-                        background-color: transparent !important;
-                        font-size: 1rem !important;
-                        padding: 0.75rem 1.5rem !important;
-                        font-weight: 500;
-                        white-space: nowrap;
+def move_orders_to_archive(cursor, order_ids):
+    id_list = ", ".join(["%s"] * len(order_ids))
+    cursor.execute(f"INSERT INTO orders_archive ({ORDER_ARCHIVE_COLUMNS}) "
+                   f"SELECT {ORDER_ARCHIVE_COLUMNS} FROM orders WHERE order_id IN ({id_list})", order_ids)
+    cursor.execute(f"INSERT INTO order_items_archive ({ORDER_ITEM_ARCHIVE_COLUMNS}) "
+                   f"SELECT {ORDER_ITEM_ARCHIVE_COLUMNS} FROM order_items WHERE order_id IN ({id_list})", order_ids)
+    apply_order_rollup(cursor, f"order_id IN ({id_list})", order_ids, sign=-1)
+    # Days whose last hot orders just left would otherwise keep zero-count rollup rows forever
+    cursor.execute(f"""
+        DELETE FROM order_daily_rollup
+        WHERE order_count = 0 AND day IN (SELECT DATE(order_date) FROM orders WHERE order_id IN ({id_list}))
+    """, order_ids)
+    cursor.execute(f"DELETE FROM order_items WHERE order_id IN ({id_list})", order_ids)
+    cursor.execute(f"DELETE FROM orders WHERE order_id IN ({id_list})", order_ids)
+
+def move_activity_to_archive(cursor, ids):
+    id_list = ", ".join(["%s"] * len(ids))
+    cursor.execute(f"INSERT INTO activity_log_archive ({ACTIVITY_ARCHIVE_COLUMNS}) "
+                   f"SELECT {ACTIVITY_ARCHIVE_COLUMNS} FROM activity_log WHERE id IN ({id_list})", ids)
+    cursor.execute(f"DELETE FROM activity_log WHERE id IN ({id_list})", ids)
+
+# Target -> (oldest-first query for the keys due before a cutoff, mover, retention setting, cached tables)
+ARCHIVE_TARGETS = {
+    "orders": ("""SELECT order_id FROM orders
+        WHERE status = 'Delivered' AND order_date < %s ORDER BY order_date, order_id""",
+               move_orders_to_archive, "order_retention_days", ("orders", "orders_archive")),
+    "activity_log": ("SELECT id FROM activity_log WHERE timestamp < %s ORDER BY timestamp, id",
+                     move_activity_to_archive, "activity_retention_days", ())
+}
+
+def archive_cutoff(cursor, days):
+    """The database's current time less days, as a timestamp string"""
+    cursor.execute("SELECT CURRENT_TIMESTAMP")
+    return (pd.Timestamp(cursor.fetchone()[0]) - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+def count_archivable(target, days=None):
+    """(rows due for archiving, cutoff) for target, or None if the database is unavailable"""
+    select_sql, _, setting, _ = ARCHIVE_TARGETS[target]
+    with db_connection() as conn:
+        if conn is None:
+            return None
+        cursor = conn.cursor()
+        cutoff = archive_cutoff(cursor, ARCHIVE_CONFIG[setting] if days is None else days)
+        cursor.execute(f"SELECT COUNT(*) FROM ({select_sql}) due", (cutoff,))
+        return cursor.fetchone()[0], cutoff
+
+def archive_rows(target, days=None, batch_size=None, max_batches=None, pause=0.0, progress=None):
+    """Moves target rows older than days to its archive table in committed batches; returns rows moved
+
+    progress, if given, is called with the running total after each batch. pause sleeps between
+    batches to leave room for other writers; max_batches stops early and a later run resumes.
+    """
+    select_sql, mover, setting, tables = ARCHIVE_TARGETS[target]
+    batch_size = batch_size or ARCHIVE_CONFIG["batch_size"]
+    moved = batches = 0
+    with db_connection() as conn:
+        if conn is None:
+            return None
+
+        cursor = conn.cursor()
+        cutoff = archive_cutoff(cursor, ARCHIVE_CONFIG[setting] if days is None else days)
+        while max_batches is None or batches < max_batches:
+            try:
+                cursor.execute(f"{select_sql} LIMIT %s", (cutoff, batch_size))
+                keys = [row[0] for row in cursor.fetchall()]
+                if not keys:
+                    conn.rollback()
+                    break
+                mover(cursor, keys)
+                record_table_writes(cursor, *tables)
+                conn.commit()
+            except DB_ERRORS:
+                conn.rollback()
+                raise
+            moved += len(keys)
+            batches += 1
+            bump_table_versions(*tables)
+            if progress:
+                progress(moved)
+            if pause:
+                time.sleep(pause)
+    return moved
+
+# Category Summary
+# category_summary holds item count, units in stock and price totals per category ('' for none);
+# writers keep it current in the transaction that adds items or changes stock, and
+# check_category_summary() / rebuild_category_summary() repair any drift.
+CATEGORY_SUMMARY_COLUMNS = ["category", "item_count", "total_stock", "price_sum", "price_count"]
+CATEGORY_SUMMARY_SELECT = """
+    SELECT COALESCE(category, ''), {sign} * COUNT(*), {sign} * SUM(stock),
+        {sign} * COALESCE(SUM(price), 0), {sign} * COUNT(price)
+    FROM inventory {where}
+    GROUP BY COALESCE(category, '')
+"""
+
+def apply_category_summary(cursor, where_sql, params=(), sign=1):
+    """Adds (sign=1) or removes (sign=-1) the contribution of the inventory rows matching where_sql"""
+    select_sql = CATEGORY_SUMMARY_SELECT.format(sign=sign, where=f"WHERE {where_sql}")
+    cursor.execute(get_storage_backend().accumulate_sql(
+        "category_summary", CATEGORY_SUMMARY_COLUMNS, ["category"], select_sql), params)
+
+def adjust_category_stock(cursor, deltas):
+    """Moves total_stock of each item's category by {item_id: delta} after a stock-only change"""
+    by_item = " ".join(["WHEN %s THEN %s"] * len(deltas))
+    select_sql = f"""
+        SELECT COALESCE(category, ''), 0, SUM(CASE id {by_item} END), 0, 0
+        FROM inventory WHERE id IN ({', '.join(['%s'] * len(deltas))})
+        GROUP BY COALESCE(category, '')
+    """
+    cursor.execute(get_storage_backend().accumulate_sql(
+        "category_summary", CATEGORY_SUMMARY_COLUMNS, ["category"], select_sql),
+        [value for pair in deltas.items() for value in pair] + list(deltas))
+
+def rebuild_category_summary(cursor):
+    """Recomputes category_summary from the inventory table; the caller commits"""
+    cursor.execute("DELETE FROM category_summary")
+    cursor.execute(f"INSERT INTO category_summary ({', '.join(CATEGORY_SUMMARY_COLUMNS)}) "
+                   + CATEGORY_SUMMARY_SELECT.format(sign=1, where=""))
+
+def check_category_summary(cursor):
+    """Compares category_summary with a live aggregate; returns a list of (category, stored, actual)"""
+    cursor.execute(CATEGORY_SUMMARY_SELECT.format(sign=1, where=""))
+    actual = {row[0]: (int(row[1]), int(row[2]), round(float(row[3]), 2), int(row[4])) for row in cursor.fetchall()}
+    cursor.execute(f"SELECT {', '.join(CATEGORY_SUMMARY_COLUMNS)} FROM category_summary")
+    stored = {row[0]: (int(row[1]), int(row[2]), round(float(row[3]), 2), int(row[4]))
+              for row in cursor.fetchall() if row[1]}
+    return [(category, stored.get(category), actual.get(category))
+            for category in sorted(set(actual) | set(stored)) if stored.get(category) != actual.get(category)]
+
+def backfill_category_summary(cursor, backend):
+    """Backfill category_summary from existing inventory"""
+    rebuild_category_summary(cursor)
+
+# Supplier Resolution
+# inventory.supplier keeps the supplier name as entered; supplier_id links the row to suppliers
+# and is what joins and counts use. Names resolve exactly first, then case/space-insensitively.
+def normalise_supplier_name(name):
+    return " ".join(str(name).split()).casefold()
+
+def fetch_supplier_lookup(cursor):
+    """Maps exact and normalised supplier names to suppliers.id; ambiguous normalised names are left out"""
+    cursor.execute("SELECT id, name FROM suppliers ORDER BY id")
+    exact, normalised, ambiguous = {}, {}, set()
+    for supplier_id, name in cursor.fetchall():
+        exact.setdefault(name, supplier_id)
+        key = normalise_supplier_name(name)
+        if normalised.setdefault(key, supplier_id) != supplier_id:
+            ambiguous.add(key)
+    for key in ambiguous:
+        del normalised[key]
+    return exact, normalised
+
+def resolve_supplier_id(lookup, name):
+    exact, normalised = lookup
+    if name is None:
+        return None
+    return exact.get(name, normalised.get(normalise_supplier_name(name)))
+
+def resolve_inventory_suppliers(cursor):
+    """Links unlinked inventory rows to suppliers by name; returns the number of rows resolved"""
+    lookup = fetch_supplier_lookup(cursor)
+    cursor.execute("SELECT DISTINCT supplier FROM inventory WHERE supplier_id IS NULL")
+    matches = [(resolve_supplier_id(lookup, name), name) for (name,) in cursor.fetchall()]
+    matches = [match for match in matches if match[0] is not None]
+    resolved = 0
+    for supplier_id, name in matches:
+        cursor.execute("UPDATE inventory SET supplier_id = %s WHERE supplier = %s AND supplier_id IS NULL",
+                       (supplier_id, name))
+        resolved += cursor.rowcount
+    return resolved
+
+def unmatched_suppliers(cursor):
+    """Supplier names on inventory rows that match no supplier, as (name, item_count)"""
+    cursor.execute("""
+        SELECT supplier, COUNT(*) FROM inventory
+        WHERE supplier_id IS NULL
+        GROUP BY supplier ORDER BY supplier
+    """)
+    return [(name, int(count)) for name, count in cursor.fetchall()]
+
+def backfill_inventory_suppliers(cursor, backend):
+    """Resolve inventory.supplier names to suppliers.id (see manage.py resolve-suppliers for leftovers)"""
+    resolve_inventory_suppliers(cursor)
+
+# Schema Migrations
+# Forward-only: never edit a released migration, append a new one with the next version.
+# Each step is either a SQL statement or a callable(cursor, backend) for data migrations.
+Migration = namedtuple("Migration", ["version", "description", "steps"])
+
+MIGRATIONS = [
+    Migration(2, "Index orders for pending counts and recent-order listing", [
+        "CREATE INDEX idx_orders_status ON orders (status, order_date)",
+        "CREATE INDEX idx_orders_recent ON orders (order_date, item_name, quantity, status)"
+    ]),
+    Migration(3, "Covering indexes for inventory aggregates and low-stock scan", [
+        "CREATE INDEX idx_inventory_category ON inventory (category, stock, price)",
+        "CREATE INDEX idx_inventory_low_stock ON inventory (stock, min_stock, item_name)",
+        "CREATE INDEX idx_inventory_supplier ON inventory (supplier)"
+    ]),
+    Migration(4, "Index supplier names for the supplier performance join", [
+        "CREATE INDEX idx_suppliers_name ON suppliers (name, rating, lead_time_days)"
+    ]),
+    Migration(5, "Index inventory sort keys for keyset pagination", [
+        "CREATE INDEX idx_inventory_name ON inventory (item_name)",
+        "CREATE INDEX idx_inventory_updated ON inventory (last_updated)"
+    ]),
+    Migration(6, "Daily order rollup for the Order History report", [
+        """CREATE TABLE IF NOT EXISTS order_daily_rollup (
+            day DATE NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            order_count INT NOT NULL DEFAULT 0,
+            total_quantity INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, status)
+        )""",
+        backfill_order_rollup
+    ]),
+    Migration(7, "Category summary for the dashboard pie and Inventory Summary report", [
+        """CREATE TABLE IF NOT EXISTS category_summary (
+            category VARCHAR(50) NOT NULL PRIMARY KEY,
+            item_count INT NOT NULL DEFAULT 0,
+            total_stock INT NOT NULL DEFAULT 0,
+            price_sum DECIMAL(14,2) NOT NULL DEFAULT 0,
+            price_count INT NOT NULL DEFAULT 0
+        )""",
+        backfill_category_summary
+    ]),
+    Migration(8, "Link inventory to suppliers by id", [
+        "ALTER TABLE inventory ADD COLUMN supplier_id INT NULL",
+        "CREATE INDEX idx_inventory_supplier_id ON inventory (supplier_id)",
+        "ALTER TABLE inventory ADD CONSTRAINT fk_inventory_supplier FOREIGN KEY (supplier_id) REFERENCES suppliers(id)",
+        backfill_inventory_suppliers
+    ]),
+    Migration(9, "Order status history for cycle-time reporting", [
+        """CREATE TABLE IF NOT EXISTS order_status_history (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            order_id INT NOT NULL,
+            from_status VARCHAR(20) NULL,
+            to_status VARCHAR(20) NOT NULL,
+            entered_at TIMESTAMP NULL,
+            changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            changed_by VARCHAR(50)
+        )""",
+        "CREATE INDEX idx_status_history_changed ON order_status_history (changed_at, to_status, from_status, entered_at)",
+        "CREATE INDEX idx_status_history_order ON order_status_history (order_id, to_status)",
+        "ALTER TABLE orders ADD COLUMN status_changed_at TIMESTAMP NULL",
+        "CREATE INDEX idx_orders_status_age ON orders (status, status_changed_at)",
+        backfill_order_status_history
+    ]),
+    Migration(10, "Order lines for multi-item orders", [
+        """CREATE TABLE IF NOT EXISTS order_items (
+            order_id INT NOT NULL,
+            line_no INT NOT NULL,
+            item_id INT NOT NULL,
+            item_name VARCHAR(100) NOT NULL,
+            quantity INT NOT NULL,
+            PRIMARY KEY (order_id, line_no),
+            FOREIGN KEY (order_id) REFERENCES orders(order_id),
+            FOREIGN KEY (item_id) REFERENCES inventory(id)
+        )""",
+        "CREATE INDEX idx_order_items_item ON order_items (item_id)",
+        "ALTER TABLE orders ADD COLUMN line_count INT NOT NULL DEFAULT 1",
+        backfill_order_items
+    ]),
+    Migration(11, "Archive tables for cold orders and activity_log rows", [
+        """CREATE TABLE IF NOT EXISTS orders_archive (
+            order_id INT PRIMARY KEY,
+            item_id INT NOT NULL,
+            item_name VARCHAR(100) NOT NULL,
+            quantity INT NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            ordered_by VARCHAR(50),
+            order_date TIMESTAMP NULL,
+            status_changed_at TIMESTAMP NULL,
+            line_count INT NOT NULL DEFAULT 1,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        "CREATE INDEX idx_orders_archive_date ON orders_archive (order_date, quantity)",
+        """CREATE TABLE IF NOT EXISTS order_items_archive (
+            order_id INT NOT NULL,
+            line_no INT NOT NULL,
+            item_id INT NOT NULL,
+            item_name VARCHAR(100) NOT NULL,
+            quantity INT NOT NULL,
+            PRIMARY KEY (order_id, line_no)
+        )""",
+        """CREATE TABLE IF NOT EXISTS activity_log_archive (
+            id INT PRIMARY KEY,
+            user_id INT,
+            action VARCHAR(100),
+            details TEXT,
+            timestamp TIMESTAMP NULL,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        "CREATE INDEX idx_activity_archive_timestamp ON activity_log_archive (timestamp)",
+        "CREATE INDEX idx_activity_log_timestamp ON activity_log (timestamp, id)"
+    ]),
+    # item_name, supplier and last_updated already have single-column indexes, which both engines
+    # extend with the primary key, so they serve (column, id) order as they are
+    Migration(12, "Index (sort key, id) for the remaining inventory grid sorts", [
+        "CREATE INDEX idx_inventory_stock_id ON inventory (stock, id)",
+        "CREATE INDEX idx_inventory_price_id ON inventory (price, id)",
+        "CREATE INDEX idx_inventory_category_id ON inventory (category, id)"
+    ]),
+    Migration(13, "Shared table versions so writes from other processes invalidate read caches", [
+        """CREATE TABLE IF NOT EXISTS table_versions (
+            table_name VARCHAR(64) PRIMARY KEY,
+            version INT NOT NULL DEFAULT 0
+        )"""
+    ]),
+    Migration(14, "Stop timing stages that began before status history was recorded", [
+        untime_backfilled_stages
+    ]),
+    Migration(15, "Index (order_date, order_id) for Order History keyset paging", [
+        "CREATE INDEX idx_orders_date_id ON orders (order_date, order_id)",
+        "CREATE INDEX idx_orders_archive_date_id ON orders_archive (order_date, order_id)"
+    ])
+]
+
+# Hot queries and the index each one must use once MIGRATIONS are applied
+INDEXED_QUERIES = [
+    ("Pending orders count", "SELECT COUNT(*) FROM orders WHERE status = 'Pending'", "idx_orders_status"),
+    ("Recent orders", """SELECT o.item_name, o.quantity, o.order_date, o.status
+        FROM orders o ORDER BY o.order_date DESC LIMIT 10""", "idx_orders_recent"),
+    ("Open orders", """SELECT order_id, status, order_date FROM orders
+        WHERE status = 'Pending' ORDER BY order_date, order_id LIMIT 51""", "idx_orders_status"),
+    ("Low stock scan", "SELECT item_name, stock, min_stock FROM inventory WHERE stock < min_stock",
+     "idx_inventory_low_stock"),
+    ("Category summary rebuild", CATEGORY_SUMMARY_SELECT.format(sign=1, where=""), "idx_inventory_category"),
+    ("Active suppliers", "SELECT COUNT(DISTINCT supplier_id) FROM inventory", "idx_inventory_supplier_id"),
+    ("Supplier performance", """SELECT s.name, COUNT(i.id) as item_count, AVG(s.lead_time_days) as avg_lead_time, s.rating
+        FROM suppliers s LEFT JOIN inventory i ON i.supplier_id = s.id
+        GROUP BY s.id, s.name, s.rating ORDER BY s.rating DESC""", "idx_inventory_supplier_id"),
+    ("Status history range", """SELECT from_status, entered_at, changed_at FROM order_status_history
+        WHERE changed_at >= '2024-01-01' AND changed_at < '2024-02-01' AND entered_at IS NOT NULL""",
+     "idx_status_history_changed"),
+    ("Backlog ageing", """SELECT status, COUNT(*), MIN(status_changed_at) FROM orders
+        WHERE status IN ('Pending', 'Processing', 'Shipped') GROUP BY status""", "idx_orders_status_age"),
+    ("Archivable orders", ARCHIVE_TARGETS["orders"][0].replace("%s", "'2024-01-01'") + " LIMIT 1000",
+     "idx_orders_status"),
+    ("Archivable activity", ARCHIVE_TARGETS["activity_log"][0].replace("%s", "'2024-01-01'") + " LIMIT 1000",
+     "idx_activity_log_timestamp"),
+    ("Archived order days", """SELECT DATE(order_date), COUNT(*), SUM(quantity) FROM orders_archive
+        WHERE order_date >= '2024-01-01' AND order_date < '2024-04-01' GROUP BY DATE(order_date)""",
+     "idx_orders_archive_date"),
+    ("Order history page", """SELECT order_id, order_date FROM orders
+        WHERE (order_date, order_id) < ('2024-01-01', 0) ORDER BY order_date DESC, order_id DESC LIMIT 51""",
+     "idx_orders_date_id"),
+    ("Archived order history page", """SELECT order_id, order_date FROM orders_archive
+        WHERE (order_date, order_id) < ('2024-01-01', 0) ORDER BY order_date DESC, order_id DESC LIMIT 51""",
+     "idx_orders_archive_date_id"),
+    ("Inventory grid by name", """SELECT id, item_name FROM inventory
+        WHERE (item_name, id) > ('M', 0) ORDER BY item_name, id LIMIT 51""", "idx_inventory_name"),
+    ("Inventory grid by stock", """SELECT id, stock FROM inventory
+        WHERE (stock, id) < (10, 0) ORDER BY stock DESC, id DESC LIMIT 51""", "idx_inventory_stock_id"),
+    ("Inventory grid by price", """SELECT id, price FROM inventory
+        WHERE (price, id) > (10, 0) ORDER BY price, id LIMIT 51""", "idx_inventory_price_id"),
+    ("Inventory grid by category", """SELECT id, category FROM inventory
+        WHERE (category, id) > ('M', 0) ORDER BY category, id LIMIT 51""", "idx_inventory_category_id")
+]
+
+def describe_step(step):
+    if callable(step):
+        return f"-- {(step.__doc__ or step.__name__).strip().splitlines()[0]}"
+    return " ".join(step.split())
+
+DDL_STEP_OBJECTS = [
+    ("index", re.compile(r"CREATE INDEX (\w+) ON (\w+)")),
+    ("column", re.compile(r"ALTER TABLE (\w+) ADD COLUMN (\w+)")),
+    ("constraint", re.compile(r"ALTER TABLE (\w+) ADD CONSTRAINT (\w+)"))
+]
+
+def ddl_already_applied(cursor, backend, statement):
+    """True if statement creates an index, column or constraint that already exists.
+
+    MySQL commits each DDL statement as it runs, so a migration that failed halfway leaves its
+    earlier steps in place; skipping those lets the migration simply be re-run.
+    """
+    for kind, pattern in DDL_STEP_OBJECTS:
+        match = pattern.match(statement.strip())
+        if match:
+            table, name = (match.group(2), match.group(1)) if kind == "index" else match.groups()
+            return backend.schema_object_exists(cursor, kind, table, name)
+    return False
+
+def pending_migrations(cursor):
+    current = get_schema_version(cursor)
+    return [m for m in sorted(MIGRATIONS, key=lambda m: m.version) if m.version > current]
+
+def apply_migrations(dry_run=False):
+    """Applies pending MIGRATIONS in version order and returns the plan that was (or would be) run"""
+    backend = get_storage_backend()
+    with db_connection() as conn:
+        if conn is None:
+            return None
+
+        cursor = conn.cursor()
+        if dry_run:
+            pending = pending_migrations(cursor)
+        else:
+            with backend.migration_lock(conn, cursor):
+                # Read the version under the lock: a concurrent process may have just migrated
+                pending = pending_migrations(cursor)
+                for migration in pending:
+                    # Data steps come last in each migration, so they commit together with its version row
+                    for step in migration.steps:
+                        if callable(step):
+                            step(cursor, backend)
+                            continue
+                        for statement in backend.translate_ddl(step):
+                            if not ddl_already_applied(cursor, backend, statement):
+                                cursor.execute(statement)
+                    cursor.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                                   (migration.version, migration.description))
+                    if not backend.transactional_ddl:
+                        conn.commit()
+        return [{"version": m.version,
+                 "description": m.description,
+                 "statements": [describe_step(step) for step in m.steps]} for m in pending]
+
+def check_index_usage():
+    """EXPLAINs every INDEXED_QUERIES entry; returns a list of (label, index, used, plan)"""
+    backend = get_storage_backend()
+    results = []
+    with db_connection() as conn:
+        if conn is None:
+            return results
+
+        cursor = conn.cursor()
+        for label, sql, index in INDEXED_QUERIES:
+            plan = backend.explain(cursor, sql)
+            results.append((label, index, any(index in line for line in plan), plan))
+    return results
+
+@st.cache_resource
+def get_schema_state():
+    return {"version": None, "lock": threading.Lock()}
+
+def ensure_schema():
+    """Bootstraps the schema once per process; later Streamlit reruns skip all DDL"""
+    state = get_schema_state()
+    if state["version"] is None:
+        with state["lock"]:
+            if state["version"] is None and init_db() is not None and apply_migrations() is not None:
+                state["version"] = max([SCHEMA_VERSION] + [m.version for m in MIGRATIONS])
+    return state["version"]
+
+# Utility Functions
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+class TableVersions:
+    """Per-table write counters; cached reads are keyed on them and write paths bump them on commit
+
+    Writes made by other processes are picked up through the table_versions table: sync() bumps
+    every table whose shared version moved since the previous sync.
+    """
+
+    def __init__(self):
+        self._versions = {}
+        self._shared = {}
+        self._synced_at = None
+        self._lock = threading.Lock()
+
+    def bump(self, *tables):
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def snapshot(self, *tables):
+        with self._lock:
+            return tuple(self._versions.get(table, 0) for table in tables)
+
+    def claim_sync(self, interval):
+        """True for the one caller that should re-read table_versions now"""
+        with self._lock:
+            now = time.monotonic()
+            if self._synced_at is not None and now - self._synced_at < interval:
+                return False
+            self._synced_at = now
+            return True
+
+    def sync(self, shared):
+        with self._lock:
+            for table, version in shared.items():
+                if self._shared.get(table, 0) != version:
+                    self._versions[table] = self._versions.get(table, 0) + 1
+                self._shared[table] = version
+
+@st.cache_resource
+def get_table_versions():
+    return TableVersions()
+
+def bump_table_versions(*tables):
+    """Invalidates this process's cached reads of tables; call after the write commits"""
+    get_table_versions().bump(*tables)
+
+def record_table_writes(cursor, *tables):
+    """Bumps the shared table_versions rows inside the writer's transaction, before it commits
+
+    Other processes see the change on their next sync_table_versions(). Rows are bumped in name
+    order and last in the transaction, so concurrent writers cannot deadlock on them.
+    """
+    tables = sorted(set(tables))
+    if not tables:
+        return
+    select_sql = " UNION ALL ".join(["SELECT %s, 1"] * len(tables))
+    cursor.execute(get_storage_backend().accumulate_sql("table_versions", ["table_name", "version"],
+                                                        ["table_name"], select_sql), tables)
+
+def sync_table_versions():
+    """Applies writes committed by other processes (manage.py, other app servers) to the read caches
+
+    Runs at most once per CACHE_CONFIG["version_check_interval"] across all sessions.
+    """
+    versions = get_table_versions()
+    if not versions.claim_sync(CACHE_CONFIG["version_check_interval"]):
+        return
+    with db_connection() as conn:
+        if conn is None:
+            return
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT table_name, version FROM table_versions")
+            shared = dict(cursor.fetchall())
+        except DB_ERRORS:
+            # Not migrated yet; query_ttl still bounds staleness
+            return
+    versions.sync(shared)
+
+class QueryCache:
+    """Shared LRU cache of query results, bounded by entry count and total rows
+
+    Each entry remembers the versions of the tables it read; it is served only while those
+    versions are unchanged, so a committed write invalidates every result built on that table.
+    Entries older than ttl seconds are dropped as well, which bounds how long a write that never
+    bumped a version (manual SQL, a restored backup) can go unseen.
+    """
+
+    def __init__(self, max_entries=256, max_rows=200000, max_entry_rows=20000, ttl=None):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.max_entry_rows = max_entry_rows
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._rows = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "expired": 0, "evictions": 0, "uncacheable": 0}
+
+    def get(self, key, versions):
+        with self._lock:
+            entry = self._entries.get(key)
+            expired = entry is not None and self.ttl is not None and time.monotonic() - entry[2] > self.ttl
+            if entry is not None and entry[0] == versions and not expired:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key)
+                self._stats["expired" if expired else "stale"] += 1
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key, versions, rows):
+        with self._lock:
+            if len(rows) > self.max_entry_rows:
+                self._stats["uncacheable"] += 1
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (versions, rows, time.monotonic())
+            self._rows += len(rows)
+            while self._entries and (len(self._entries) > self.max_entries or self._rows > self.max_rows):
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def _remove(self, key):
+        _, rows, _ = self._entries.pop(key)
+        self._rows -= len(rows)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._rows = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return dict(self._stats, entries=len(self._entries), rows=self._rows,
+                        hit_rate=self._stats["hits"] / lookups if lookups else 0.0)
+
+@st.cache_resource
+def get_query_cache():
+    return QueryCache(CACHE_CONFIG["query_max_entries"], CACHE_CONFIG["query_max_rows"],
+                      CACHE_CONFIG["query_max_entry_rows"], CACHE_CONFIG["query_ttl"])
+
+def cached_query(sql, params=(), tables=(), dictionary=True):
+    """Rows for sql from the shared read cache, querying on a miss; None if the database is unavailable
+
+    tables lists every table the query reads. Rows are shared between sessions, so treat them as read-only.
+    """
+    key = (" ".join(sql.split()), tuple(params), dictionary)
+    # Snapshot before querying: a write that commits meanwhile leaves the entry already stale
+    versions = get_table_versions().snapshot(*tables)
+    cache = get_query_cache()
+    rows = cache.get(key, versions)
+    if rows is not None:
+        return rows
+
+    with db_connection() as conn:
+        if conn is None:
+            return None
+        cursor = conn.cursor(dictionary=dictionary)
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    cache.put(key, versions, rows)
+    return rows
+
+class AuditLogger:
+    """Write-behind activity_log writer: events are queued and flushed in multi-row inserts by a daemon thread"""
+
+    OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+    def __init__(self, queue_size=10000, batch_size=200, flush_interval=2.0, overflow_policy="drop_oldest"):
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow_policy}', expected one of {self.OVERFLOW_POLICIES}")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._retry = []
+        self._flush_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._stats = {"queued": 0, "written": 0, "dropped": 0, "flushes": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._run, name="audit-logger", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def log(self, user_id, action, details=""):
+        # Stamp the event now so the row records when it happened, not when it was flushed, on the
+        # engine's CURRENT_TIMESTAMP clock like every other timestamp column
+        event = (user_id, action, details, get_storage_backend().now().replace(microsecond=0))
+        if self._stopped.is_set():
+            self._write([event])
+            return
+
+        if self.overflow_policy == "block":
+            self._queue.put(event)
+        else:
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                self._count("dropped")
+                if self.overflow_policy == "drop_newest":
+                    return
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    self._queue.put_nowait(event)
+                except queue.Full:
+                    return
+        self._count("queued")
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _write(self, events):
+        rows = ", ".join(["(%s, %s, %s, %s)"] * len(events))
+        params = [value for event in events for value in event]
+        with db_connection() as conn:
+            if conn is None:
+                return False
+            try:
+                cursor = conn.cursor()
+                cursor.execute(f"INSERT INTO activity_log (user_id, action, details, timestamp) VALUES {rows}", params)
+                conn.commit()
+            except DB_ERRORS:
+                return False
+        self._count("written", len(events))
+        return True
+
+    def flush(self):
+        """Writes everything queued so far; failed batches are retried on the next flush"""
+        with self._flush_lock:
+            events, self._retry = self._retry, []
+            while True:
+                try:
+                    events.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not events:
+                return
+
+            self._count("flushes")
+            for start in range(0, len(events), self.batch_size):
+                batch = events[start:start + self.batch_size]
+                if not self._write(batch):
+                    self._count("errors")
+                    self._retry.extend(batch)
+            # Keep the retry buffer bounded by the same limit as the queue
+            overflow = len(self._retry) - self._queue.maxsize
+            if overflow > 0:
+                self._retry = self._retry[overflow:]
+                self._count("dropped", overflow)
+
+    def close(self):
+        """Stops the background thread after a final flush"""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["pending"] = self._queue.qsize() + len(self._retry)
+        return stats
+
+@st.cache_resource
+def get_audit_logger():
+    return AuditLogger(
+        queue_size=AUDIT_CONFIG["queue_size"],
+        batch_size=AUDIT_CONFIG["batch_size"],
+        flush_interval=AUDIT_CONFIG["flush_interval"],
+        overflow_policy=AUDIT_CONFIG["overflow_policy"]
+    )
+
+def log_activity(user_id, action, details=""):
+    get_audit_logger().log(user_id, action, details)
+
+def apply_custom_css_styles():
+    """Applies custom CSS with vibrant blue background and larger buttons"""
+    st.set_page_config(
+        page_title="Warehouse Management System", 
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    
+    st.markdown("""
+                <style>
+                    /* ----- Base Reset & Layout ----- */
+                    #MainMenu, header, footer, .stDeployButton, #stDecoration {
+                        visibility: hidden;
+                        display: none !important;
+                    }
+
+                    /* ----- Vibrant Blue Background ----- */
+                    .stApp {
+                        background: linear-gradient(135deg, #0f1b3d 0%, #1a3a8f 100%) !important;
+                        background-attachment: fixed;
+                        color: #ffffff;
+                        padding: 2rem 4rem;
+                        min-height: 100vh;
+                        transition: all 0.3s ease;
+                    }
+
+                    /* ----- Data Visualization Styling ----- */
+                    .stDataFrame, table {
+                        background-color: rgba(26, 32, 64, 0.7) !important;
+                        color: white !important;
+                        border-radius: 10px !important;
+                        border: 1px solid #4e54c8 !important;
+                    }
+
+                    .stDataFrame th {
+                        background-color: #4e54c8 !important;
+                        color: white !important;
+                        font-weight: bold !important;
+                    }
+
+                    .stDataFrame tr:nth-child(even) {
+                        background-color: rgba(78, 84, 200, 0.2) !important;
+                    }
+
+                    .stDataFrame tr:hover {
+                        background-color: rgba(142, 148, 251, 0.3) !important;
+                    }
+
+                    .stPlotlyChart {
+                        background-color: rgba(26, 32, 64, 0.7) !important;
+                        border-radius: 10px !important;
+                        border: 1px solid #4e54c8 !important;
+                        padding: 10px !important;
+                    }
+
+                    .stMetric {
+                        background-color: rgba(26, 32, 64, 0.7) !important;
+                        border-radius: 10px !important;
+                        border: 1px solid #4e54c8 !important;
+                        padding: 15px !important;
+                    }
+
+                    .stMetric label {
+                        color: #8f94fb !important;
+                        font-size: 1rem !important;
+                    }
+
+                    .stMetric div {
+                        color: white !important;
+                        font-size: 1.8rem !important;
+                        font-weight: bold !important;
+                    }
+
+                    /* ----- Tabs Styling: Fixed underline and spacing ----- */
+                    .stTabs [role="tablist"] {
+                        background-color: rgba(26, 32, 64, 0.7) !important;
+                        border-radius: 10px 10px 0 0 !important;
+                        padding: 0 1rem !important;
+                        display: flex !important;
+                        flex-wrap: wrap;
+                        gap: 0.5rem;
+                    }
+
+                    .stTabs [role="tab"] {
+                        color: #8f94fb !important;
+                        background-color: transparent !important;
+                        font-size: 1rem !important;
+                        padding: 0.75rem 1.5rem !important;
+                        font-weight: 500;
+                        white-space: nowrap;
                         border: none !important;
                         outline: none !important;
                         position: relative;
@@ -218,44 +1980,6 @@ def apply_custom_css_styles():
                         border: 1px solid #4e54c8 !important;
                     }
 
-                    /* ----- Loader Styling ----- */
-                    .loader-container {
-                        position: fixed;
-                        top: 50%;
-                        left: 50%;
-                        transform: translate(-50%, -50%);
-                        z-index: 9999;
-                        background: rgba(26, 26, 46, 0.9);
-                        width: 100vw;
-                        height: 100vh;
-                        display: flex;
-                        justify-content: center;
-                        align-items: center;
-                    }
-
-                    .loading svg polyline {
-                        fill: none;
-                        stroke-width: 3;
-                        stroke-linecap: round;
-                        stroke-linejoin: round;
-                    }
-
-                    .loading svg polyline#back {
-                        stroke: #8f94fb33;
-                    }
-
-                    .loading svg polyline#front {
-                        stroke: #4e54c8;
-                        stroke-dasharray: 48, 144;
-                        stroke-dashoffset: 192;
-                        animation: dash_682 1.4s linear infinite;
-                    }
-
-                    @keyframes dash_682 {
-                        72.5% { opacity: 0; }
-                        to { stroke-dashoffset: 0; }
-                    }
-
                     [data-testid="stSidebar"] {
                         z-index: 999 !important;
                     }
@@ -362,55 +2086,31 @@ def apply_custom_css_styles():
 
 
 
-def show_loader():
-    """Displays animated loader with proper positioning on the main content"""
-    st.markdown("""
-    <div class="loader-container">
-        <div class="loader-animation">
-            <svg width="64px" height="48px">
-                <polyline points="0.157 23.954, 14 23.954, 21.843 48, 43 0, 50 24, 64 24" 
-                          id="back" stroke="#8f94fb33" fill="none" 
-                          stroke-width="3" stroke-linecap="round" 
-                          stroke-linejoin="round"></polyline>
-                <polyline points="0.157 23.954, 14 23.954, 21.843 48, 43 0, 50 24, 64 24" 
-                          id="front" stroke="#4e54c8" fill="none"
-                          stroke-width="3" stroke-linecap="round"
-                          stroke-linejoin="round" stroke-dasharray="48, 144"
-                          stroke-dashoffset="192"></polyline>
-            </svg>
-        </div>
-    </div>
-    <style>
-        @keyframes dash_682 {
-            72.5% { opacity: 0; }
-            to { stroke-dashoffset: 0; }
-        }
-        #front {
-            animation: dash_682 1.4s linear infinite;
-        }
-    </style>
-    """, unsafe_allow_html=True)
-    st.empty()
-
-
 def navigate_to(page):
     if st.session_state.current_page != page:
         st.session_state.current_page = page
-        show_loader()
-        time.sleep(0.5)
         st.rerun()
 
+# Flash Messages
+# Confirmations queued before st.rerun() and shown as toasts on the next run, so writes
+# don't hold the script thread to keep a success message on screen.
+def flash(message, icon="✅"):
+    st.session_state.setdefault('flash_messages', []).append((message, icon))
+
+def show_flash_messages():
+    for message, icon in st.session_state.pop('flash_messages', []):
+        st.toast(message, icon=icon)
+
 # Authentication Functions
 def authenticate(username, password):
-    conn = get_db_connection()
-    if not conn:
-        return False
-        
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM users WHERE username=%s AND password=%s", 
-                  (username, hash_password(password)))
-    user = cursor.fetchone()
-    conn.close()
+    with db_connection() as conn:
+        if not conn:
+            return False
+            
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM users WHERE username=%s AND password=%s", 
+                      (username, hash_password(password)))
+        user = cursor.fetchone()
     
     if user:
         st.session_state.update({
@@ -425,123 +2125,1448 @@ def authenticate(username, password):
     return False
 
 def register_user(username, password, role='user'):
-    conn = get_db_connection()
-    if not conn:
-        return False
+    with db_connection() as conn:
+        if not conn:
+            return False
+            
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO users (username, password, role)
+                VALUES (%s, %s, %s)
+            """, (username, hash_password(password), role))
+            user_id = cursor.lastrowid
+            record_table_writes(cursor, "users")
+            conn.commit()
+        except DB_ERRORS as err:
+            st.error(f"Error: {err}")
+            return False
+
+    bump_table_versions("users")
+    log_activity(user_id, "Account created")
+    return True
+
+def update_password(user_id, password):
+    with db_connection() as conn:
+        if not conn:
+            return False
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE users SET password = %s WHERE id = %s", (hash_password(password), user_id))
+            record_table_writes(cursor, "users")
+            conn.commit()
+        except DB_ERRORS as err:
+            st.error(f"Error: {err}")
+            return False
+
+    bump_table_versions("users")
+    return True
+
+# Inventory and Supplier Functions
+# Each write borrows its own pooled connection for the one transaction; page renders hold none.
+def add_inventory_item(item_name, description, category, stock, min_stock, price, supplier, supplier_id):
+    with db_connection() as conn:
+        if not conn:
+            return False
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO inventory 
+                (item_name, description, category, stock, min_stock, price, supplier, supplier_id)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """, (item_name, description, category, stock, min_stock, price, supplier, supplier_id))
+            apply_category_summary(cursor, "id = %s", (cursor.lastrowid,))
+            record_table_writes(cursor, "inventory")
+            conn.commit()
+        except DB_ERRORS as err:
+            conn.rollback()
+            st.error(f"Error: {err}")
+            return False
+
+    bump_table_versions("inventory")
+    return True
+
+def add_supplier(name, contact, email, phone, lead_time, rating):
+    with db_connection() as conn:
+        if not conn:
+            return False
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO suppliers 
+                (name, contact_person, email, phone, lead_time_days, rating)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (name, contact, email, phone, lead_time, rating))
+            # Claim inventory rows that were waiting for this supplier
+            resolve_inventory_suppliers(cursor)
+            record_table_writes(cursor, "suppliers", "inventory")
+            conn.commit()
+        except DB_ERRORS as err:
+            conn.rollback()
+            st.error(f"Error: {err}")
+            return False
+
+    bump_table_versions("suppliers", "inventory")
+    return True
+
+# Order Functions
+ORDER_STATUSES = ["Pending", "Processing", "Shipped", "Delivered"]
+OPEN_ORDER_STATUSES = ORDER_STATUSES[:-1]
+NEXT_ORDER_STATUS = dict(zip(ORDER_STATUSES, ORDER_STATUSES[1:]))
+
+class OrderError(Exception):
+    """Raised when an order is rejected, e.g. for insufficient stock"""
+
+def place_order(lines, ordered_by):
+    """Reserves stock for every line and records the order in one transaction; returns the new order_id
+
+    lines is a list of (item_id, quantity) pairs; repeated items are merged into one line. If any
+    line is short of stock the whole order is rejected with OrderError.
+    """
+    quantities = {}
+    for item_id, quantity in lines:
+        if quantity < 1:
+            raise OrderError("Quantity must be at least 1")
+        quantities[item_id] = quantities.get(item_id, 0) + quantity
+    if not quantities:
+        raise OrderError("Add at least one item to the order")
+    item_ids = list(quantities)
+    id_list = ", ".join(["%s"] * len(item_ids))
+    by_item = " ".join(["WHEN %s THEN %s"] * len(item_ids))
+    by_item_params = [value for pair in quantities.items() for value in pair]
+
+    with db_connection() as conn:
+        if conn is None:
+            raise OrderError("Database unavailable")
+
+        cursor = conn.cursor()
+        try:
+            # Every stock check and decrement is one statement, so concurrent orders cannot oversell;
+            # it must reserve every line or nothing is kept
+            cursor.execute(f"""
+                UPDATE inventory SET stock = stock - CASE id {by_item} END
+                WHERE id IN ({id_list}) AND stock >= CASE id {by_item} END
+            """, by_item_params + item_ids + by_item_params)
+            if cursor.rowcount != len(item_ids):
+                conn.rollback()
+                cursor.execute(f"SELECT id, item_name, stock FROM inventory WHERE id IN ({id_list})", item_ids)
+                short = [f"{name} ({stock} left)" for item_id, name, stock in cursor.fetchall()
+                         if stock < quantities[item_id]]
+                raise OrderError(f"Insufficient stock for {', '.join(short)}" if short
+                                 else "Some items in this order no longer exist")
+            adjust_category_stock(cursor, {item_id: -quantity for item_id, quantity in quantities.items()})
+
+            cursor.execute(f"SELECT id, item_name FROM inventory WHERE id IN ({id_list})", item_ids)
+            names = dict(cursor.fetchall())
+            cursor.execute("""
+                INSERT INTO orders (item_id, item_name, quantity, ordered_by, status, status_changed_at, line_count)
+                VALUES (%s, %s, %s, %s, 'Pending', CURRENT_TIMESTAMP, %s)
+            """, (item_ids[0], names[item_ids[0]], sum(quantities.values()), ordered_by, len(item_ids)))
+            order_id = cursor.lastrowid
+            cursor.executemany("""
+                INSERT INTO order_items (order_id, line_no, item_id, item_name, quantity)
+                VALUES (%s, %s, %s, %s, %s)
+            """, [(order_id, line_no, item_id, names[item_id], quantity)
+                  for line_no, (item_id, quantity) in enumerate(quantities.items(), 1)])
+            apply_order_rollup(cursor, "order_id = %s", (order_id,))
+            record_order_placed(cursor, order_id)
+            record_table_writes(cursor, "orders", "inventory")
+            conn.commit()
+        except DB_ERRORS as err:
+            conn.rollback()
+            raise OrderError(f"Order failed: {err}")
+
+    bump_table_versions("orders", "inventory")
+    return order_id
+
+def advance_orders(expected, changed_by=None):
+    """Moves orders one step along ORDER_STATUSES in one transaction; returns ({(old, new): count}, skipped)
+
+    expected maps each order id to the status the user saw, and an order only moves from that
+    status: orders that have since changed (or been archived) are left alone and returned in
+    skipped, so two supervisors advancing the same order move it once. Each move is appended to
+    order_status_history in the same transaction. OrderError is raised, with nothing changed,
+    if a matching order changes status while the update runs.
+    """
+    if not expected:
+        raise OrderError("Select at least one order")
+    closed = sorted(order_id for order_id, status in expected.items() if status not in NEXT_ORDER_STATUS)
+    if closed:
+        raise OrderError(f"{len(closed)} selected orders are already delivered")
+    order_ids = sorted(expected)
+    id_list = ", ".join(["%s"] * len(order_ids))
+
+    with db_connection() as conn:
+        if conn is None:
+            raise OrderError("Database unavailable")
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT order_id, status FROM orders WHERE order_id IN ({id_list})", order_ids)
+            current = dict(cursor.fetchall())
+            groups = {}
+            for order_id in order_ids:
+                if current.get(order_id) == expected[order_id]:
+                    groups.setdefault(expected[order_id], []).append(order_id)
+            skipped = [order_id for order_id in order_ids if current.get(order_id) != expected[order_id]]
+            moving = sorted(order_id for ids in groups.values() for order_id in ids)
+            if not moving:
+                conn.rollback()
+                return {}, skipped
+            moving_list = ", ".join(["%s"] * len(moving))
+
+            # One timestamp for the whole batch, shared by the history rows and status_changed_at
+            cursor.execute("SELECT CURRENT_TIMESTAMP")
+            changed_at = cursor.fetchone()[0]
+            apply_order_rollup(cursor, f"order_id IN ({moving_list})", moving, sign=-1)
+            transitions = {}
+            for status in OPEN_ORDER_STATUSES:
+                if status not in groups:
+                    continue
+                ids = groups[status]
+                where_sql = f"status = %s AND order_id IN ({', '.join(['%s'] * len(ids))})"
+                record_status_transition(cursor, where_sql, [status] + ids, NEXT_ORDER_STATUS[status],
+                                         changed_at, changed_by)
+                # Conditional on the expected status: a concurrent move makes the count come up short
+                cursor.execute(f"UPDATE orders SET status = %s, status_changed_at = %s WHERE {where_sql}",
+                               [NEXT_ORDER_STATUS[status], changed_at, status] + ids)
+                if cursor.rowcount != len(ids):
+                    raise OrderError("Some selected orders changed while updating; reload and try again")
+                transitions[(status, NEXT_ORDER_STATUS[status])] = len(ids)
+            apply_order_rollup(cursor, f"order_id IN ({moving_list})", moving)
+            record_table_writes(cursor, "orders")
+            conn.commit()
+        except OrderError:
+            conn.rollback()
+            raise
+        except DB_ERRORS as err:
+            conn.rollback()
+            raise OrderError(f"Status update failed: {err}")
+
+    bump_table_versions("orders")
+    return transitions, skipped
+
+# Page Components
+def show_login():
+    st.title("🔐 Login to Warehouse Management System")
+    with st.form("login_form"):
+        username = st.text_input("Username")
+        password = st.text_input("Password", type="password")
         
-    try:
+        if st.form_submit_button("Login"):
+            if authenticate(username, password):
+                flash(f"Welcome {username}!", icon="👋")
+                st.rerun()
+            else:
+                st.error("Invalid credentials")
+
+    if st.button("Create New Account"):
+        navigate_to("Signup")
+
+def show_signup():
+    st.title("🚀 Sign Up for Warehouse Management")
+    with st.form("signup_form"):
+        new_username = st.text_input("Username")
+        new_password = st.text_input("Password", type="password")
+        confirm_password = st.text_input("Confirm Password", type="password")
+        role = st.selectbox("Role", ["user"], disabled=True)
+        
+        if st.form_submit_button("Register"):
+            if new_password != confirm_password:
+                st.error("Passwords don't match!")
+            elif len(new_password) < 8:
+                st.error("Password must be at least 8 characters")
+            else:
+                if register_user(new_username, new_password, role):
+                    flash("Account created successfully!")
+                    navigate_to("Login")
+
+    if st.button("Back to Login"):
+        navigate_to("Login")
+
+def show_sidebar():
+    with st.sidebar:
+        st.image("https://via.placeholder.com/150x50?text=WIMS", width=150)
+        st.title(f"Welcome, {st.session_state.user}")
+        
+        st.session_state.current_page_options = ["Dashboard", "Inventory", "Orders", "Suppliers", "Reports", "Settings"]
+        if st.session_state.user_role == 'admin':
+            st.session_state.current_page_options.append("User Management")
+        
+        st.session_state.current_page_selection = st.selectbox("Navigation", st.session_state.current_page_options, key='st.session_state.current_page_selection')
+        
+        if st.session_state.current_page_selection != st.session_state.current_page:
+            navigate_to(st.session_state.current_page_selection)
+        
+        st.markdown("---")
+        if st.button("Logout"):
+            log_activity(st.session_state.user_id, "Logout")
+            st.session_state.update({
+                'authenticated': False,
+                'user': None,
+                'user_id': None,
+                'user_role': None,
+                'current_page': 'Login'
+            })
+            navigate_to("Login")
+        
+        st.markdown("---")
+        st.caption(f"Role: {st.session_state.user_role}")
+        st.caption(f"v{APP_VERSION} | {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+
+def select_panel(key, panels):
+    """Explicit panel picker used instead of st.tabs: only the chosen panel's body (and its queries) runs"""
+    panel = st.radio("Section", panels, horizontal=True, key=key, label_visibility="collapsed")
+    set_query_panel(panel)
+    return panel
+
+# Dashboard Metrics
+DASHBOARD_TABLES = ("inventory", "orders")
+
+@st.cache_data(ttl=CACHE_CONFIG["dashboard_ttl"], show_spinner=False)
+def load_dashboard_metrics(versions):
+    """Dashboard KPIs and tables in four round trips; versions is the DASHBOARD_TABLES snapshot used as cache key"""
+    with db_connection() as conn:
+        if conn is None:
+            return None
+
         cursor = conn.cursor()
+        # Category breakdown doubles as the source of the item and stock totals
         cursor.execute("""
-            INSERT INTO users (username, password, role)
-            VALUES (%s, %s, %s)
-        """, (username, hash_password(password), role))
-        user_id = cursor.lastrowid
-        conn.commit()
-        log_activity(user_id, "Account created")
-        return True
-    except mysql.connector.Error as err:
-        st.error(f"Error: {err}")
-        return False
-    finally:
-        conn.close()
+            SELECT NULLIF(category, ''), item_count, total_stock FROM category_summary
+            WHERE item_count > 0
+        """)
+        categories = pd.DataFrame(cursor.fetchall(), columns=["Category", "Items", "Total"])
+
+        cursor.execute("""
+            SELECT (SELECT COUNT(*) FROM orders WHERE status = 'Pending'),
+                (SELECT COUNT(DISTINCT supplier_id) FROM inventory)
+        """)
+        pending_orders, suppliers = cursor.fetchone()
+
+        cursor.execute("""
+            SELECT o.item_name, o.quantity, o.order_date, o.status 
+            FROM orders o
+            ORDER BY o.order_date DESC LIMIT 10
+        """)
+        recent_orders = pd.DataFrame(cursor.fetchall(), columns=["Item", "Quantity", "Date", "Status"])
+
+        cursor.execute("SELECT item_name, stock, min_stock FROM inventory WHERE stock < min_stock")
+        low_stock = pd.DataFrame(cursor.fetchall(), columns=["Item", "Current Stock", "Min Stock"])
+
+    profile_phase("dataframe")
+    categories["Total"] = categories["Total"].astype(float)
+    return {
+        "total_items": int(categories["Items"].sum()),
+        "pending_orders": int(pending_orders),
+        "suppliers": int(suppliers),
+        "total_stock": float(categories["Total"].sum()),
+        "stock_by_category": categories[["Category", "Total"]],
+        "recent_orders": recent_orders,
+        "low_stock": low_stock
+    }
+
+def get_dashboard_metrics():
+    metrics = load_dashboard_metrics(get_table_versions().snapshot(*DASHBOARD_TABLES))
+    if metrics is None:
+        # Never keep serving a cached connection failure
+        load_dashboard_metrics.clear()
+    return metrics
+
+# Page Data
+# Queries behind the Orders and Reports pages, shared with their export buttons and benchmarks/bench_pages.py
+# One row per order: item_name is the first line's item and quantity the units across all lines
+ORDER_HISTORY_SQL = """
+    SELECT o.order_id, o.item_name, o.line_count, o.quantity, o.status, o.order_date, o.ordered_by
+    FROM orders o
+    ORDER BY o.order_date DESC
+"""
+
+# One newest-first keyset page of {table}; {after} is empty or a (order_date, order_id) predicate
+ORDER_HISTORY_PAGE_SQL = """
+    SELECT order_id, item_name, line_count, quantity, status, order_date, ordered_by
+    FROM {table} {after}
+    ORDER BY order_date DESC, order_id DESC
+    LIMIT %s
+"""
+
+# The same with orders_archive, for views asked to include archived orders
+ORDER_HISTORY_ARCHIVED_SQL = """
+    SELECT o.order_id, o.item_name, o.line_count, o.quantity, o.status, o.order_date, o.ordered_by
+    FROM orders o
+    UNION ALL
+    SELECT a.order_id, a.item_name, a.line_count, a.quantity, a.status, a.order_date, a.ordered_by
+    FROM orders_archive a
+    ORDER BY order_date DESC
+"""
+
+ORDER_LINES_SQL = """
+    SELECT line_no, item_id, item_name, quantity
+    FROM order_items
+    WHERE order_id = %s
+    ORDER BY line_no
+"""
+
+ORDER_LINES_ARCHIVED_SQL = """
+    SELECT line_no, item_id, item_name, quantity FROM order_items WHERE order_id = %s
+    UNION ALL
+    SELECT line_no, item_id, item_name, quantity FROM order_items_archive WHERE order_id = %s
+    ORDER BY line_no
+"""
+
+INVENTORY_SUMMARY_SQL = """
+    SELECT NULLIF(category, '') as category, item_count, total_stock,
+        CASE WHEN price_count > 0 THEN 1.0 * price_sum / price_count END as avg_price
+    FROM category_summary
+    WHERE item_count > 0
+    ORDER BY total_stock DESC
+"""
+
+# Reads the daily rollup, so the cost scales with days in range, not order volume
+ORDER_REPORT_SQL = """
+    SELECT day,
+        SUM(order_count) as order_count,
+        SUM(total_quantity) as total_items
+    FROM order_daily_rollup
+    WHERE day BETWEEN %s AND %s
+    GROUP BY day
+    ORDER BY day
+"""
+
+# The rollup covers hot orders only; archived days are aggregated from orders_archive on request
+ORDER_REPORT_ARCHIVED_SQL = """
+    SELECT day,
+        SUM(order_count) as order_count,
+        SUM(total_items) as total_items
+    FROM (
+        SELECT day, order_count, total_quantity as total_items
+        FROM order_daily_rollup
+        WHERE day BETWEEN %s AND %s
+        UNION ALL
+        SELECT DATE(order_date), COUNT(*), SUM(quantity)
+        FROM orders_archive
+        WHERE order_date >= %s AND order_date < %s
+        GROUP BY DATE(order_date)
+    ) days
+    GROUP BY day
+    ORDER BY day
+"""
+
+SUPPLIER_PERFORMANCE_SQL = """
+    SELECT s.name,
+        COUNT(i.id) as item_count,
+        AVG(s.lead_time_days) as avg_lead_time,
+        s.rating
+    FROM suppliers s
+    LEFT JOIN inventory i ON i.supplier_id = s.id
+    GROUP BY s.id, s.name, s.rating
+    ORDER BY s.rating DESC
+"""
+
+# Cycle-time queries range-scan idx_status_history_changed; the backlog reads idx_orders_status_age
+STAGE_DURATIONS_SQL = """
+    SELECT from_status as stage, entered_at, changed_at
+    FROM order_status_history
+    WHERE changed_at >= %s AND changed_at < %s AND entered_at IS NOT NULL
+"""
+
+ORDER_CYCLE_SQL = """
+    SELECT placed.changed_at as entered_at, delivered.changed_at
+    FROM order_status_history delivered
+    JOIN order_status_history placed
+        ON placed.order_id = delivered.order_id AND placed.to_status = 'Pending' AND placed.from_status IS NULL
+    WHERE delivered.changed_at >= %s AND delivered.changed_at < %s AND delivered.to_status = 'Delivered'
+"""
+
+STATUS_THROUGHPUT_SQL = f"""
+    SELECT DATE(changed_at) as day, to_status as status, COUNT(*) as order_count
+    FROM order_status_history
+    WHERE changed_at >= %s AND changed_at < %s AND {HISTORY_TIMED_ROWS}
+    GROUP BY DATE(changed_at), to_status
+    ORDER BY day
+"""
+
+# Open orders by how long they have been in their current status: (label, upper bound in hours)
+BACKLOG_AGE_BANDS = [("< 1 day", 24), ("1-3 days", 72), ("3-7 days", 168), ("7+ days", None)]
+BACKLOG_UNTIMED_BAND = "Unknown"     # backfilled orders that have not changed status since
+CYCLE_TOTAL_STAGE = "Placed → Delivered"
+
+def order_history_query(include_archived=False):
+    return ORDER_HISTORY_ARCHIVED_SQL if include_archived else ORDER_HISTORY_SQL
+
+def fetch_order_history(include_archived=False, after=None, page_size=50):
+    """One newest-first keyset page of orders; returns (DataFrame, cursor for the next page or None)
+
+    after is the cursor returned with the previous page, an (order_date, order_id) pair. With
+    include_archived each table contributes at most one page, read off its (order_date, order_id)
+    index, and the two are merged.
+    """
+    where = "" if after is None else "WHERE (order_date, order_id) < (%s, %s)"
+    page_params = ([] if after is None else list(after)) + [page_size + 1]
+    if include_archived:
+        sql = (f"SELECT * FROM ({ORDER_HISTORY_PAGE_SQL.format(table='orders', after=where)}) hot "
+               f"UNION ALL SELECT * FROM ({ORDER_HISTORY_PAGE_SQL.format(table='orders_archive', after=where)}) cold "
+               "ORDER BY order_date DESC, order_id DESC LIMIT %s")
+        rows = cached_query(sql, page_params * 2 + [page_size + 1], ("orders", "orders_archive"))
+    else:
+        rows = cached_query(ORDER_HISTORY_PAGE_SQL.format(table="orders", after=where), page_params, ("orders",))
+    rows = rows or []
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = (rows[-1]["order_date"], rows[-1]["order_id"])
+    return pd.DataFrame(rows), next_cursor
+
+def load_order_lines(order_id, include_archived=False):
+    if include_archived:
+        rows = cached_query(ORDER_LINES_ARCHIVED_SQL, (order_id, order_id), ("orders", "orders_archive"))
+    else:
+        rows = cached_query(ORDER_LINES_SQL, (order_id,), ("orders",))
+    return pd.DataFrame(rows or [], columns=["line_no", "item_id", "item_name", "quantity"])
+
+def history_hours(rows):
+    frame = pd.DataFrame(rows, columns=["entered_at", "changed_at"])
+    return (pd.to_datetime(frame["changed_at"]) - pd.to_datetime(frame["entered_at"])).dt.total_seconds() / 3600
+
+def load_stage_durations(start_date, end_date):
+    """Hours spent per completed stage, plus placed-to-delivered, for changes between the two dates"""
+    params = (start_date, end_date + timedelta(days=1))
+    stages = pd.DataFrame(cached_query(STAGE_DURATIONS_SQL, params, ("orders",)) or [],
+                          columns=["stage", "entered_at", "changed_at"])
+    cycles = cached_query(ORDER_CYCLE_SQL, params, ("orders",)) or []
+    return pd.concat([
+        pd.DataFrame({"stage": stages["stage"], "hours": history_hours(stages[["entered_at", "changed_at"]])}),
+        pd.DataFrame({"stage": CYCLE_TOTAL_STAGE, "hours": history_hours(cycles)})
+    ], ignore_index=True)
+
+def stage_percentiles(durations):
+    """Count, mean and p50/p90/p95 hours per stage, in ORDER_STATUSES order"""
+    columns = ["stage", "orders", "mean_hours", "p50_hours", "p90_hours", "p95_hours"]
+    if durations.empty:
+        return pd.DataFrame(columns=columns)
+    grouped = durations.groupby("stage")["hours"]
+    summary = grouped.agg(orders="count", mean_hours="mean")
+    quantiles = grouped.quantile([0.5, 0.9, 0.95]).unstack()
+    summary[["p50_hours", "p90_hours", "p95_hours"]] = quantiles.to_numpy()
+    order = [stage for stage in OPEN_ORDER_STATUSES + [CYCLE_TOTAL_STAGE] if stage in summary.index]
+    return summary.loc[order].reset_index()[columns]
+
+def load_status_throughput(start_date, end_date):
+    return pd.DataFrame(cached_query(STATUS_THROUGHPUT_SQL, (start_date, end_date + timedelta(days=1)), ("orders",))
+                        or [], columns=["day", "status", "order_count"])
+
+def load_backlog_ageing():
+    """Open orders per status, split into BACKLOG_AGE_BANDS by time since their last status change
+
+    Orders with no recorded status change time are counted under BACKLOG_UNTIMED_BAND.
+    """
+    with db_connection() as conn:
+        if conn is None:
+            return pd.DataFrame()
+        cursor = conn.cursor()
+        cursor.execute("SELECT CURRENT_TIMESTAMP")
+        current = pd.Timestamp(cursor.fetchone()[0])
+    now = current.floor("min")
+
+    # Whole-minute boundaries keep the cache key stable between reruns
+    bounds = [(now - timedelta(hours=hours)).strftime("%Y-%m-%d %H:%M:%S")
+              for _, hours in BACKLOG_AGE_BANDS if hours is not None]
+    younger = ", ".join(f"SUM(CASE WHEN status_changed_at >= %s THEN 1 ELSE 0 END) as younger_{n}"
+                        for n in range(len(bounds)))
+    statuses = ", ".join(["%s"] * len(OPEN_ORDER_STATUSES))
+    frame = pd.DataFrame(cached_query(f"""
+        SELECT status, COUNT(*) as open_orders, {younger}, COUNT(status_changed_at) as timed,
+            MIN(status_changed_at) as oldest
+        FROM orders WHERE status IN ({statuses})
+        GROUP BY status
+    """, bounds + OPEN_ORDER_STATUSES, ("orders",)) or [])
+    labels = [label for label, _ in BACKLOG_AGE_BANDS]
+    if frame.empty:
+        return pd.DataFrame(columns=["status", "open_orders"] + labels + [BACKLOG_UNTIMED_BAND, "oldest_hours"])
+
+    # Cumulative "younger than" counts become per-band counts
+    cumulative = frame[[f"younger_{n}" for n in range(len(bounds))] + ["timed"]].astype(int)
+    bands = cumulative.diff(axis=1)
+    bands.iloc[:, 0] = cumulative.iloc[:, 0]
+    bands.columns = labels
+    bands[BACKLOG_UNTIMED_BAND] = frame["open_orders"].astype(int) - cumulative["timed"]
+    frame["oldest_hours"] = (current - pd.to_datetime(frame["oldest"])).dt.total_seconds() / 3600
+    frame["status"] = pd.Categorical(frame["status"], OPEN_ORDER_STATUSES, ordered=True)
+    return (pd.concat([frame[["status", "open_orders"]], bands.astype(int), frame[["oldest_hours"]]], axis=1)
+            .sort_values("status").reset_index(drop=True))
+
+def load_inventory_summary():
+    return pd.DataFrame(cached_query(INVENTORY_SUMMARY_SQL, tables=("inventory",)) or [])
+
+def order_report_query(start_date, end_date, include_archived=False):
+    """(sql, params) behind the Order History report"""
+    if include_archived:
+        return ORDER_REPORT_ARCHIVED_SQL, (start_date, end_date, start_date, end_date + timedelta(days=1))
+    return ORDER_REPORT_SQL, (start_date, end_date)
+
+def load_order_report(start_date, end_date, include_archived=False):
+    sql, params = order_report_query(start_date, end_date, include_archived)
+    report = pd.DataFrame(cached_query(sql, params, ("orders", "orders_archive")) or [],
+                          columns=["day", "order_count", "total_items"])
+    # SQLite returns the unioned days as text
+    report["day"] = pd.to_datetime(report["day"]).dt.date
+    report[["order_count", "total_items"]] = report[["order_count", "total_items"]].astype(int)
+    return report
+
+def load_supplier_performance():
+    return pd.DataFrame(cached_query(SUPPLIER_PERFORMANCE_SQL, tables=("suppliers", "inventory")) or [],
+                        columns=["name", "item_count", "avg_lead_time", "rating"])
+
+# Streaming Export
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet")
+}
+
+def stream_query(sql, params=(), chunk_size=None):
+    """Yields (columns, rows) chunks from an unbuffered cursor so the result set is never held at once
+
+    An empty result still yields (columns, []) once, so writers can emit a header or schema.
+    """
+    chunk_size = chunk_size or EXPORT_CONFIG["chunk_size"]
+    with db_connection() as conn:
+        if conn is None:
+            return
+
+        cursor = conn.cursor(buffered=False)
+        cursor.execute(sql, params)
+        columns = [col[0] for col in cursor.description]
+        empty = True
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            empty = False
+            yield columns, rows
+        if empty:
+            yield columns, []
+
+def write_csv_export(chunks, target):
+    text = io.TextIOWrapper(target, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    count = 0
+    header = None
+    for columns, rows in chunks:
+        if header is None:
+            header = columns
+            writer.writerow(columns)
+        writer.writerows(rows)
+        count += len(rows)
+    text.flush()
+    text.detach()
+    return count
+
+def write_gzip_csv_export(chunks, target):
+    with gzip.GzipFile(fileobj=target, mode="wb") as compressed:
+        return write_csv_export(chunks, compressed)
+
+def write_parquet_export(chunks, target):
+    if pq is None:
+        raise RuntimeError("Parquet export requires pyarrow")
+
+    writer = schema = None
+    count = 0
+    for columns, rows in chunks:
+        data = {col: [row[i] for row in rows] for i, col in enumerate(columns)}
+        if schema is None:
+            # Fix the schema on the first chunk: widen decimals and type all-NULL (or empty) columns as text
+            fields = []
+            for field in pa.table(data).schema:
+                if pa.types.is_null(field.type):
+                    field = field.with_type(pa.string())
+                elif pa.types.is_decimal(field.type):
+                    field = field.with_type(pa.decimal128(38, field.type.scale))
+                fields.append(field)
+            schema = pa.schema(fields)
+            writer = pq.ParquetWriter(target, schema)
+        for field in schema:
+            if pa.types.is_string(field.type):
+                data[field.name] = [None if value is None else str(value) for value in data[field.name]]
+        writer.write_table(pa.table(data, schema=schema))
+        count += len(rows)
+    if writer is not None:
+        writer.close()
+    return count
+
+EXPORT_WRITERS = {
+    "CSV": write_csv_export,
+    "CSV (gzip)": write_gzip_csv_export,
+    "Parquet": write_parquet_export
+}
+
+def write_export(sql, params, export_format, target, chunk_size=None):
+    """Streams a query into the binary file object target; returns the number of rows written"""
+    return EXPORT_WRITERS[export_format](stream_query(sql, params, chunk_size), target)
+
+def available_export_formats():
+    return [name for name in EXPORT_FORMATS if name != "Parquet" or pq is not None]
+
+def show_export_controls(key, sql, params=(), file_name="export"):
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        export_format = st.selectbox("Export format", available_export_formats(), key=f"{key}_format")
+    with col2:
+        prepare = st.button("Prepare export", key=f"{key}_prepare")
+
+    # The query only runs when an export is requested, never on ordinary reruns
+    if prepare:
+        extension, mime = EXPORT_FORMATS[export_format]
+        # Rows are streamed to a temporary file; only the finished (possibly compressed)
+        # payload is read back, because Streamlit serves downloads from memory
+        with tempfile.TemporaryFile() as output:
+            rows = write_export(sql, params, export_format, output)
+            output.seek(0)
+            payload = output.read()
+        st.download_button(
+            f"Download {rows:,} rows as {export_format}",
+            payload,
+            f"{file_name}.{extension}",
+            mime,
+            key=f"{key}_download"
+        )
+
+# Item Search
+# In-memory index over inventory item_name, category and description. Terms of three or more
+# characters match anywhere in a word through trigrams; shorter terms match word prefixes. New
+# items are picked up by id on the next search; bulk imports can rewrite existing text, so they
+# bump "inventory_text" and force a rebuild.
+SEARCH_WORD = re.compile(r"[a-z0-9]+")
+ITEM_SEARCH_SQL = "SELECT id, item_name, category, description FROM inventory"
+
+def search_words(text):
+    return SEARCH_WORD.findall((text or "").lower())
+
+def trigrams(word):
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+class ItemSearchIndex:
+    """Trigram and word-prefix index over inventory text; results are ranked name matches first"""
+
+    def __init__(self):
+        self.lock = threading.Lock()    # serialises rebuild/extend; search() never takes it
+        self.synced = None          # (inventory, inventory_text) versions the index reflects
+        self.max_id = 0
+        # (items, trigrams, words), replaced as a whole by rebuild/extend and never changed once
+        # published, so search() reads one consistent snapshot while a writer builds the next:
+        #   items: id -> (lowered item_name, "name category description" text)
+        #   trigrams: trigram -> set of ids
+        #   words: sorted (word, id) pairs for prefix lookups
+        self._snapshot = ({}, {}, [])
+        self._stats = {"rebuilds": 0, "incremental_items": 0, "searches": 0}
+
+    @staticmethod
+    def _index(items, postings, item_id, item_name, category, description, copied=None):
+        """Adds one item to items and postings; with copied, shared posting sets are copied before changing"""
+        name = (item_name or "").lower()
+        text = f"{name} {(category or '').lower()} {(description or '').lower()}"
+        items[item_id] = (name, text)
+        words = set(search_words(text))
+        for word in words:
+            for gram in trigrams(word):
+                if copied is not None and gram not in copied:
+                    postings[gram] = set(postings.get(gram, ()))
+                    copied.add(gram)
+                postings.setdefault(gram, set()).add(item_id)
+        return words
+
+    def rebuild(self, rows):
+        items, postings, words, max_id = {}, {}, [], 0
+        for row in rows:
+            words.extend((word, row[0]) for word in self._index(items, postings, *row))
+            max_id = max(max_id, row[0])
+        words.sort()
+        self._snapshot = (items, postings, words)
+        self.max_id = max_id
+        self._stats["rebuilds"] += 1
+
+    def extend(self, rows):
+        items, postings, words = self._snapshot
+        items, postings, copied, added = dict(items), dict(postings), set(), []
+        for row in rows:
+            added.extend((word, row[0]) for word in self._index(items, postings, *row, copied=copied))
+            self.max_id = max(self.max_id, row[0])
+        self._snapshot = (items, postings, list(heapq.merge(words, sorted(added))))
+        self._stats["incremental_items"] += len(rows)
+
+    @staticmethod
+    def _prefix_matches(words, term):
+        matches = set()
+        position = bisect.bisect_left(words, (term,))
+        while position < len(words) and words[position][0].startswith(term):
+            matches.add(words[position][1])
+            position += 1
+        return matches
+
+    @classmethod
+    def _term_matches(cls, snapshot, term):
+        items, postings, words = snapshot
+        if len(term) < 3:
+            return cls._prefix_matches(words, term)
+        candidates = sorted((postings.get(gram, set()) for gram in trigrams(term)), key=len)
+        return {item_id for item_id in set.intersection(*candidates) if term in items[item_id][1]}
+
+    def search(self, query, limit):
+        """Ids of the best limit items matching every word of query"""
+        terms = search_words(query)
+        if not terms:
+            return []
+        self._stats["searches"] += 1
+        snapshot = self._snapshot
+        items = snapshot[0]
+        matches = None
+        for term in sorted(terms, key=len, reverse=True):
+            found = self._term_matches(snapshot, term)
+            matches = found if matches is None else matches & found
+            if not matches:
+                return []
+
+        phrase = " ".join(terms)
+
+        def rank(item_id):
+            name = items[item_id][0]
+            name_words = search_words(name)
+            if name == phrase:
+                score = 0
+            elif name.startswith(phrase):
+                score = 1
+            elif all(any(word.startswith(term) for word in name_words) for term in terms):
+                score = 2
+            elif all(term in name for term in terms):
+                score = 3
+            else:
+                score = 4
+            return score, name, item_id
+
+        return [key[2] for key in heapq.nsmallest(limit, map(rank, matches))]
+
+    def reset(self):
+        self.synced = None
+
+    def stats(self):
+        items, postings, _ = self._snapshot
+        return dict(self._stats, items=len(items), trigrams=len(postings))
+
+@st.cache_resource
+def get_item_search_index():
+    return ItemSearchIndex()
+
+def refresh_item_search_index():
+    """Brings the shared index up to date with committed inventory writes and returns it"""
+    index = get_item_search_index()
+    versions = get_table_versions().snapshot("inventory", "inventory_text")
+    if index.synced == versions:
+        return index
+    with index.lock:
+        if index.synced == versions:
+            return index
+        with db_connection() as conn:
+            if conn is None:
+                return index
+            cursor = conn.cursor()
+            if index.synced is None or index.synced[1] != versions[1]:
+                cursor.execute(f"{ITEM_SEARCH_SQL} ORDER BY id")
+                index.rebuild(cursor.fetchall())
+            else:
+                cursor.execute(f"{ITEM_SEARCH_SQL} WHERE id > %s ORDER BY id", (index.max_id,))
+                index.extend(cursor.fetchall())
+        index.synced = versions
+    return index
+
+def search_items(query, limit=None, in_stock_only=False):
+    """Best matches for query with live stock, as dicts (id, item_name, category, stock)
+
+    An empty query lists the first items by name.
+    """
+    limit = limit or SEARCH_CONFIG["max_results"]
+    if not search_words(query):
+        return cached_query(f"""
+            SELECT id, item_name, category, stock FROM inventory
+            {"WHERE stock > 0" if in_stock_only else ""}
+            ORDER BY item_name, id LIMIT %s
+        """, (limit,), ("inventory",)) or []
+
+    candidates = limit * SEARCH_CONFIG["candidate_factor"] if in_stock_only else limit
+    ids = refresh_item_search_index().search(query, candidates)
+    if not ids:
+        return []
+    rows = cached_query(f"""
+        SELECT id, item_name, category, stock FROM inventory
+        WHERE id IN ({', '.join(['%s'] * len(ids))}){" AND stock > 0" if in_stock_only else ""}
+    """, ids, ("inventory",)) or []
+    position = {item_id: n for n, item_id in enumerate(ids)}
+    return sorted(rows, key=lambda row: position[row["id"]])[:limit]
+
+# Inventory Grid
+INVENTORY_COLUMNS = ["id", "item_name", "description", "category", "stock", "min_stock", "price", "supplier", "last_updated"]
+INVENTORY_DEFAULT_COLUMNS = ["id", "item_name", "category", "stock", "min_stock", "price", "supplier"]
+
+# Sortable columns, each backed by a (column, id) index; id is always the tie-breaker
+INVENTORY_SORT_KEYS = ["item_name", "stock", "supplier", "price", "category", "last_updated", "id"]
+# Sort keys that may be NULL; both engines sort NULLs first ascending and last descending
+INVENTORY_NULLABLE_SORT_KEYS = {"price", "category", "last_updated"}
+
+def inventory_keyset_sql(sort_by, descending, after):
+    """Predicate selecting the rows after the (sort value, id) cursor in (sort_by, id) order.
+
+    Non-NULL cursors use a row-value comparison, which both engines turn into a range scan of the
+    (sort_by, id) index. Crossing into or out of the NULL block adds an OR branch; that plan still
+    walks the same index in order and stops at the LIMIT, without a sort.
+    """
+    op = "<" if descending else ">"
+    value, row_id = after
+    if sort_by == "id":
+        return f"id {op} %s", [row_id]
+    if value is None:
+        nulls = f"{sort_by} IS NULL AND id {op} %s"
+        return (f"({nulls})", [row_id]) if descending else (f"({nulls} OR {sort_by} IS NOT NULL)", [row_id])
+    after_cursor = f"({sort_by}, id) {op} (%s, %s)"
+    if descending and sort_by in INVENTORY_NULLABLE_SORT_KEYS:
+        return f"({after_cursor} OR {sort_by} IS NULL)", [value, row_id]
+    return after_cursor, [value, row_id]
+
+def inventory_filter_sql(category=None, supplier=None, low_stock_only=False, item_ids=None):
+    clauses, params = [], []
+    if item_ids is not None:
+        # Search results; an empty list must match nothing rather than everything
+        clauses.append(f"id IN ({', '.join(['%s'] * len(item_ids))})" if item_ids else "1 = 0")
+        params.extend(item_ids)
+    if category:
+        clauses.append("category = %s")
+        params.append(category)
+    if supplier:
+        clauses.append("supplier = %s")
+        params.append(supplier)
+    if low_stock_only:
+        clauses.append("stock < min_stock")
+    return clauses, params
+
+@profiled
+def fetch_inventory_page(columns, sort_by="item_name", descending=False, category=None, supplier=None,
+                         low_stock_only=False, item_ids=None, after=None, page_size=50):
+    """One keyset page of inventory; returns (DataFrame, cursor for the next page or None)
+
+    after is the cursor returned with the previous page, a (sort value, id) pair.
+    """
+    columns = [col for col in columns if col in INVENTORY_COLUMNS] or ["item_name"]
+    if sort_by not in INVENTORY_SORT_KEYS:
+        raise ValueError(f"Unknown sort key '{sort_by}', expected one of {INVENTORY_SORT_KEYS}")
+    clauses, params = inventory_filter_sql(category, supplier, low_stock_only, item_ids)
+    if after is not None:
+        clause, keyset_params = inventory_keyset_sql(sort_by, descending, after)
+        clauses.append(clause)
+        params += keyset_params
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    direction = "DESC" if descending else "ASC"
+    order_by = f"id {direction}" if sort_by == "id" else f"{sort_by} {direction}, id {direction}"
+
+    rows = cached_query(f"""
+        SELECT {', '.join(columns)}, id AS _row_id, {sort_by} AS _sort_key
+        FROM inventory {where}
+        ORDER BY {order_by}
+        LIMIT %s
+    """, params + [page_size + 1], ("inventory",))
+    if rows is None:
+        return pd.DataFrame(columns=columns), None
+
+    profile_phase("dataframe")
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = (rows[-1]["_sort_key"], rows[-1]["_row_id"])
+    page = pd.DataFrame(rows, columns=columns + ["_row_id", "_sort_key"])
+    return page[columns], next_cursor
+
+def fetch_inventory_filter_options():
+    categories = cached_query("SELECT DISTINCT category FROM inventory WHERE category IS NOT NULL ORDER BY category",
+                              tables=("inventory",), dictionary=False) or []
+    suppliers = cached_query("SELECT DISTINCT supplier FROM inventory ORDER BY supplier",
+                             tables=("inventory",), dictionary=False) or []
+    return [row[0] for row in categories if row[0]], [row[0] for row in suppliers]
+
+def inventory_export_sql(columns, category=None, supplier=None, low_stock_only=False, item_ids=None):
+    columns = [col for col in columns if col in INVENTORY_COLUMNS] or ["item_name"]
+    clauses, params = inventory_filter_sql(category, supplier, low_stock_only, item_ids)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"SELECT {', '.join(columns)} FROM inventory {where} ORDER BY id", params
+
+@profiled
+def show_inventory_grid():
+    profile_phase("sql")
+    categories, suppliers = fetch_inventory_filter_options()
+
+    profile_phase("render")
+    search = st.text_input("Search", key="inventory_grid_search", placeholder="Name, category or description")
+    columns = st.multiselect("Columns", INVENTORY_COLUMNS, default=INVENTORY_DEFAULT_COLUMNS, key="inventory_grid_columns")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        category = st.selectbox("Category", ["All"] + categories, key="inventory_grid_category")
+    with col2:
+        supplier = st.selectbox("Supplier", ["All"] + suppliers, key="inventory_grid_supplier")
+    with col3:
+        sort_by = st.selectbox("Sort by", INVENTORY_SORT_KEYS, key="inventory_grid_sort")
+    with col4:
+        page_size = st.selectbox("Rows per page", [25, 50, 100, 200], index=1, key="inventory_grid_page_size")
+    col1, col2 = st.columns(2)
+    with col1:
+        descending = st.checkbox("Descending", key="inventory_grid_descending")
+    with col2:
+        low_stock_only = st.checkbox("Low stock only", key="inventory_grid_low_stock")
+
+    filters = {
+        "category": None if category == "All" else category,
+        "supplier": None if supplier == "All" else supplier,
+        "low_stock_only": low_stock_only,
+        "item_ids": None
+    }
+    if search_words(search):
+        profile_phase("search")
+        filters["item_ids"] = refresh_item_search_index().search(search, SEARCH_CONFIG["grid_max_results"])
+        profile_phase("render")
+        if len(filters["item_ids"]) == SEARCH_CONFIG["grid_max_results"]:
+            st.caption(f"Showing the best {SEARCH_CONFIG['grid_max_results']} matches; refine the search to see others")
+
+    # Stack of page cursors; any change to the query restarts from the first page
+    query_key = (tuple(columns), sort_by, descending, page_size,
+                 tuple(tuple(value) if isinstance(value, list) else value for value in filters.values()))
+    if st.session_state.get("inventory_grid_query") != query_key:
+        st.session_state.inventory_grid_query = query_key
+        st.session_state.inventory_grid_cursors = [None]
+    cursors = st.session_state.inventory_grid_cursors
+
+    profile_phase("sql")
+    page, next_cursor = fetch_inventory_page(columns, sort_by, descending, after=cursors[-1],
+                                             page_size=page_size, **filters)
+
+    profile_phase("render")
+    if not page.empty:
+        st.dataframe(page, hide_index=True, use_container_width=True)
+    else:
+        st.info("No inventory items found")
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("◀ Previous", key="inventory_grid_prev", disabled=len(cursors) == 1,
+                  on_click=lambda: cursors.pop())
+    with col2:
+        st.caption(f"Page {len(cursors)}")
+    with col3:
+        st.button("Next ▶", key="inventory_grid_next", disabled=next_cursor is None,
+                  on_click=lambda: cursors.append(next_cursor))
+
+    sql, params = inventory_export_sql(columns, **filters)
+    show_export_controls("inventory_export", sql, params, "inventory_report")
+
+# Order Cart
+# New Order collects lines in st.session_state.order_cart, {item_id: quantity} in the order they
+# were added, and places them as one order.
+def add_to_cart():
+    cart = st.session_state.order_cart
+    item_id = st.session_state.order_cart_item
+    cart[item_id] = cart.get(item_id, 0) + st.session_state.order_cart_quantity
+
+def remove_from_cart():
+    for item_id in st.session_state.order_cart_remove:
+        st.session_state.order_cart.pop(item_id, None)
+    st.session_state.order_cart_remove = []
+
+def clear_cart():
+    st.session_state.order_cart.clear()
+    st.session_state.order_cart_remove = []
+
+def fetch_cart_lines(cart):
+    """Cart lines with live names and stock, as dicts (id, item_name, stock, quantity)"""
+    if not cart:
+        return []
+    rows = cached_query(f"SELECT id, item_name, stock FROM inventory WHERE id IN ({', '.join(['%s'] * len(cart))})",
+                        list(cart), ("inventory",)) or []
+    by_id = {row['id']: row for row in rows}
+    return [dict(by_id[item_id], quantity=quantity) for item_id, quantity in cart.items() if item_id in by_id]
+
+@profiled
+def show_order_cart():
+    """Item search, the cart and the Place Order button for Orders > New Order"""
+    cart = st.session_state.setdefault("order_cart", {})
+    search = st.text_input("Search items", key="order_item_search", placeholder="Name, category or description")
+    profile_phase("sql")
+    # Copies, since cached rows are shared; available is what is left after this cart's lines
+    inventory_items = {item['id']: dict(item, available=item['stock'] - cart.get(item['id'], 0))
+                       for item in search_items(search, in_stock_only=True)}
+    inventory_items = {item_id: item for item_id, item in inventory_items.items() if item['available'] > 0}
+
+    profile_phase("render")
+    if inventory_items:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            item_id = st.selectbox("Select Item", options=list(inventory_items), key="order_cart_item",
+                                   format_func=lambda item_id: f"{inventory_items[item_id]['item_name']} "
+                                                               f"(Stock: {inventory_items[item_id]['available']})")
+        available = inventory_items[item_id]['available']
+        with col2:
+            st.number_input("Quantity", min_value=1, max_value=min(available, 100), value=1,  # Limit large lines
+                            key="order_cart_quantity", help=f"Maximum available: {available}")
+        if len(inventory_items) == SEARCH_CONFIG["max_results"]:
+            st.caption(f"Showing the first {len(inventory_items)} matches; refine the search to narrow them down")
+        st.button("Add to cart", on_click=add_to_cart)
+    elif search:
+        st.warning("No in-stock items match your search")
+    else:
+        st.warning("No items available to order")
+
+    profile_phase("sql")
+    lines = fetch_cart_lines(cart)
+    profile_phase("render")
+    st.markdown(f"**Cart** ({len(lines)} items, {sum(line['quantity'] for line in lines)} units)")
+    if not lines:
+        st.info("The cart is empty; search for items and add them above")
+        return
+
+    st.dataframe(pd.DataFrame(lines, columns=["item_name", "quantity", "stock"])
+                 .rename(columns={"item_name": "Item", "quantity": "Quantity", "stock": "In Stock"}),
+                 hide_index=True, use_container_width=True)
+    short = [line['item_name'] for line in lines if line['quantity'] > line['stock']]
+    if short:
+        st.warning(f"Not enough stock for {', '.join(short)}; remove or reduce these lines")
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.multiselect("Remove from cart", [line['id'] for line in lines], key="order_cart_remove",
+                       format_func={line['id']: line['item_name'] for line in lines}.get)
+    with col2:
+        st.button("Remove selected", on_click=remove_from_cart)
+        st.button("Clear cart", on_click=clear_cart)
+
+    notes = st.text_area("Order Notes", placeholder="Special instructions or requirements")
+
+    if st.button("Place Order", disabled=bool(short)):
+        units = sum(cart.values())
+        try:
+            order_id = place_order(list(cart.items()), st.session_state.user)
+        except OrderError as err:
+            st.error(str(err))
+        else:
+            log_activity(st.session_state.user_id, "Order placed",
+                         f"Order #{order_id}: {len(cart)} items, {units} units")
+            flash(f"Order #{order_id} placed for {units} units across {len(cart)} item(s)!")
+            cart.clear()
+            st.rerun()
+
+# Order Workbench
+# Open orders only, filtered and keyset-paged oldest first (idx_orders_status covers status, order_date).
+@profiled
+def fetch_open_orders(status=None, ordered_by=None, start_date=None, end_date=None, after=None, page_size=50):
+    """One keyset page of open orders; returns (rows, cursor for the next page or None)
+
+    after is the cursor returned with the previous page, an (order_date, order_id) pair.
+    """
+    statuses = [status] if status else OPEN_ORDER_STATUSES
+    clauses = [f"status IN ({', '.join(['%s'] * len(statuses))})"]
+    params = list(statuses)
+    if ordered_by:
+        clauses.append("ordered_by = %s")
+        params.append(ordered_by)
+    if start_date:
+        clauses.append("order_date >= %s")
+        params.append(start_date)
+    if end_date:
+        clauses.append("order_date < %s")
+        params.append(end_date + timedelta(days=1))
+    if after is not None:
+        clauses.append("(order_date > %s OR (order_date = %s AND order_id > %s))")
+        params += [after[0], after[0], after[1]]
+
+    rows = cached_query(f"""
+        SELECT order_id, item_name, line_count, quantity, status, ordered_by, order_date, status_changed_at
+        FROM orders WHERE {' AND '.join(clauses)}
+        ORDER BY order_date, order_id
+        LIMIT %s
+    """, params + [page_size + 1], ("orders",)) or []
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = (rows[-1]["order_date"], rows[-1]["order_id"])
+    return rows, next_cursor
+
+def describe_order_items(order):
+    if order['line_count'] > 1:
+        return f"{order['item_name']} +{order['line_count'] - 1} more, {order['quantity']} units"
+    return f"{order['item_name']} x{order['quantity']}"
+
+def describe_transitions(transitions):
+    return ", ".join(f"{count} {old} → {new}" for (old, new), count in transitions.items())
+
+@profiled
+def show_order_workbench(key):
+    """Open-order picker with filters and paging; the selected orders advance one status in bulk"""
+    profile_phase("sql")
+    users = cached_query("SELECT username FROM users ORDER BY username", tables=("users",), dictionary=False) or []
+
+    profile_phase("render")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        status = st.selectbox("Status", ["All open"] + OPEN_ORDER_STATUSES, key=f"{key}_status")
+    with col2:
+        ordered_by = st.selectbox("Ordered by", ["Anyone"] + [row[0] for row in users], key=f"{key}_user")
+    with col3:
+        date_range = st.date_input("Ordered between", [], key=f"{key}_dates")
+    with col4:
+        page_size = st.selectbox("Rows per page", [25, 50, 100, 200], index=1, key=f"{key}_page_size")
+
+    filters = {
+        "status": None if status == "All open" else status,
+        "ordered_by": None if ordered_by == "Anyone" else ordered_by,
+        "start_date": date_range[0] if len(date_range) > 0 else None,
+        "end_date": date_range[1] if len(date_range) > 1 else None
+    }
+
+    # Stack of page cursors; any change to the filters restarts from the first page
+    query_key = (page_size, tuple(filters.values()))
+    if st.session_state.get(f"{key}_query") != query_key:
+        st.session_state[f"{key}_query"] = query_key
+        st.session_state[f"{key}_cursors"] = [None]
+    cursors = st.session_state[f"{key}_cursors"]
+
+    profile_phase("sql")
+    orders, next_cursor = fetch_open_orders(after=cursors[-1], page_size=page_size, **filters)
+
+    profile_phase("render")
+    if orders:
+        st.dataframe(pd.DataFrame(orders), hide_index=True, use_container_width=True)
+    else:
+        st.info("No open orders match these filters")
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("◀ Previous", key=f"{key}_prev", disabled=len(cursors) == 1, on_click=lambda: cursors.pop())
+    with col2:
+        st.caption(f"Page {len(cursors)}")
+    with col3:
+        st.button("Next ▶", key=f"{key}_next", disabled=next_cursor is None,
+                  on_click=lambda: cursors.append(next_cursor))
+    if not orders:
+        return
+
+    labels = {order['order_id']: f"#{order['order_id']} {describe_order_items(order)} ({order['status']})"
+              for order in orders}
+    select_all = st.checkbox("Select every order on this page", key=f"{key}_select_all")
+    selected = st.multiselect("Orders to advance", list(labels), default=list(labels) if select_all else [],
+                              format_func=labels.get)
+    statuses = {order['order_id']: order['status'] for order in orders}
+    preview = Counter((statuses[order_id], NEXT_ORDER_STATUS[statuses[order_id]]) for order_id in selected)
+    if preview:
+        st.caption(f"Will move {describe_transitions(preview)}")
+
+    if st.button(f"Advance {len(selected)} selected", key=f"{key}_advance", disabled=not selected):
+        try:
+            transitions, skipped = advance_orders({order_id: statuses[order_id] for order_id in selected},
+                                                  st.session_state.user)
+        except OrderError as err:
+            st.error(str(err))
+        else:
+            if transitions:
+                summary = describe_transitions(transitions)
+                moved = sorted(set(selected) - set(skipped))
+                log_activity(st.session_state.user_id, "Order status updated",
+                             f"{summary}: " + ", ".join(f"#{order_id}" for order_id in moved))
+                flash(f"Updated {sum(transitions.values())} orders: {summary}")
+            if skipped:
+                flash(f"Skipped {len(skipped)} orders whose status changed since the list was loaded: "
+                      + ", ".join(f"#{order_id}" for order_id in skipped), icon="⚠️")
+            st.rerun()
+
+# Bulk Import
+IMPORT_REQUIRED_COLUMNS = ["item_name", "supplier", "stock", "min_stock"]
+IMPORT_OPTIONAL_COLUMNS = ["description", "category", "price"]
+
+def read_inventory_upload(uploaded_file):
+    if uploaded_file.name.lower().endswith((".xlsx", ".xls")):
+        return pd.read_excel(uploaded_file, dtype=object)
+    return pd.read_csv(uploaded_file, dtype=object, skipinitialspace=True)
+
+def validate_inventory_import(frame):
+    """Vectorised validation; returns (clean rows ready to import, rejected rows with an 'error' column)"""
+    frame = frame.rename(columns=lambda col: str(col).strip().lower().replace(" ", "_"))
+    missing = [col for col in IMPORT_REQUIRED_COLUMNS if col not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+    columns = IMPORT_REQUIRED_COLUMNS + [col for col in IMPORT_OPTIONAL_COLUMNS if col in frame.columns]
+    frame = frame[columns].copy()
+    frame.index = pd.RangeIndex(2, len(frame) + 2, name="row")    # spreadsheet row numbers (after header)
+    clean = frame.copy()
+    errors = pd.Series("", index=frame.index)
+
+    def reject(mask, message):
+        errors[mask] = errors[mask] + message + "; "
+
+    for col, limit in [("item_name", 100), ("supplier", 100), ("category", 50), ("description", None)]:
+        if col in clean.columns:
+            clean[col] = clean[col].astype("string").str.strip().replace("", pd.NA)
+            if limit:
+                reject(clean[col].str.len().fillna(0) > limit, f"{col} longer than {limit} characters")
+    reject(clean["item_name"].isna(), "item_name is required")
+    reject(clean["supplier"].isna(), "supplier is required")
+
+    for col in ["stock", "min_stock", "price"]:
+        if col in clean.columns:
+            clean[col] = pd.to_numeric(clean[col], errors="coerce")
+            reject(frame[col].notna() & clean[col].isna(), f"{col} must be a number")
+            reject(clean[col] < 0, f"{col} cannot be negative")
+    for col in ["stock", "min_stock"]:
+        reject(frame[col].isna(), f"{col} is required")
+        reject(clean[col].notna() & (clean[col] % 1 != 0), f"{col} must be a whole number")
+
+    # The last occurrence of an item wins, like a spreadsheet edited top to bottom
+    duplicated = clean.duplicated(["item_name", "supplier"], keep="last") & clean["item_name"].notna()
+    reject(duplicated, "duplicate of a later row")
+
+    bad = errors != ""
+    rejected = frame[bad].assign(error=errors[bad].str.rstrip("; "))
+    clean = clean[~bad]
+    clean["stock"] = clean["stock"].astype("int64")
+    clean["min_stock"] = clean["min_stock"].astype("int64")
+    return clean, rejected
+
+def import_inventory(clean, batch_size=None, progress=None):
+    """Upserts validated rows keyed on (item_name, supplier) in one transaction; returns (inserted, updated)
+
+    Each batch costs one lookup, one multi-row INSERT, one CASE-based multi-row UPDATE and
+    two category_summary adjustments.
+    progress, if given, is called with the fraction of rows processed.
+    """
+    batch_size = batch_size or IMPORT_CONFIG["batch_size"]
+    columns = list(clean.columns) + ["supplier_id"]
+    update_columns = [col for col in columns if col not in ("item_name", "supplier")]
+    # Plain Python values (None for missing) so every driver can bind them
+    values = {col: clean[col].astype(object).where(clean[col].notna(), None).tolist() for col in clean.columns}
+    values["stock"] = clean["stock"].tolist()
+    values["min_stock"] = clean["min_stock"].tolist()
+    name_at, supplier_at = columns.index("item_name"), columns.index("supplier")
+
+    inserted = updated = 0
+    with db_connection() as conn:
+        if conn is None:
+            raise RuntimeError("Database unavailable")
+
+        cursor = conn.cursor()
+        lookup = fetch_supplier_lookup(cursor)
+        values["supplier_id"] = [resolve_supplier_id(lookup, name) for name in values["supplier"]]
+        rows = list(zip(*(values[col] for col in columns)))
+        try:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                names = sorted({row[name_at] for row in batch})
+                names_sql = f"item_name IN ({', '.join(['%s'] * len(names))})"
+                cursor.execute(f"SELECT id, item_name, supplier FROM inventory WHERE {names_sql}", names)
+                existing = {(name, supplier): item_id for item_id, name, supplier in cursor.fetchall()}
+                # Swap the old category_summary contribution of every same-named item for the new one
+                apply_category_summary(cursor, names_sql, names, sign=-1)
+
+                inserts, updates = [], []
+                for row in batch:
+                    item_id = existing.get((row[name_at], row[supplier_at]))
+                    if item_id is None:
+                        inserts.append(row)
+                    else:
+                        updates.append((item_id, row))
 
-# Page Components
-def show_login():
-    st.title("🔐 Login to Warehouse Management System")
-    with st.form("login_form"):
-        username = st.text_input("Username")
-        password = st.text_input("Password", type="password")
-        
-        if st.form_submit_button("Login"):
-            if authenticate(username, password):
-                st.success(f"Welcome {username}!")
-                navigate_to("Dashboard")
-            else:
-                st.error("Invalid credentials")
+                if inserts:
+                    placeholders = ", ".join([f"({', '.join(['%s'] * len(columns))})"] * len(inserts))
+                    cursor.execute(f"INSERT INTO inventory ({', '.join(columns)}) VALUES {placeholders}",
+                                   [value for row in inserts for value in row])
+                if updates:
+                    assignments, params = [], []
+                    for col in update_columns:
+                        col_at = columns.index(col)
+                        assignments.append(f"{col} = CASE id {' '.join(['WHEN %s THEN %s'] * len(updates))} END")
+                        params += [value for item_id, row in updates for value in (item_id, row[col_at])]
+                    params += [item_id for item_id, row in updates]
+                    cursor.execute(f"""
+                        UPDATE inventory SET {', '.join(assignments)}
+                        WHERE id IN ({', '.join(['%s'] * len(updates))})
+                    """, params)
+                apply_category_summary(cursor, names_sql, names)
 
-    if st.button("Create New Account"):
-        navigate_to("Signup")
+                inserted += len(inserts)
+                updated += len(updates)
+                if progress:
+                    progress(min(start + batch_size, len(rows)) / len(rows))
+            record_table_writes(cursor, "inventory", "inventory_text")
+            conn.commit()
+        except DB_ERRORS:
+            conn.rollback()
+            raise
 
-def show_signup():
-    st.title("🚀 Sign Up for Warehouse Management")
-    with st.form("signup_form"):
-        new_username = st.text_input("Username")
-        new_password = st.text_input("Password", type="password")
-        confirm_password = st.text_input("Confirm Password", type="password")
-        role = st.selectbox("Role", ["user"], disabled=True)
-        
-        if st.form_submit_button("Register"):
-            if new_password != confirm_password:
-                st.error("Passwords don't match!")
-            elif len(new_password) < 8:
-                st.error("Password must be at least 8 characters")
-            else:
-                if register_user(new_username, new_password, role):
-                    st.success("Account created successfully!")
-                    time.sleep(1)
-                    navigate_to("Login")
+    bump_table_versions("inventory", "inventory_text")
+    return inserted, updated
 
-    if st.button("Back to Login"):
-        navigate_to("Login")
+@profiled
+def show_bulk_import():
+    st.caption(f"Upload a CSV or Excel file with columns {', '.join(IMPORT_REQUIRED_COLUMNS)} "
+               f"and optionally {', '.join(IMPORT_OPTIONAL_COLUMNS)}. "
+               "Rows matching an existing item name and supplier update that item.")
+    uploaded_file = st.file_uploader("Inventory file", type=["csv", "xlsx", "xls"], key="bulk_import_file")
+    if uploaded_file is None:
+        return
 
-def show_sidebar():
-    with st.sidebar:
-        st.image("https://via.placeholder.com/150x50?text=WIMS", width=150)
-        st.title(f"Welcome, {st.session_state.user}")
-        
-        st.session_state.current_page_options = ["Dashboard", "Inventory", "Orders", "Suppliers", "Reports", "Settings"]
-        if st.session_state.user_role == 'admin':
-            st.session_state.current_page_options.append("User Management")
-        
-        st.session_state.current_page_selection = st.selectbox("Navigation", st.session_state.current_page_options, key='st.session_state.current_page_selection')
-        
-        if st.session_state.current_page_selection != st.session_state.current_page:
-            navigate_to(st.session_state.current_page_selection)
-        
-        st.markdown("---")
-        if st.button("Logout"):
-            log_activity(st.session_state.user_id, "Logout")
-            st.session_state.update({
-                'authenticated': False,
-                'user': None,
-                'user_id': None,
-                'user_role': None,
-                'current_page': 'Login'
-            })
-            navigate_to("Login")
-        
-        st.markdown("---")
-        st.caption(f"Role: {st.session_state.user_role}")
-        st.caption(f"v1.2.0 | {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    try:
+        clean, rejected = validate_inventory_import(read_inventory_upload(uploaded_file))
+    except (ValueError, ImportError) as err:
+        st.error(f"Could not read file: {err}")
+        return
+
+    col1, col2 = st.columns(2)
+    col1.metric("Valid Rows", len(clean))
+    col2.metric("Rejected Rows", len(rejected))
+    if not rejected.empty:
+        st.warning("These rows will be skipped:")
+        st.dataframe(rejected.reset_index(), hide_index=True, use_container_width=True)
+        st.download_button("Download rejected rows", rejected.reset_index().to_csv(index=False).encode('utf-8'),
+                           "rejected_rows.csv", "text/csv", key="bulk_import_rejected")
+
+    if not clean.empty and st.button(f"Import {len(clean):,} rows", key="bulk_import_submit"):
+        progress = st.progress(0.0, text="Importing...")
+        try:
+            inserted, updated = import_inventory(clean, progress=lambda done: progress.progress(done, text="Importing..."))
+        except (DB_ERRORS + (RuntimeError,)) as err:
+            st.error(f"Import failed, no changes were saved: {err}")
+            return
+        log_activity(st.session_state.user_id, "Bulk import",
+                     f"{inserted} items added, {updated} updated from {uploaded_file.name}")
+        st.success(f"Imported {inserted:,} new items and updated {updated:,} existing items")
 
 # Main Content Functions
+@profiled
 def show_dashboard():
     st.title("📊 Warehouse Dashboard")
-    conn = get_db_connection()
+    profile_phase("sql")
+    metrics = get_dashboard_metrics()
+    if metrics is None:
+        return
     
     # Key Metrics
+    profile_phase("render")
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM inventory")
-        total_items = int(cursor.fetchone()[0])  # Convert to int
-        st.metric("Total Items", total_items)
+        st.metric("Total Items", metrics["total_items"])
     
     with col2:
-        cursor.execute("SELECT COUNT(*) FROM orders WHERE status = 'Pending'")
-        pending_orders = int(cursor.fetchone()[0])  # Convert to int
-        st.metric("Pending Orders", pending_orders)
+        st.metric("Pending Orders", metrics["pending_orders"])
     
     with col3:
-        cursor.execute("SELECT COUNT(DISTINCT supplier) FROM inventory")
-        suppliers = int(cursor.fetchone()[0])  # Convert to int
-        st.metric("Active Suppliers", suppliers)
+        st.metric("Active Suppliers", metrics["suppliers"])
     
     with col4:
-        cursor.execute("SELECT SUM(stock) FROM inventory")
-        total_stock = float(cursor.fetchone()[0])  # Convert to float
-        st.metric("Total Stock Units", total_stock)
+        st.metric("Total Stock Units", metrics["total_stock"])
     
     # Charts Row
     st.markdown("---")
@@ -549,13 +3574,11 @@ def show_dashboard():
     
     with col1:
         st.subheader("Stock Levels by Category")
-        cursor.execute("SELECT category, SUM(stock) as total FROM inventory GROUP BY category")
-        stock_data = pd.DataFrame(cursor.fetchall(), columns=["Category", "Total"])
+        stock_data = metrics["stock_by_category"]
         
         if not stock_data.empty:
-            stock_data["Total"] = stock_data["Total"].astype(float)
-            
             # Create pie chart with dark theme styling
+            profile_phase("figure")
             fig = px.pie(
                 stock_data, 
                 values="Total", 
@@ -563,7 +3586,7 @@ def show_dashboard():
                 hole=0.3,
                 color_discrete_sequence=px.colors.qualitative.Pastel  # Bright colors that work on dark bg
             )
-            
+        
             # Apply dark theme formatting
             fig.update_layout(
                 plot_bgcolor='rgba(26, 32, 64, 0.7)',  # Semi-transparent dark blue
@@ -579,7 +3602,7 @@ def show_dashboard():
                 ),
                 margin=dict(t=30, b=30)  # Add some margin
             )
-            
+        
             # Make the pie chart edges smoother
             fig.update_traces(
                 textposition='inside',
@@ -588,38 +3611,42 @@ def show_dashboard():
                 hoverinfo='label+percent+value',
                 hovertemplate='<b>%{label}</b><br>%{percent}<br>Total: %{value}'
             )
-            
+        
+            profile_phase("render")
             st.plotly_chart(fig, use_container_width=True)
-            
+        
         else:
             st.info("No category data available")
     
     with col2:
         st.subheader("Recent Orders")
-        cursor.execute("""
-            SELECT o.item_name, o.quantity, o.order_date, o.status 
-            FROM orders o
-            ORDER BY o.order_date DESC LIMIT 10
-        """)
-        orders = pd.DataFrame(cursor.fetchall(), columns=["Item", "Quantity", "Date", "Status"])
-        st.dataframe(orders, hide_index=True, use_container_width=True)
+        profile_phase("render")
+        st.dataframe(metrics["recent_orders"], hide_index=True, use_container_width=True)
     
     # Low Stock Alerts
     st.markdown("---")
     st.subheader("⚠️ Low Stock Alerts")
-    cursor.execute("SELECT item_name, stock, min_stock FROM inventory WHERE stock < min_stock")
-    low_stock = pd.DataFrame(cursor.fetchall(), columns=["Item", "Current Stock", "Min Stock"])
+    low_stock = metrics["low_stock"]
     
     if not low_stock.empty:
+        profile_phase("render")
         st.dataframe(low_stock, hide_index=True, use_container_width=True)
     else:
         st.success("All items are sufficiently stocked!")
-    
-    conn.close()
 
 # Main Application
 def main():
     apply_custom_css_styles()
+    try:
+        schema_ready = ensure_schema() is not None
+    except DB_ERRORS as err:
+        st.error(f"Database schema migration failed: {err}. "
+                 "Fix the cause, run `python manage.py migrate` and reload the page.")
+        st.stop()
+    if not schema_ready:
+        st.error("The database schema could not be checked. Reload the page once the database is reachable.")
+        st.stop()
+    sync_table_versions()
     
     # Initialize session state
     if 'authenticated' not in st.session_state:
@@ -631,6 +3658,7 @@ def main():
             'current_page': 'Login',
             'st.session_state.current_page_selection': 'Dashboard'
         })
+    show_flash_messages()
 
     # Page routing
     if not st.session_state.authenticated:
@@ -639,7 +3667,11 @@ def main():
         elif st.session_state.current_page == "Signup":
             show_signup()
     else:
+        begin_page_queries(st.session_state.current_page)
+        begin_render_profile(st.session_state.current_page)
+        profile_phase("sidebar")
         show_sidebar()
+        profile_phase("page")
         
         st.markdown('<div class="page-transition">', unsafe_allow_html=True)
         
@@ -647,33 +3679,18 @@ def main():
             show_dashboard()
         elif st.session_state.current_page == "Inventory":
             st.title("📦 Inventory Management")
-            conn = get_db_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            tab1, tab2, tab3 = st.tabs(["View Inventory", "Add New Item", "Update Stock"])
-            
-            with tab1:
+            panel = select_panel("inventory_panel", ["View Inventory", "Add New Item", "Update Stock", "Bulk Import"])
+        
+            if panel == "View Inventory":
                 st.subheader("Current Inventory")
-                cursor.execute("SELECT * FROM inventory")
-                inventory = pd.DataFrame(cursor.fetchall())
-                
-                if not inventory.empty:
-                    st.dataframe(inventory, hide_index=True, use_container_width=True)
-                    
-                    # Export button
-                    csv = inventory.to_csv(index=False).encode('utf-8')
-                    st.download_button(
-                        "Export to CSV",
-                        csv,
-                        "inventory_report.csv",
-                        "text/csv",
-                        key='download-csv'
-                    )
-                else:
-                    st.info("No inventory items found")
-            
-            with tab2:
+                show_inventory_grid()
+        
+            if panel == "Add New Item":
                 st.subheader("Add New Inventory Item")
+                supplier_rows = cached_query("SELECT id, name FROM suppliers ORDER BY name", tables=("suppliers",))
+                supplier_options = {row['name']: row['id'] for row in supplier_rows or []}
+                if not supplier_options:
+                    st.info("Add a supplier on the Suppliers page before adding items")
                 with st.form("add_item_form"):
                     item_name = st.text_input("Item Name*", placeholder="Enter item name")
                     description = st.text_area("Description", placeholder="Optional description")
@@ -681,72 +3698,47 @@ def main():
                     stock = st.number_input("Initial Stock*", min_value=0, value=10)
                     min_stock = st.number_input("Minimum Stock Level*", min_value=1, value=5)
                     price = st.number_input("Unit Price", min_value=0.0, value=0.0, step=0.01)
-                    supplier = st.text_input("Supplier*", placeholder="Supplier name")
-                    
+                    supplier = st.selectbox("Supplier*", options=list(supplier_options.keys()))
+                
                     if st.form_submit_button("Add Item"):
                         if item_name and supplier:
-                            cursor.execute("""
-                                INSERT INTO inventory 
-                                (item_name, description, category, stock, min_stock, price, supplier)
-                                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                            """, (item_name, description, category, stock, min_stock, price, supplier))
-                            conn.commit()
-                            log_activity(st.session_state.user_id, "Item added", f"Added {item_name}")
-                            st.success(f"{item_name} added to inventory!")
-                            time.sleep(1)
-                            st.rerun()
+                            if add_inventory_item(item_name, description, category, stock, min_stock, price,
+                                                  supplier, supplier_options[supplier]):
+                                log_activity(st.session_state.user_id, "Item added", f"Added {item_name}")
+                                flash(f"{item_name} added to inventory!")
+                                st.rerun()
                         else:
                             st.error("Please fill required fields (*)")
-            with tab3:
+            if panel == "Update Stock":
                 if st.session_state.user_role in ['manager', 'admin']:
                     st.subheader("Update Order Status")
-                    cursor.execute("SELECT order_id, item_name, quantity, status FROM orders")
-                    orders = cursor.fetchall()
-                    
-                    if orders:
-                        order_options = {f"Order #{order['order_id']} - {order['item_name']} x{order['quantity']}": order['order_id'] for order in orders}
-                        selected_order = st.selectbox("Select Order", options=list(order_options.keys()))
-                        order_id = order_options[selected_order]
-                        
-                        current_status = next(order['status'] for order in orders if order['order_id'] == order_id)
-                        new_status = st.selectbox("Update Status", 
-                                                ["Pending", "Processing", "Shipped", "Delivered"],
-                                                index=["Pending", "Processing", "Shipped", "Delivered"].index(current_status))
-                        
-                        if st.button("Update Status") and new_status != current_status:
-                            cursor.execute("UPDATE orders SET status = %s WHERE order_id = %s", (new_status, order_id))
-                            conn.commit()
-                            log_activity(st.session_state.user_id, "Order status updated", 
-                                        f"Order #{order_id} from {current_status} to {new_status}")
-                            st.success(f"Order #{order_id} status updated to {new_status}!")
-                            time.sleep(1)
-                            st.rerun()
-                    else:
-                        st.info("No orders available")
+                    show_order_workbench("inventory_workbench")
                 else:
                     st.warning("You don't have permission to update order status")
-            
-            conn.close()
+
+            if panel == "Bulk Import":
+                st.subheader("Bulk Import Inventory")
+                if st.session_state.user_role in ['manager', 'admin']:
+                    show_bulk_import()
+                else:
+                    st.warning("You don't have permission to import inventory")
+        
         elif st.session_state.current_page == "Suppliers":
         
             st.title("🏭 Supplier Management")
             
-            conn = get_db_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            tab1, tab2 = st.tabs(["Supplier Directory", "Add Supplier"])
-            
-            with tab1:
+            panel = select_panel("suppliers_panel", ["Supplier Directory", "Add Supplier"])
+        
+            if panel == "Supplier Directory":
                 st.subheader("Supplier List")
-                cursor.execute("SELECT * FROM suppliers")
-                suppliers = pd.DataFrame(cursor.fetchall())
-                
+                suppliers = pd.DataFrame(cached_query("SELECT * FROM suppliers", tables=("suppliers",)) or [])
+            
                 if not suppliers.empty:
                     st.dataframe(suppliers, hide_index=True, use_container_width=True)
                 else:
                     st.info("No suppliers found")
-            
-            with tab2:
+        
+            if panel == "Add Supplier":
                 st.subheader("Add New Supplier")
                 with st.form("add_supplier_form"):
                     name = st.text_input("Supplier Name*")
@@ -755,117 +3747,73 @@ def main():
                     phone = st.text_input("Phone")
                     lead_time = st.number_input("Lead Time (days)", min_value=1, value=7)
                     rating = st.slider("Rating (1-5)", 1, 5, 3)
-                    
+                
                     if st.form_submit_button("Add Supplier"):
                         if name:
-                            cursor.execute("""
-                                INSERT INTO suppliers 
-                                (name, contact_person, email, phone, lead_time_days, rating)
-                                VALUES (%s, %s, %s, %s, %s, %s)
-                            """, (name, contact, email, phone, lead_time, rating))
-                            conn.commit()
-                            log_activity(st.session_state.user_id, "Supplier added", f"Added {name}")
-                            st.success(f"Supplier {name} added successfully!")
-                            time.sleep(1)
-                            st.rerun()
+                            if add_supplier(name, contact, email, phone, lead_time, rating):
+                                log_activity(st.session_state.user_id, "Supplier added", f"Added {name}")
+                                flash(f"Supplier {name} added successfully!")
+                                st.rerun()
                         else:
                             st.error("Supplier name is required")
-            
-            conn.close()
+        
         elif st.session_state.current_page == "Orders":
         
             st.title("📝 Order Management")
             
-            conn = get_db_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            tab1, tab2, tab3 = st.tabs(["New Order", "Order History", "Order Status"])
-            
-            with tab1:
+            panel = select_panel("orders_panel", ["New Order", "Order History", "Order Status"])
+        
+            if panel == "New Order":
                 st.subheader("Place New Order")
-                cursor.execute("SELECT id, item_name, stock FROM inventory")
-                inventory_items = cursor.fetchall()
-                
-                if inventory_items:
-                    item_options = {f"{item['item_name']} (Stock: {item['stock']})": item['id'] for item in inventory_items}
-                    selected_item = st.selectbox("Select Item", options=list(item_options.keys()))
-                    item_id = item_options[selected_item]
-                    
-                    current_stock = next(item['stock'] for item in inventory_items if item['id'] == item_id)
-                    max_order = min(current_stock, 100)  # Limit large orders
-                    
-                    quantity = st.number_input("Quantity", min_value=1, max_value=max_order, value=1,
-                                            help=f"Maximum available: {current_stock}")
-                    
-                    notes = st.text_area("Order Notes", placeholder="Special instructions or requirements")
-                    
-                    if st.button("Place Order"):
-                        # Get item name
-                        item_name = next(item['item_name'] for item in inventory_items if item['id'] == item_id)
-                        
-                        # Create order
-                        cursor.execute("""
-                            INSERT INTO orders (item_id, item_name, quantity, ordered_by, status)
-                            VALUES (%s, %s, %s, %s, 'Pending')
-                        """, (item_id, item_name, quantity, st.session_state.user))
-                        
-                        # Update inventory
-                        new_stock = current_stock - quantity
-                        cursor.execute("UPDATE inventory SET stock = %s WHERE id = %s", (new_stock, item_id))
-                        
-                        conn.commit()
-                        log_activity(st.session_state.user_id, "Order placed", 
-                                    f"Order for {quantity} {item_name}(s)")
-                        st.success(f"Order placed for {quantity} {item_name}(s)!")
-                        time.sleep(1)
-                        st.rerun()
-                else:
-                    st.warning("No items available to order")
-            
-            with tab2:
+                show_order_cart()
+        
+            if panel == "Order History":
                 st.subheader("Order History")
-                cursor.execute("""
-                    SELECT o.order_id, o.item_name, o.quantity, o.status, o.order_date, o.ordered_by
-                    FROM orders o
-                    ORDER BY o.order_date DESC
-                """)
-                orders = pd.DataFrame(cursor.fetchall())
-                
+                include_archived = st.checkbox("Include archived orders", key="order_history_archived",
+                                               help="Delivered orders older than "
+                                                    f"{ARCHIVE_CONFIG['order_retention_days']} days are archived")
+                page_size = st.selectbox("Rows per page", [25, 50, 100, 200], index=1, key="order_history_page_size")
+
+                # Stack of page cursors; changing the view restarts from the newest orders
+                query_key = (page_size, include_archived)
+                if st.session_state.get("order_history_query") != query_key:
+                    st.session_state.order_history_query = query_key
+                    st.session_state.order_history_cursors = [None]
+                cursors = st.session_state.order_history_cursors
+                orders, next_cursor = fetch_order_history(include_archived, cursors[-1], page_size)
+            
                 if not orders.empty:
                     st.dataframe(orders, hide_index=True, use_container_width=True)
+                    col1, col2, col3 = st.columns([1, 2, 1])
+                    with col1:
+                        st.button("◀ Newer", key="order_history_prev", disabled=len(cursors) == 1,
+                                  on_click=lambda: cursors.pop())
+                    with col2:
+                        st.caption(f"Page {len(cursors)}")
+                    with col3:
+                        st.button("Older ▶", key="order_history_next", disabled=next_cursor is None,
+                                  on_click=lambda: cursors.append(next_cursor))
+                    show_export_controls("order_history_export", order_history_query(include_archived), (),
+                                         "order_history")
+
+                    order_id = st.number_input("Show lines for order #", min_value=1, value=None, step=1,
+                                               key="order_lines_id")
+                    if order_id:
+                        lines = load_order_lines(int(order_id), include_archived)
+                        if not lines.empty:
+                            st.dataframe(lines, hide_index=True, use_container_width=True)
+                        else:
+                            st.info(f"No order #{int(order_id)}")
                 else:
                     st.info("No orders found")
-            
-            with tab3:
+        
+            if panel == "Order Status":
                 if st.session_state.user_role in ['manager', 'admin']:
                     st.subheader("Update Order Status")
-                    cursor.execute("SELECT order_id, item_name, quantity, status FROM orders")
-                    orders = cursor.fetchall()
-                    
-                    if orders:
-                        order_options = {f"Order #{order['order_id']} - {order['item_name']} x{order['quantity']}": order['order_id'] for order in orders}
-                        selected_order = st.selectbox("Select Order", options=list(order_options.keys()))
-                        order_id = order_options[selected_order]
-                        
-                        current_status = next(order['status'] for order in orders if order['order_id'] == order_id)
-                        new_status = st.selectbox("Update Status", 
-                                                ["Pending", "Processing", "Shipped", "Delivered"],
-                                                index=["Pending", "Processing", "Shipped", "Delivered"].index(current_status))
-                        
-                        if st.button("Update Status") and new_status != current_status:
-                            cursor.execute("UPDATE orders SET status = %s WHERE order_id = %s", (new_status, order_id))
-                            conn.commit()
-                            log_activity(st.session_state.user_id, "Order status updated", 
-                                        f"Order #{order_id} from {current_status} to {new_status}")
-                            st.success(f"Order #{order_id} status updated to {new_status}!")
-                            time.sleep(1)
-                            st.rerun()
-                    else:
-                        st.info("No orders available")
+                    show_order_workbench("orders_workbench")
                 else:
                     st.warning("You don't have permission to update order status")
-            
-            conn.close()
+        
 
     # Reports
 
@@ -875,30 +3823,24 @@ def main():
         
             st.title("📈 Reports & Analytics")
             
-            conn = get_db_connection()
-            cursor = conn.cursor(dictionary=True)
-            
             report_type = st.selectbox("Select Report", 
-                                    ["Inventory Summary", "Order History", "Supplier Performance"])
-            
+                                    ["Inventory Summary", "Order History", "Supplier Performance",
+                                     "Order Cycle Time"])
+        
             if report_type == "Inventory Summary":
                 st.subheader("Inventory Summary Report")
-                cursor.execute("""
-                    SELECT category, COUNT(*) as item_count, 
-                        SUM(stock) as total_stock, 
-                        AVG(price) as avg_price
-                    FROM inventory
-                    GROUP BY category
-                    ORDER BY total_stock DESC
-                """)
-                inventory_summary = pd.DataFrame(cursor.fetchall())
-                
+                profile_phase("sql")
+                inventory_summary = load_inventory_summary()
+            
                 if not inventory_summary.empty:
+                    profile_phase("render")
                     st.dataframe(inventory_summary, hide_index=True, use_container_width=True)
-                    
+                    show_export_controls("inventory_summary_export", INVENTORY_SUMMARY_SQL, (), "inventory_summary")
+                
                     col1, col2 = st.columns(2)
                     with col1:
                         st.subheader("Stock by Category")
+                        profile_phase("figure")
                         fig = px.bar(
                             inventory_summary, 
                             x="category", 
@@ -907,7 +3849,7 @@ def main():
                             color_discrete_sequence=px.colors.qualitative.Pastel,  # Bright colors
                             labels={'total_stock': 'Total Stock', 'category': 'Category'}  # Better axis labels
                         )
-                        
+                    
                         # Apply dark theme formatting
                         fig.update_layout(
                             plot_bgcolor='rgba(26, 32, 64, 0.7)',
@@ -933,7 +3875,7 @@ def main():
                             ),
                             margin=dict(t=40, b=40, l=40, r=40)  # Balanced margins
                         )
-                        
+                    
                         # Customize bars
                         fig.update_traces(
                             marker_line_color='#1a1a2e',
@@ -941,11 +3883,13 @@ def main():
                             opacity=0.9,
                             hovertemplate='<b>%{x}</b><br>Stock: %{y}'
                         )
-                        
+                    
+                        profile_phase("render")
                         st.plotly_chart(fig, use_container_width=True)
 
                     with col2:
                         st.subheader("Average Price by Category")
+                        profile_phase("figure")
                         fig = px.pie(
                             inventory_summary, 
                             names="category", 
@@ -953,7 +3897,7 @@ def main():
                             color_discrete_sequence=px.colors.qualitative.Pastel,
                             hole=0.3  # Add donut hole for modern look
                         )
-                        
+                    
                         # Apply dark theme formatting
                         fig.update_layout(
                             plot_bgcolor='rgba(26, 32, 64, 0.7)',
@@ -974,7 +3918,7 @@ def main():
                             ),
                             margin=dict(t=40, b=40, l=40, r=40)
                         )
-                        
+                    
                         # Customize pie slices
                         fig.update_traces(
                             textposition='inside',
@@ -982,32 +3926,26 @@ def main():
                             marker=dict(line=dict(color='#1a1a2e', width=1.5)),
                             hovertemplate='<b>%{label}</b><br>Avg Price: %{value:.2f}<br>%{percent}'
                         )
-                        
+                    
+                        profile_phase("render")
                         st.plotly_chart(fig, use_container_width=True)
                 else:
                     st.info("No inventory data available")
-            
+        
             elif report_type == "Order History":
                 st.subheader("Order History Report")
-                
+            
                 date_range = st.date_input("Select Date Range", [], key="order_history_date_range")
-                
+                include_archived = st.checkbox("Include archived orders", key="order_report_archived")
+            
                 if len(date_range) == 2:
                     start_date, end_date = date_range
-                    cursor.execute("""
-                        SELECT DATE(order_date) as day, 
-                            COUNT(*) as order_count,
-                            SUM(quantity) as total_items
-                        FROM orders
-                        WHERE DATE(order_date) BETWEEN %s AND %s
-                        GROUP BY DATE(order_date)
-                        ORDER BY day
-                    """, (start_date, end_date))
-                    
-                    order_history = pd.DataFrame(cursor.fetchall(), columns=["day", "order_count", "total_items"])
-                    
+                    profile_phase("sql")
+                    order_history = load_order_report(start_date, end_date, include_archived)
+                
                     if not order_history.empty:
                         # Style the dataframe
+                        profile_phase("render")
                         st.dataframe(
                             order_history.style
                             .background_gradient(cmap='Blues', subset=['order_count', 'total_items'])
@@ -1015,8 +3953,12 @@ def main():
                             hide_index=True,
                             use_container_width=True
                         )
-                        
+                        show_export_controls("order_report_export",
+                                             *order_report_query(start_date, end_date, include_archived),
+                                             f"order_history_{start_date}_{end_date}")
+                    
                         # Create line chart with dark theme
+                        profile_phase("figure")
                         fig = px.line(
                             order_history, 
                             x="day", 
@@ -1025,7 +3967,7 @@ def main():
                             labels={'day': 'Date', 'order_count': 'Number of Orders'},
                             color_discrete_sequence=['#8f94fb']  # Use your theme color
                         )
-                        
+                    
                         # Apply dark theme formatting
                         fig.update_layout(
                             plot_bgcolor='rgba(26, 32, 64, 0.7)',
@@ -1048,7 +3990,7 @@ def main():
                             title_font=dict(size=18),
                             margin=dict(t=40, b=40, l=40, r=40)
                         )
-                        
+                    
                         # Customize line appearance
                         fig.update_traces(
                             line=dict(width=3),
@@ -1056,10 +3998,12 @@ def main():
                             marker=dict(size=8, line=dict(width=1, color='#1a1a2e')),
                             hovertemplate='<b>%{x|%b %d}</b><br>Orders: %{y}'
                         )
-                        
+                    
+                        profile_phase("render")
                         st.plotly_chart(fig, use_container_width=True)
-                        
+                    
                         # Add secondary chart for items ordered
+                        profile_phase("figure")
                         fig_items = px.area(
                             order_history,
                             x="day",
@@ -1068,36 +4012,27 @@ def main():
                             labels={'day': 'Date', 'total_items': 'Items Ordered'},
                             color_discrete_sequence=['#4e54c8']  # Use your theme color
                         )
-                        
+                    
                         fig_items.update_layout(
                             plot_bgcolor='rgba(26, 32, 64, 0.7)',
                             paper_bgcolor='rgba(26, 32, 64, 0.7)',
                             font_color='white',
                             hoverlabel=dict(bgcolor='#4e54c8')
                         )
-                        
+                    
+                        profile_phase("render")
                         st.plotly_chart(fig_items, use_container_width=True)
                     else:
                         st.info("No orders found in selected date range")
 
             elif report_type == "Supplier Performance":
                 st.subheader("Supplier Performance Report")
-                cursor.execute("""
-                    SELECT s.name, 
-                        COUNT(i.id) as item_count,
-                        AVG(s.lead_time_days) as avg_lead_time,
-                        s.rating
-                    FROM suppliers s
-                    LEFT JOIN inventory i ON s.name = i.supplier
-                    GROUP BY s.name, s.rating
-                    ORDER BY s.rating DESC
-                """)
-                
-                supplier_performance = pd.DataFrame(cursor.fetchall(), 
-                                                columns=["name", "item_count", "avg_lead_time", "rating"])
-                
+                profile_phase("sql")
+                supplier_performance = load_supplier_performance()
+            
                 if not supplier_performance.empty:
                     # Style the dataframe with conditional formatting
+                    profile_phase("render")
                     st.dataframe(
                         supplier_performance.style
                         .background_gradient(cmap='YlGnBu', subset=['rating'])
@@ -1105,8 +4040,10 @@ def main():
                         hide_index=True,
                         use_container_width=True
                     )
-                    
+                    show_export_controls("supplier_performance_export", SUPPLIER_PERFORMANCE_SQL, (), "supplier_performance")
+                
                     # Create bubble chart with dark theme
+                    profile_phase("figure")
                     fig = px.scatter(
                         supplier_performance, 
                         x="avg_lead_time", 
@@ -1123,7 +4060,7 @@ def main():
                         color_discrete_sequence=px.colors.qualitative.Pastel,
                         size_max=40  # Control bubble size
                     )
-                    
+                
                     # Apply dark theme formatting
                     fig.update_layout(
                         plot_bgcolor='rgba(26, 32, 64, 0.7)',
@@ -1148,7 +4085,7 @@ def main():
                         ),
                         margin=dict(t=40, b=40, l=40, r=40)
                     )
-                    
+                
                     # Customize markers
                     fig.update_traces(
                         marker=dict(
@@ -1160,10 +4097,12 @@ def main():
                                     'Rating: %{y:.1f}/5<br>'
                                     'Items: %{marker.size}'
                     )
-                    
+                
+                    profile_phase("render")
                     st.plotly_chart(fig, use_container_width=True)
-                    
+                
                     # Add bar chart for quick comparison
+                    profile_phase("figure")
                     fig_bar = px.bar(
                         supplier_performance.sort_values('rating', ascending=False),
                         x='name',
@@ -1172,7 +4111,7 @@ def main():
                         title='Supplier Ratings',
                         color_discrete_sequence=px.colors.qualitative.Pastel
                     )
-                    
+                
                     fig_bar.update_layout(
                         plot_bgcolor='rgba(26, 32, 64, 0.7)',
                         paper_bgcolor='rgba(26, 32, 64, 0.7)',
@@ -1180,60 +4119,210 @@ def main():
                         xaxis_title='',
                         yaxis_range=[0,5]
                     )
-                    
+                
+                    profile_phase("render")
                     st.plotly_chart(fig_bar, use_container_width=True)
                 else:
                     st.info("No supplier data available")
 
-            conn.close()
+            elif report_type == "Order Cycle Time":
+                st.subheader("Order Cycle Time Report")
+
+                today = datetime.now().date()
+                date_range = st.date_input("Status changes between", [today - timedelta(days=30), today],
+                                           key="cycle_time_date_range")
+
+                if len(date_range) == 2:
+                    start_date, end_date = date_range
+                    profile_phase("sql")
+                    durations = load_stage_durations(start_date, end_date)
+                    throughput = load_status_throughput(start_date, end_date)
+
+                    profile_phase("dataframe")
+                    percentiles = stage_percentiles(durations)
+
+                    if not percentiles.empty:
+                        profile_phase("render")
+                        st.markdown("**Hours per stage** (completed stages in range)")
+                        st.dataframe(
+                            percentiles.style.format({column: '{:,.1f}' for column in
+                                                      ['mean_hours', 'p50_hours', 'p90_hours', 'p95_hours']}),
+                            hide_index=True,
+                            use_container_width=True
+                        )
+                    else:
+                        st.info("No completed stages in selected date range")
+
+                    if not throughput.empty:
+                        profile_phase("figure")
+                        fig = px.bar(
+                            throughput,
+                            x="day",
+                            y="order_count",
+                            color="status",
+                            title="Daily Status Throughput",
+                            labels={'day': 'Date', 'order_count': 'Orders', 'status': 'Reached'},
+                            category_orders={'status': ORDER_STATUSES},
+                            color_discrete_sequence=px.colors.qualitative.Pastel
+                        )
+
+                        fig.update_layout(
+                            plot_bgcolor='rgba(26, 32, 64, 0.7)',
+                            paper_bgcolor='rgba(26, 32, 64, 0.7)',
+                            font_color='white',
+                            xaxis=dict(gridcolor='rgba(142, 148, 251, 0.2)', showgrid=False),
+                            yaxis=dict(gridcolor='rgba(142, 148, 251, 0.2)', showgrid=True),
+                            hoverlabel=dict(bgcolor='#4e54c8', font=dict(color='white')),
+                            margin=dict(t=40, b=40, l=40, r=40)
+                        )
+
+                        profile_phase("render")
+                        st.plotly_chart(fig, use_container_width=True)
+
+                st.markdown("**Open order backlog** by time in current status")
+                profile_phase("sql")
+                backlog = load_backlog_ageing()
+
+                if not backlog.empty:
+                    profile_phase("render")
+                    st.dataframe(
+                        backlog.style.format({'oldest_hours': '{:,.1f}'}, na_rep='-'),
+                        hide_index=True,
+                        use_container_width=True
+                    )
+
+                    profile_phase("figure")
+                    age_bands = [label for label, _ in BACKLOG_AGE_BANDS] + [BACKLOG_UNTIMED_BAND]
+                    fig_backlog = px.bar(
+                        backlog.melt(id_vars="status", value_vars=age_bands, var_name="age", value_name="orders"),
+                        x="status",
+                        y="orders",
+                        color="age",
+                        title="Backlog Ageing",
+                        labels={'status': 'Status', 'orders': 'Open Orders', 'age': 'In status for'},
+                        category_orders={'age': age_bands},
+                        color_discrete_sequence=px.colors.sequential.Purples[2::2] + ["gray"]
+                    )
+
+                    fig_backlog.update_layout(
+                        plot_bgcolor='rgba(26, 32, 64, 0.7)',
+                        paper_bgcolor='rgba(26, 32, 64, 0.7)',
+                        font_color='white',
+                        hoverlabel=dict(bgcolor='#4e54c8')
+                    )
+
+                    profile_phase("render")
+                    st.plotly_chart(fig_backlog, use_container_width=True)
+                else:
+                    st.info("No open orders")
+
 
     # Settings
         elif st.session_state.current_page == "Settings":
        
             st.title("⚙️ Settings")
             
-            tab1, tab2 = st.tabs(["Profile", "System"])
+            panel = select_panel("settings_panel", ["Profile", "System"])
             
-            with tab1:
+            if panel == "Profile":
                 st.subheader("User Profile")
                 
-                conn = get_db_connection()
-                cursor = conn.cursor(dictionary=True)
-                cursor.execute("SELECT * FROM users WHERE id = %s", (st.session_state.user_id,))
-                user = cursor.fetchone()
+                users = cached_query("SELECT username, role FROM users WHERE id = %s", (st.session_state.user_id,),
+                                     ("users",))
                 
-                if user:
+                if users:
+                    user = users[0]
                     with st.form("profile_form"):
                         st.text_input("Username", value=user['username'], disabled=True)
                         st.text_input("Role", value=user.get('role', 'user'), disabled=True)
-                        
+                    
                         new_password = st.text_input("New Password", type="password")
                         confirm_password = st.text_input("Confirm Password", type="password")
-                        
+                    
                         if st.form_submit_button("Update Password"):
                             if new_password and new_password == confirm_password:
                                 if len(new_password) >= 8:
-                                    cursor.execute("""
-                                        UPDATE users 
-                                        SET password = %s 
-                                        WHERE id = %s
-                                    """, (hash_password(new_password), st.session_state.user_id))
-                                    conn.commit()
-                                    log_activity(st.session_state.user_id, "Password changed")
-                                    st.success("Password updated successfully!")
+                                    if update_password(st.session_state.user_id, new_password):
+                                        log_activity(st.session_state.user_id, "Password changed")
+                                        st.success("Password updated successfully!")
                                 else:
                                     st.error("Password must be at least 8 characters")
                             else:
                                 st.error("Passwords don't match or are empty")
                 
-                conn.close()
             
-            with tab2:
+            if panel == "System":
                 if st.session_state.user_role == 'admin':
-                    st.subheader("System Settings")
-                    
-                    # Placeholder for system settings
-                    st.info("System configuration options will appear here")
+                    st.subheader("Database Activity")
+                    query_stats = get_query_stats()
+                    st.caption("Statements per page panel across all sessions since startup; "
+                               "latencies include fetching the rows")
+                    st.dataframe(query_stats.snapshot(), hide_index=True, use_container_width=True)
+
+                    st.subheader("Slow Queries")
+                    slow_queries = query_stats.slow_queries()
+                    st.caption(f"Statements taking at least {QUERY_LOG_CONFIG['slow_threshold_ms']} ms, newest first")
+                    if slow_queries.empty:
+                        st.info("No slow queries recorded")
+                    else:
+                        st.dataframe(slow_queries, hide_index=True, use_container_width=True)
+                    if st.button("Reset Query Statistics"):
+                        query_stats.reset()
+                        st.rerun()
+
+                    st.subheader("Render Profiler")
+                    st.caption("Times your own page reruns by phase (SQL, DataFrame, figure, render); "
+                               f"samples are appended to {PROFILER_CONFIG['samples_path']}")
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.session_state.render_profiling = st.checkbox(
+                            "Profile my page renders", value=st.session_state.get("render_profiling", False))
+                    with col2:
+                        st.session_state.render_profiling_cprofile = st.checkbox(
+                            "Capture cProfile per rerun", value=st.session_state.get("render_profiling_cprofile", False),
+                            disabled=not st.session_state.render_profiling)
+                    show_render_profiles()
+
+                    st.subheader("Connection Pool")
+                    stats = pool_stats()
+                    col1, col2, col3, col4 = st.columns(4)
+                    col1.metric("Open / Size", f"{stats['open']} / {stats['size']}")
+                    col2.metric("Checkouts", stats['checkouts'])
+                    col3.metric("Avg Wait (ms)", f"{stats['avg_wait_time'] * 1000:.2f}")
+                    col4.metric("Exhaustion Events", stats['exhaustion_events'])
+                    st.caption(f"In use: {stats['in_use']} | Idle: {stats['idle']} | "
+                               f"Max wait: {stats['max_wait_time'] * 1000:.2f} ms | "
+                               f"Timeouts: {stats['timeouts']} | Reconnects: {stats['reconnects']}")
+
+                    st.subheader("Query Cache")
+                    cache = get_query_cache().stats()
+                    col1, col2, col3, col4 = st.columns(4)
+                    col1.metric("Hit Rate", f"{cache['hit_rate']:.0%}")
+                    col2.metric("Entries", f"{cache['entries']} / {get_query_cache().max_entries}")
+                    col3.metric("Cached Rows", cache['rows'])
+                    col4.metric("Evictions", cache['evictions'])
+                    st.caption(f"Hits: {cache['hits']} | Misses: {cache['misses']} | "
+                               f"Invalidated by writes: {cache['stale']} | Expired: {cache['expired']} | "
+                               f"Too large to cache: {cache['uncacheable']}")
+
+                    st.subheader("Item Search Index")
+                    search_stats = get_item_search_index().stats()
+                    col1, col2, col3, col4 = st.columns(4)
+                    col1.metric("Indexed Items", search_stats['items'])
+                    col2.metric("Trigrams", search_stats['trigrams'])
+                    col3.metric("Searches", search_stats['searches'])
+                    col4.metric("Rebuilds", search_stats['rebuilds'])
+                    st.caption(f"Items added incrementally: {search_stats['incremental_items']}")
+
+                    st.subheader("Activity Log Writer")
+                    audit = get_audit_logger().stats()
+                    col1, col2, col3, col4 = st.columns(4)
+                    col1.metric("Pending Events", audit['pending'])
+                    col2.metric("Events Written", audit['written'])
+                    col3.metric("Flushes", audit['flushes'])
+                    col4.metric("Dropped", audit['dropped'])
+                    if audit['errors']:
+                        st.warning(f"{audit['errors']} activity log flushes failed and will be retried")
                 else:
                     st.warning("You don't have permission to access system settings")
 
@@ -1242,34 +4331,30 @@ def main():
             
             st.title("👥 User Management")
             
-            conn = get_db_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            tab1, tab2 = st.tabs(["User List", "Add User"])
-            
-            with tab1:
+            panel = select_panel("users_panel", ["User List", "Add User"])
+        
+            if panel == "User List":
                 st.subheader("Registered Users")
-                cursor.execute("SELECT id, username, role, created_at FROM users")
-                users = pd.DataFrame(cursor.fetchall())
-                
+                users = pd.DataFrame(cached_query("SELECT id, username, role, created_at FROM users",
+                                                  tables=("users",)) or [])
+            
                 if not users.empty:
                     st.dataframe(users, hide_index=True, use_container_width=True)
                 else:
                     st.info("No users found")
-            
-            with tab2:
+        
+            if panel == "Add User":
                 st.subheader("Create New User")
                 with st.form("create_user_form"):
                     username = st.text_input("Username*")
                     password = st.text_input("Password*", type="password")
                     role = st.selectbox("Role*", ["user", "manager", "admin"])
-                    
+                
                     if st.form_submit_button("Create User"):
                         if username and password:
                             if len(password) >= 8:
                                 if register_user(username, password, role):
-                                    st.success(f"User {username} created with {role} role!")
-                                    time.sleep(1)
+                                    flash(f"User {username} created with {role} role!")
                                     st.rerun()
                                 else:
                                     st.error("Username already exists")
@@ -1277,11 +4362,12 @@ def main():
                                 st.error("Password must be at least 8 characters")
                         else:
                             st.error("Please fill all required fields (*)")
-            
-            conn.close()    
+        
             # Add other pages similarly
             
             st.markdown("</div>", unsafe_allow_html=True)
 
+        finish_render_profile(finish_page_queries())
+
 if __name__ == "__main__":
     main()
\ No newline at end of file